@@ -1,5 +1,8 @@
 from PIL import Image, ImageDraw, ImageFont
 
+from BaseWiringDiagram import BaseWiringDiagram
+from Component import Component
+from ComponentTypeRegistry import ComponentType
 
 
 class WiringDiagramCreator:
@@ -13,9 +16,13 @@ class WiringDiagramCreator:
         self.wiringImage = None
 
 
-    def createWiringDiagram(self):
+    def createWiringDiagram(self, inputComponents=None, outputComponents=None, controllerComponent=None):
         """
         Creates a wiring diagram.
+        Args:
+            inputComponents (list): The input components, or None if there are none.
+            outputComponents (list): The output components, or None if there are none.
+            controllerComponent (Component): The controller the components are wired to.
         """
         # must have the following data before creating the wiring diagram:
         # - dict containing three keys, "inputComponents",
@@ -38,8 +45,11 @@ class WiringDiagramCreator:
         # determine the size of the image based on the number of components 
         # and the size of the components' images 
 
-        xResolution = 10000
-        yResolution = 10000
+        if controllerComponent is None:
+            raise ValueError("A wiring diagram needs a controller component")
+        inputComponents = inputComponents if inputComponents is not None else []
+        outputComponents = outputComponents if outputComponents is not None else []
+        xResolution, yResolution = self.determineCircuitImageSize(inputComponents, outputComponents, controllerComponent)
 
         # create the blank image using the dimensions determined above
         
@@ -110,6 +120,34 @@ class WiringDiagramCreator:
 
     # create function to determine number of connections between components and other components
 
+    def determineCircuitImageSize(self, inputComponents, outputComponents, controllerComponent):
+        """
+        Determines the smallest image size the components, the controller and the wires between them fit in.
+        Args:
+            inputComponents (list): The input components.
+            outputComponents (list): The output components.
+            controllerComponent (Component): The controller component.
+        Returns:
+            tuple: The (width, height) of the image.
+        """
+        return BaseWiringDiagram.computeMinimalResolution(
+            [self._sizingType(component) for component in inputComponents],
+            [self._sizingType(component) for component in outputComponents],
+            self._sizingType(controllerComponent))
+
+    @staticmethod
+    def _sizingType(component: Component):
+        """
+        Returns the ComponentType the canvas is sized from. A component without a shared type, like one restored from a snapshot without a registered type or built from its own pin dict, is sized from its own pins and image.
+        Args:
+            component (Component): The component.
+        Returns:
+            ComponentType: The component's type, or one built from the component.
+        """
+        if component.componentType is not None:
+            return component.componentType
+        return ComponentType(component.Label, component.imagePath, component.electricalValuesDict, None, isPowered=component.isPowered, pinTable=component.localPinTable, imageSize=component.getImageDimensions())
+
     def setCircuitImageOutputPath(self, circuitImageOutputPath:str):
         """
         Sets the output path for the circuit image.
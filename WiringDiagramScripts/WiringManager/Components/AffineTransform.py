@@ -0,0 +1,106 @@
+from math import ceil, cos, floor, radians, sin
+
+
+class AffineTransform:
+    """
+    A 2D affine transform, the top two rows of a 3x3 matrix:
+
+        | a b c |
+        | d e f |
+        | 0 0 1 |
+
+    so a point (x, y) maps to (a*x + b*y + c, d*x + e*y + f). Transforms are composed with then(), which lets a rotation, a scale and a translation be folded into a single matrix and applied to every pin in one pass.
+    """
+    def __init__(self, a: float = 1.0, b: float = 0.0, c: float = 0.0, d: float = 0.0, e: float = 1.0, f: float = 0.0):
+        self.coefficients = (a, b, c, d, e, f)
+
+    def __repr__(self):
+        return f"AffineTransform{self.coefficients}"
+
+    def __eq__(self, other):
+        return isinstance(other, AffineTransform) and self.coefficients == other.coefficients
+
+    def __hash__(self):
+        return hash(self.coefficients)
+
+    @staticmethod
+    def identity():
+        return AffineTransform()
+
+    @staticmethod
+    def translation(dx: float, dy: float):
+        return AffineTransform(1.0, 0.0, dx, 0.0, 1.0, dy)
+
+    @staticmethod
+    def scaling(sx: float, sy: float):
+        return AffineTransform(sx, 0.0, 0.0, 0.0, sy, 0.0)
+
+    @staticmethod
+    def rotation(angle: float):
+        """
+        Returns a counterclockwise rotation about the origin in image coordinates (y pointing down), the direction PIL's Image.rotate() turns an image.
+        """
+        rad = radians(angle % 360.0)
+        # rounded the way PIL rounds them, so quarter turns are exact and sizes agree with the rotated image
+        cosine = round(cos(rad), 15)
+        sine = round(sin(rad), 15)
+        return AffineTransform(cosine, sine, 0.0, -sine, cosine, 0.0)
+
+    @staticmethod
+    def rotatedImageSize(imageSize: tuple[int, int], angle: float):
+        """
+        Returns the size of an image after Image.rotate(angle, expand=True).
+        """
+        width, height = imageSize
+        angle %= 360.0
+        if angle % 90 == 0:
+            # PIL transposes quarter turns
+            return (height, width) if angle % 180 else (width, height)
+        xs, ys = [], []
+        # PIL turns the corners about the center of the image and rounds the result outwards
+        transform = AffineTransform.translation(-width / 2, -height / 2).then(AffineTransform.rotation(-angle)).then(AffineTransform.translation(width / 2, height / 2))
+        for x, y in ((0, 0), (width, 0), (width, height), (0, height)):
+            newX, newY = transform.apply(x, y)
+            xs.append(newX)
+            ys.append(newY)
+        return (ceil(max(xs)) - floor(min(xs)), ceil(max(ys)) - floor(min(ys)))
+
+    @staticmethod
+    def imageRotation(imageSize: tuple[int, int], angle: float):
+        """
+        Returns the transform that maps a point of an image to the same point of the image after Image.rotate(angle, expand=True).
+        """
+        width, height = imageSize
+        newWidth, newHeight = AffineTransform.rotatedImageSize(imageSize, angle)
+        return AffineTransform.translation(-width / 2, -height / 2).then(AffineTransform.rotation(angle)).then(AffineTransform.translation(newWidth / 2, newHeight / 2))
+
+    @staticmethod
+    def placement(originalSize: tuple[int, int], newSize: tuple[int, int], rotationAngle: float, topLeft: tuple[float, float]):
+        """
+        Returns the single transform that takes a pin from the component's original image to the canvas: rotate the image, scale the rotated image to newSize and move it to topLeft.
+        Args:
+            originalSize (tuple): The size of the component's original image.
+            newSize (tuple): The size of the image on the canvas, after rotating and resizing.
+            rotationAngle (float): The counterclockwise rotation in degrees. Any angle is supported.
+            topLeft (tuple): The top left pixel of the image on the canvas.
+        """
+        rotatedWidth, rotatedHeight = AffineTransform.rotatedImageSize(originalSize, rotationAngle)
+        return AffineTransform.imageRotation(originalSize, rotationAngle).then(AffineTransform.scaling(newSize[0] / rotatedWidth, newSize[1] / rotatedHeight)).then(AffineTransform.translation(topLeft[0], topLeft[1]))
+
+    def then(self, other):
+        """
+        Returns the transform that applies this transform first and the other one second.
+        """
+        a1, b1, c1, d1, e1, f1 = self.coefficients
+        a2, b2, c2, d2, e2, f2 = other.coefficients
+        return AffineTransform(
+            a2 * a1 + b2 * d1, a2 * b1 + b2 * e1, a2 * c1 + b2 * f1 + c2,
+            d2 * a1 + e2 * d1, d2 * b1 + e2 * e1, d2 * c1 + e2 * f1 + f2,
+        )
+
+    def apply(self, x: float, y: float):
+        """
+        Returns the transformed (x, y).
+        """
+        a, b, c, d, e, f = self.coefficients
+        return (a * x + b * y + c, d * x + e * y + f)
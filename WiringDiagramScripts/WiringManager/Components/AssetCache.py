@@ -0,0 +1,220 @@
+import os
+from PIL import Image, UnidentifiedImageError
+
+from SpriteAtlas import SpriteAtlas
+
+
+class AssetCache:
+    """
+    Process-wide cache of decoded component images.
+
+    Every component image is opened and decoded at most once per process. The cached images are treated as read-only; callers that need to modify an image must work on the copy returned by PIL operations such as rotate() or resize(). Because the decoded pixel data lives in the parent process, worker processes created with fork share it copy-on-write.
+
+    Images that are in a loaded SpriteAtlas, and their quarter turns, are cut from the atlas texture instead of being opened and rotated. The atlas of the default image directory is loaded, and built if needed, the first time an image is asked for.
+    """
+    DEFAULT_IMAGE_DIRECTORY = os.path.join(os.path.dirname(__file__), "Images")
+    isAtlasEnabled = True
+
+    _images = {}
+    _rotatedImages = {}
+    # (normalized path, angle, size, resample) -> (trimmed image, mask, offset) for pasting
+    _pasteSprites = {}
+    # normalized image path -> (atlas, file name) of every image in a loaded atlas
+    _atlasSprites = {}
+    # normalized image directory -> its loaded atlas
+    _atlases = {}
+    _isDefaultAtlasLoaded = False
+
+    @staticmethod
+    def _normalizePath(imagePath: str):
+        return os.path.normcase(os.path.abspath(imagePath))
+
+    @staticmethod
+    def loadAtlas(imageDirectory: str = None, atlasPath: str = None):
+        """
+        Loads the sprite atlas of an image directory, building it if it is missing or out of date. Images in the directory are served from the atlas from then on. Loading a directory again returns the atlas already loaded.
+        Args:
+            imageDirectory (str): The directory of the images. Defaults to the component Images directory.
+            atlasPath (str): The atlas files without their extension. Defaults to the atlas in the directory's __pycache__.
+        Returns:
+            SpriteAtlas: The loaded atlas.
+        """
+        if imageDirectory is None:
+            imageDirectory = AssetCache.DEFAULT_IMAGE_DIRECTORY
+        directoryKey = AssetCache._normalizePath(imageDirectory)
+        if directoryKey in AssetCache._atlases:
+            return AssetCache._atlases[directoryKey]
+        atlas = SpriteAtlas.loadOrBuild(imageDirectory, atlasPath)
+        AssetCache._atlases[directoryKey] = atlas
+        for fileName in atlas.sprites:
+            AssetCache._atlasSprites[AssetCache._normalizePath(os.path.join(imageDirectory, fileName))] = (atlas, fileName)
+        return atlas
+
+    @staticmethod
+    def _getAtlasEntry(imagePath: str):
+        if not AssetCache.isAtlasEnabled:
+            return None
+        if not AssetCache._isDefaultAtlasLoaded:
+            AssetCache._isDefaultAtlasLoaded = True
+            try:
+                AssetCache.loadAtlas()
+            except (OSError, ValueError):
+                # without an atlas every image is decoded from its own file, as before
+                pass
+        return AssetCache._atlasSprites.get(AssetCache._normalizePath(imagePath))
+
+    @staticmethod
+    def getRotatedImage(imagePath: str, rotationAngle: float):
+        """
+        Returns an image after Image.rotate(rotationAngle, expand=True), rotating it at most once per process.
+        Args:
+            imagePath (str): The path to the image file.
+            rotationAngle (float): The counterclockwise rotation in degrees.
+        Returns:
+            Image: The rotated image. Do not modify it in place.
+        """
+        entry = AssetCache._getAtlasEntry(imagePath)
+        if entry is not None and rotationAngle % 90 == 0:
+            atlas, fileName = entry
+            return atlas.getSprite(fileName, int(rotationAngle) % 360)
+
+        key = (AssetCache._normalizePath(imagePath), rotationAngle % 360)
+        image = AssetCache._rotatedImages.get(key)
+        if image is None:
+            image = AssetCache.getImage(imagePath).rotate(rotationAngle, expand=True)
+            AssetCache._rotatedImages[key] = image
+        return image
+
+    @staticmethod
+    def getPasteSprite(imagePath: str, rotationAngle: float = 0, size: tuple = None, resample=None):
+        """
+        Returns an image prepared for pasting: rotated, resized and trimmed to the box of its non-transparent pixels, with the mask to paste it through. Each combination of image, angle, size and filter is prepared once per process.
+        Args:
+            imagePath (str): The path to the image file.
+            rotationAngle (float): The counterclockwise rotation in degrees, as in Image.rotate(expand=True).
+            size (tuple): The size to resize the rotated image to, or None to keep its size.
+            resample: The Image.Resampling filter for the resize, or None for Image.resize's default.
+        Returns:
+            tuple: The trimmed image (None if every pixel is transparent), its mask (None if every pixel is opaque, so it can be pasted without one) and the (x, y) offset of the trimmed image inside the full one.
+        """
+        key = (AssetCache._normalizePath(imagePath), rotationAngle % 360, tuple(size) if size is not None else None, resample)
+        sprite = AssetCache._pasteSprites.get(key)
+        if sprite is None:
+            image = AssetCache.getRotatedImage(imagePath, rotationAngle)
+            if size is not None and tuple(size) != image.size:
+                image = image.resize(size) if resample is None else image.resize(size, resample)
+
+            if "A" not in image.getbands():
+                sprite = (image, None, (0, 0))
+            else:
+                alpha = image.getchannel("A")
+                box = alpha.getbbox()
+                if box is None:
+                    sprite = (None, None, (0, 0))
+                else:
+                    if box != (0, 0) + image.size:
+                        image = image.crop(box)
+                        alpha = alpha.crop(box)
+                    # a fully opaque sprite is pasted without a mask, which copies rows instead of blending pixels
+                    mask = None if alpha.getextrema()[0] == 255 else alpha
+                    sprite = (image, mask, (box[0], box[1]))
+            AssetCache._pasteSprites[key] = sprite
+        return sprite
+
+    @staticmethod
+    def getImage(imagePath: str):
+        """
+        Returns the decoded image at the given path, loading it on first use. An image in a loaded atlas is cut from the atlas texture instead of being opened.
+        Args:
+            imagePath (str): The path to the image file.
+        Returns:
+            Image: The decoded image. Do not modify it in place.
+        """
+        key = AssetCache._normalizePath(imagePath)
+        image = AssetCache._images.get(key)
+        if image is None:
+            entry = AssetCache._getAtlasEntry(imagePath)
+            if entry is not None:
+                atlas, fileName = entry
+                image = atlas.getSprite(fileName, 0)
+                AssetCache._images[key] = image
+                return image
+            try:
+                with Image.open(imagePath) as openedImage:
+                    openedImage.load()
+                    image = openedImage.copy()
+            except FileNotFoundError:
+                raise ValueError(f"Image file not found at path: {imagePath}")
+            except UnidentifiedImageError:
+                raise ValueError(f"Image file at path: {imagePath} is not a valid image file")
+            except IOError:
+                raise ValueError(f"Error occurred while opening the image file at path: {imagePath}")
+            AssetCache._images[key] = image
+        return image
+
+    @staticmethod
+    def getImageSize(imagePath: str):
+        """
+        Returns the size of the image at the given path.
+        Args:
+            imagePath (str): The path to the image file.
+        Returns:
+            tuple: The width and height of the image in pixels.
+        """
+        entry = AssetCache._getAtlasEntry(imagePath)
+        if entry is not None:
+            atlas, fileName = entry
+            left, top, right, bottom = atlas.getSpriteBox(fileName, 0)
+            return (right - left, bottom - top)
+        return AssetCache.getImage(imagePath).size
+
+    @staticmethod
+    def preloadDirectory(imageDirectory: str = None):
+        """
+        Loads and decodes every PNG image in a directory, with its quarter turns when the directory has an atlas.
+        Args:
+            imageDirectory (str): The directory to load. Defaults to the component Images directory.
+        Returns:
+            list: The paths of the images that were loaded.
+        """
+        if imageDirectory is None:
+            imageDirectory = AssetCache.DEFAULT_IMAGE_DIRECTORY
+        if AssetCache.isAtlasEnabled:
+            try:
+                AssetCache.loadAtlas(imageDirectory)
+            except (OSError, ValueError):
+                pass
+
+        loadedPaths = []
+        for fileName in sorted(os.listdir(imageDirectory)):
+            if fileName.lower().endswith(".png"):
+                imagePath = os.path.join(imageDirectory, fileName)
+                AssetCache.getImage(imagePath)
+                if AssetCache._getAtlasEntry(imagePath) is not None:
+                    for rotationAngle in (90, 180, 270):
+                        AssetCache.getRotatedImage(imagePath, rotationAngle)
+                loadedPaths.append(imagePath)
+        return loadedPaths
+
+    @staticmethod
+    def isCached(imagePath: str):
+        """
+        Returns True if the image at the given path has already been decoded.
+        """
+        return AssetCache._normalizePath(imagePath) in AssetCache._images
+
+    @staticmethod
+    def clear():
+        """
+        Drops every cached image and unloads the atlases.
+        """
+        for image in AssetCache._images.values():
+            image.close()
+        AssetCache._images.clear()
+        AssetCache._rotatedImages.clear()
+        AssetCache._pasteSprites.clear()
+        AssetCache._atlasSprites.clear()
+        for atlas in AssetCache._atlases.values():
+            atlas.close()
+        AssetCache._atlases.clear()
+        AssetCache._isDefaultAtlasLoaded = False
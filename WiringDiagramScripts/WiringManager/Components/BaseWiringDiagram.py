@@ -1,3 +1,7 @@
+import math
+import multiprocessing
+import os
+
 from PIL import Image, ImageDraw, ImageFont
 from Component import Component
 from datetime import datetime
@@ -9,9 +13,33 @@ from PiGPIOPinHeader import PiGPIOPinHeader
 #from WiringLogicNew import WiringLogic
 from WiringLogicNEWEST import WiringLogic
 from Coordinates import Coordinates
+from AssetCache import AssetCache
+from AffineTransform import AffineTransform
+from ComponentRow import ComponentRow
+from DisplayList import DisplayList
+from ControllerPinAllocator import ControllerPinAllocator
+from LabelPlacer import LabelPlacer
+from WireColorAllocator import WireColorAllocator
 from Utilities.PinEnum import *
 
 
+def _routeControllerTask(task):
+    """
+    Routes the wires of one controller's components. Runs in a worker process, so the routed wires are returned rather than kept on the components.
+
+    :param task: The (input components, output components, controller key, controller, image dimensions, wire step height, pin allocator) to route, the components keyed by slot.
+    :return: The wires of every component, keyed by ("input" or "output", slot key) and then by destination.
+    """
+    inputComponents, outputComponents, controllerKey, controller, imageDimensions, wireStepHeight, allocator = task
+    wirer = WiringLogic(inputComponents, outputComponents, {controllerKey: controller}, imageDimensions, controllerPinAllocators={controllerKey: allocator} if allocator is not None else {}, wireStepHeight=wireStepHeight)
+    wirer.createWires()
+    routedWires = {}
+    for group, components in (("input", inputComponents), ("output", outputComponents)):
+        for slotKey, component in components.items():
+            routedWires[(group, slotKey)] = component.wires
+    return routedWires
+
+
 class BaseWiringDiagram:
     """
     Base class for creating wiring diagrams. Contains all basic elements of a wiring diagram.
@@ -24,11 +52,40 @@ class BaseWiringDiagram:
     DISTANCE_BETWEEN_BOTTOM_COMPONENTS_AND_BOTTOM = 0.25
     COMPONENT_HEIGHT_AND_WIDTH = 0.06
     DISTANCE_BETWEEN_COMP_ROWS_AND_CONTROL_COMP = 0.125
-
-    def __init__(self, xResolution, yResolution):
-        
+    COMPONENT_ROW_HEIGHT = 0.12
+    DISTANCE_BETWEEN_COMPONENT_ROWS = 0.32
+    COMPONENT_SLOT_WIDTH = 0.08
+    LEGEND_LEFT = 0.40
+    OTHER_REQUIREMENTS_LEFT = 0.77
+
+    # the columns of a wiring table row, see getWiringTable
+    WIRING_TABLE_COLUMNS = ("controller", "net", "color", "component", "componentPin", "headerPin", "bcm")
+
+    # padding, in pixels, inside the component row slots and the framed texts
+    SLOT_VERTICAL_PADDING = 10
+    SLOT_HORIZONTAL_PADDING = 20
+    FRAME_PADDING = 10
+
+    # the fraction of its image size a component is drawn at on a canvas sized by computeMinimalResolution
+    COMPONENT_SPRITE_SCALE = 0.3
+    # the room, in pixels, one wire needs beside its neighbours: two wire widths
+    WIRE_LANE_SPACING = 6
+    # the supersampling factors setSupersampling accepts: 1 draws straight onto the canvas, 2 and 4 draw every tile at 4 and 16 times the pixels
+    SUPERSAMPLING_SCALES = (1, 2, 4)
+    # the colour of the thin lines from a wire or pin to a label that had to be placed away from it, see addNetLabels
+    LEADER_LINE_COLOR = "gray"
+
+    def __init__(self, xResolution, yResolution, isDraft=False, spriteScale=1.0):
+        """
+        :param xResolution: The width of the canvas in pixels.
+        :param yResolution: The height of the canvas in pixels.
+        :param isDraft: Draft diagrams use nearest-neighbour sprites, skip all text and are meant to be wired with drawDraftWires instead of being routed.
+        :param spriteScale: Scale applied to images that are placed at their native size, like the controller. Draft renders at a reduced resolution pass the same reduction here.
+        """
         self.xResolution = xResolution
         self.yResolution = yResolution
+        self.isDraft = isDraft
+        self.spriteScale = spriteScale
         self.wirer = None
         self.wiringDiagram = Image.new("RGB", (xResolution,yResolution), "white")
         self.canvas = ImageDraw.Draw(self.wiringDiagram)
@@ -39,15 +96,245 @@ class BaseWiringDiagram:
         self.inputComponentObjects = {}
         self.outputComponentObjects= {}
         self.controllerComponentObjects = {}
+        # ("input" or "output", controller key) -> the ComponentRow laid out by drawComponentRows, and the slot key of its first slot
+        self.componentRows = {}
+        self.componentRowFirstSlots = {}
+        self.framedTexts = []
+
+        # everything drawn on the canvas is also recorded here, so regions of the canvas can be repainted
+        self.displayList = DisplayList()
+        self.currentOwner = None
+        # the supersampling factor repainted regions are drawn at, see setSupersampling
+        self.supersampling = 1
+        # the font sizes the legend table and the net labels were drawn at, or None if they were not drawn; kept so a snapshot can draw them again
+        self.legendFontSize = None
+        self.netLabelFontSize = None
+
+        # controller key -> the allocator that hands out that controller's power and ground pins
+        self.controllerPinAllocators = {}
+        # chooses the wire colours of this diagram alone; drawWires() starts a new one for every full drawing
+        self.wireColorAllocator = WireColorAllocator(BaseWiringDiagram.WIRE_LANE_SPACING)
+        # wire owner, see drawComponentWire -> the colour the wire was drawn in
+        self.drawnWireColors = {}
 
         self.outputComponentTopLine = self.yResolution * BaseWiringDiagram.DISTANCE_BETWEEN_TOP_COMPONENTS_AND_TOP
-        self.outputComponentBottomLine = self.outputComponentTopLine+self.yResolution * 0.12
-        self.inputComponentTopLine = self.outputComponentBottomLine+self.yResolution * 0.32
-        self.inputCompounentBottomLine = self.inputComponentTopLine+self.yResolution * 0.12
+        self.outputComponentBottomLine = self.outputComponentTopLine+self.yResolution * BaseWiringDiagram.COMPONENT_ROW_HEIGHT
+        self.inputComponentTopLine = self.outputComponentBottomLine+self.yResolution * BaseWiringDiagram.DISTANCE_BETWEEN_COMPONENT_ROWS
+        self.inputCompounentBottomLine = self.inputComponentTopLine+self.yResolution * BaseWiringDiagram.COMPONENT_ROW_HEIGHT
+
+        self.setControllerLayout(1)
+
+    def setControllerLayout(self, numberOfControllers, columns=None):
+        """
+        Splits the area between the top of the output row and the bottom of the input row into a grid of regions, one per controller. Every region has its own output row, controller band and input row, laid out like the whole area is for a single controller. Call before addComponentRows.
+
+        :param numberOfControllers: The number of controllers on the canvas. Controller key k gets the k-th region, counted left to right, then top to bottom.
+        :param columns: The number of regions side by side. Defaults to all of them in one row.
+        """
+        if numberOfControllers < 1:
+            raise ValueError(f"A diagram needs at least one controller, not {numberOfControllers}")
+        self.numberOfControllers = numberOfControllers
+        self.controllerColumns = min(columns, numberOfControllers) if columns is not None else numberOfControllers
+        if self.controllerColumns < 1:
+            raise ValueError(f"A controller layout needs at least one column, not {columns}")
+        self.controllerRows = -(-numberOfControllers // self.controllerColumns)
+
+    def getControllerRegion(self, controllerKey=0):
+        """
+        Returns the (left, top, right, bottom) of a controller's region.
+        """
+        if not 0 <= controllerKey < self.numberOfControllers:
+            raise ValueError(f"There is no controller {controllerKey} in a layout of {self.numberOfControllers} controllers")
+        row, column = divmod(controllerKey, self.controllerColumns)
+        regionHeight = (self.inputCompounentBottomLine - self.outputComponentTopLine) / self.controllerRows
+        left = self.xResolution * column / self.controllerColumns
+        right = self.xResolution * (column + 1) / self.controllerColumns
+        top = self.outputComponentTopLine + regionHeight * row
+        return (left, top, right, top + regionHeight)
+
+    def getRegionLines(self, controllerKey=0):
+        """
+        Returns the output top, output bottom, input top and input bottom lines of a controller's region.
+        """
+        lines = (self.outputComponentTopLine, self.outputComponentBottomLine, self.inputComponentTopLine, self.inputCompounentBottomLine)
+        if self.controllerRows == 1:
+            return lines
+        _, top, _, _ = self.getControllerRegion(controllerKey)
+        # each region row is the whole area shrunk by the number of region rows
+        return tuple(top + (line - self.outputComponentTopLine) / self.controllerRows for line in lines)
+
+    def getWireStepHeight(self):
+        """
+        Returns the height wire steps are a fraction of, see WiringLogic.WIRE_STEP_FRACTION. Each row of controller regions is laid out like a canvas of the height divided by the number of region rows.
+        """
+        return self.yResolution / self.controllerRows
+
+    def getSlotKeys(self, group, controllerKey=0):
+        """
+        Returns the slot keys of one controller's input or output row.
+
+        :param group: "input" or "output".
+        :param controllerKey: The controller whose row to return the slots of.
+        """
+        componentRow = self.componentRows.get((group, controllerKey))
+        if componentRow is None:
+            return range(0)
+        firstSlot = self.componentRowFirstSlots[(group, controllerKey)]
+        return range(firstSlot, firstSlot + componentRow.maxNumberOfComps)
+
+    @staticmethod
+    def _measureText(text, fontSize):
+        """
+        Returns the (width, height) createFramedText draws a text at, without drawing it.
+        """
+        left, top, right, bottom = ImageDraw.Draw(Image.new("1", (1, 1))).textbbox((0, 0), text, align="center", font_size=fontSize, font=ImageFont.load_default(fontSize))
+        return (right - left, bottom)
+
+    @staticmethod
+    def _infoText(title, author, dateTime):
+        return f"Title: {title}\nAuthor: {author}\nDate: {dateTime}\nNot Drawn to Scale"
+
+    @staticmethod
+    def computeMinimalResolution(inputComponentTypes, outputComponentTypes, controllerComponentType, title="", author="", titleFontSize=70, inputRotationAngle=180, outputRotationAngle=0, infoRectangleFraction=0.18, componentScale=None, controllerColumns=1, controllerRows=1):
+        """
+        Finds the smallest canvas the diagram fits on, before anything is drawn.
+
+        Every element of the diagram is placed at a fixed fraction of the resolution, so each one gives a lower bound on the width or height: the component slots must hold the sprites at componentScale of their image size, each row must leave a wire lane per net between its slots, the band between the rows must hold the controller, the first segment of every wire and a lane per net of the busier row, and the title and info rectangles must fit their text.
+
+        :param inputComponentTypes: The ComponentType of every input component, in row order.
+        :param outputComponentTypes: The ComponentType of every output component, in row order.
+        :param controllerComponentType: The ComponentType of the controller, drawn at its image size turned a quarter turn.
+        :param title: The title of the diagram.
+        :param author: The author shown in the info rectangle.
+        :param titleFontSize: The font size of the title.
+        :param inputRotationAngle: The rotation applied to every input component image.
+        :param outputRotationAngle: The rotation applied to every output component image.
+        :param infoRectangleFraction: The fraction of the height the info rectangles sit above the bottom.
+        :param componentScale: The fraction of their image size the components are drawn at. Defaults to COMPONENT_SPRITE_SCALE.
+        :param controllerColumns: The number of controller regions side by side, see setControllerLayout. The components given are those of one region, which gets this fraction of the width.
+        :param controllerRows: The number of controller regions stacked, which divide the height of the rows and the band between them.
+        :return: The (xResolution, yResolution) of the canvas.
+        """
+        if componentScale is None:
+            componentScale = BaseWiringDiagram.COMPONENT_SPRITE_SCALE
+        laneSpacing = BaseWiringDiagram.WIRE_LANE_SPACING
+        padding = BaseWiringDiagram.FRAME_PADDING
+        # bounds on the size of one controller's region; the canvas holds controllerColumns x controllerRows of them
+        regionWidths = [1]
+        regionHeights = [1]
+        minimumWidths = [1]
+        minimumHeights = [1]
+
+        # component rows
+        rowNets = []
+        for componentTypes, rotationAngle in ((inputComponentTypes, inputRotationAngle), (outputComponentTypes, outputRotationAngle)):
+            numberOfComponents = len(componentTypes)
+            rowNets.append(sum(len(componentType.pinTable) for componentType in componentTypes))
+            if numberOfComponents == 0:
+                continue
+            # long rows wrap into bands of at most MAX_SLOTS_PER_BAND slots, stacked inside the row's height
+            slotsPerBand = min(numberOfComponents, ComponentRow.MAX_SLOTS_PER_BAND)
+            numberOfBands = ComponentRow.countBands(numberOfComponents, slotsPerBand)
+            spriteSizes = [AffineTransform.rotatedImageSize(componentType.imageSize, rotationAngle) for componentType in componentTypes]
+            regionWidths.append(componentScale * max(width for width, _ in spriteSizes) / BaseWiringDiagram.COMPONENT_SLOT_WIDTH)
+            regionHeights.append(numberOfBands * (componentScale * max(height for _, height in spriteSizes) + 2 * BaseWiringDiagram.SLOT_VERTICAL_PADDING) / BaseWiringDiagram.COMPONENT_ROW_HEIGHT)
+            # the gap beside every slot must let the wires of the widest component pass
+            slotGap = laneSpacing * max(len(componentType.pinTable) for componentType in componentTypes)
+            regionWidths.append((2 * BaseWiringDiagram.SLOT_HORIZONTAL_PADDING + (slotsPerBand + 1) * slotGap) / (1 - slotsPerBand * BaseWiringDiagram.COMPONENT_SLOT_WIDTH))
+
+        # the controller sits in the middle of the band between the rows, with the first segment of the wires of both rows above and below it
+        controllerWidth, controllerHeight = AffineTransform.rotatedImageSize(controllerComponentType.imageSize, 90)
+        freeBandFraction = BaseWiringDiagram.DISTANCE_BETWEEN_COMPONENT_ROWS - 2 * WiringLogic.FIRST_SEGMENT_STEPS * WiringLogic.WIRE_STEP_FRACTION
+        # wires that end on the same controller pin share its lane, so the controller's pin count bounds the lanes
+        controllerPins = len(controllerComponentType.pinTable)
+        regionHeights.append((controllerHeight + 2 * laneSpacing * min(max(rowNets), controllerPins)) / freeBandFraction)
+        regionWidths.append(controllerWidth + 2 * laneSpacing * min(sum(rowNets), controllerPins))
+        minimumWidths.append(controllerColumns * max(regionWidths))
+        minimumHeights.append(controllerRows * max(regionHeights))
+
+        # title
+        titleWidth, titleHeight = BaseWiringDiagram._measureText(title, titleFontSize)
+        minimumWidths.append(titleWidth + 3 * padding)
+        minimumHeights.append((titleHeight + 3 * padding) / BaseWiringDiagram.DISTANCE_BETWEEN_TOP_COMPONENTS_AND_TOP)
+
+        # info, legend and other requirements rectangles, measured with the widest date
+        infoWidth, infoHeight = BaseWiringDiagram._measureText(BaseWiringDiagram._infoText(title, author, "00/00/0000 00:00:00"), 30)
+        legendWidth, _ = BaseWiringDiagram._measureText("Legend", 30)
+        otherRequirementsWidth, _ = BaseWiringDiagram._measureText("Other Requirements", 30)
+        minimumWidths.append((infoWidth + 3 * padding) / BaseWiringDiagram.LEGEND_LEFT)
+        minimumWidths.append((legendWidth + 3 * padding) / (BaseWiringDiagram.OTHER_REQUIREMENTS_LEFT - BaseWiringDiagram.LEGEND_LEFT))
+        minimumWidths.append((otherRequirementsWidth + 2 * padding) / (1 - BaseWiringDiagram.OTHER_REQUIREMENTS_LEFT))
+        minimumHeights.append((infoHeight + 2 * padding) / infoRectangleFraction)
+
+        return (math.ceil(max(minimumWidths)), math.ceil(max(minimumHeights)))
 
 
     def createWirer(self):
-        self.wirer = WiringLogic(self.inputComponentObjects, self.outputComponentObjects, self.controllerComponentObjects, (self.xResolution, self.yResolution), testing=self.wiringDiagram)
+        self.allocateControllerPins()
+        self.wirer = WiringLogic(self.inputComponentObjects, self.outputComponentObjects, self.controllerComponentObjects, (self.xResolution, self.yResolution), testing=self.wiringDiagram, controllerPinAllocators=self.controllerPinAllocators)
+
+    def routeWires(self, numberOfWorkers=None):
+        """
+        Routes the wires of every component. A single controller is routed by self.wirer, which is kept for rerouting single nets later. Nets never run between controllers, so with several controllers each one's components are routed on their own, spread over worker processes, and self.wirer is left as None.
+
+        :param numberOfWorkers: The number of processes the controllers are spread over. Defaults to the number of CPUs; 1 routes in this process.
+        """
+        if len(self.controllerComponentObjects) <= 1:
+            self.createWirer()
+            self.wirer.createWires()
+            return
+
+        self.allocateControllerPins()
+        self.wirer = None
+        tasks = []
+        for controllerKey, controller in self.controllerComponentObjects.items():
+            inputComponents = {slotKey: component for slotKey, component in self.inputComponentObjects.items() if component is not None and component.controllerKey == controllerKey}
+            outputComponents = {slotKey: component for slotKey, component in self.outputComponentObjects.items() if component is not None and component.controllerKey == controllerKey}
+            tasks.append((inputComponents, outputComponents, controllerKey, controller, (self.xResolution, self.yResolution), self.getWireStepHeight(), self.controllerPinAllocators.get(controllerKey)))
+
+        if numberOfWorkers is None:
+            numberOfWorkers = min(os.cpu_count() or 1, len(tasks))
+        # the workers of a RenderWorkerPool are daemons, which cannot start processes of their own
+        if numberOfWorkers <= 1 or multiprocessing.current_process().daemon:
+            results = list(map(_routeControllerTask, tasks))
+        else:
+            with multiprocessing.Pool(numberOfWorkers) as pool:
+                results = pool.map(_routeControllerTask, tasks)
+
+        # the components sent to the workers were copies, so the routed wires are attached to the originals here
+        objectsOfGroup = {"input": self.inputComponentObjects, "output": self.outputComponentObjects}
+        for routedWires in results:
+            for (group, slotKey), wires in routedWires.items():
+                component = objectsOfGroup[group][slotKey]
+                for destination, wire in wires.items():
+                    component.addWire(wire, destination)
+
+    def allocateControllerPins(self, components=None):
+        """
+        Assigns a controller power or ground pin to every component pin that needs one and does not have one yet.
+
+        :param components: The components to assign pins to. Defaults to every input and output component.
+        """
+        if components is None:
+            components = list(self.inputComponentObjects.values()) + list(self.outputComponentObjects.values())
+        componentsByController = {}
+        for component in components:
+            if component is not None:
+                componentsByController.setdefault(component.controllerKey, []).append(component)
+        for controllerKey, controllerComponents in componentsByController.items():
+            allocator = self.controllerPinAllocators.get(controllerKey)
+            if allocator is None:
+                allocator = ControllerPinAllocator(self.controllerComponentObjects[controllerKey])
+                self.controllerPinAllocators[controllerKey] = allocator
+            allocator.allocate(controllerComponents)
+
+    def releaseControllerPins(self, component:Component):
+        """
+        Frees the controller pins assigned to a component that is taken off the diagram.
+        """
+        allocator = self.controllerPinAllocators.get(component.controllerKey)
+        if allocator is not None:
+            allocator.release(component)
 
 
     def addTitle(self, title, fontSize):
@@ -80,17 +367,25 @@ class BaseWiringDiagram:
 
         
     def createFramedText(self, title, fontSize, topLeftTitleFramePixel,padding):
-        
+        # kept so the frame of the diagram can be stored and redrawn, see DiagramSnapshot
+        self.framedTexts.append((title, fontSize, tuple(topLeftTitleFramePixel), padding))
+        if self.isDraft:
+            # text is the slowest thing to draw and unreadable at draft resolution
+            return
+
         font = ImageFont.load_default(fontSize)
         lm =self.canvas.textbbox(topLeftTitleFramePixel, title,  align="center", font_size=fontSize,font=font)
 
 
 
+        textBounds = lm
         lm = (lm[0]-padding+1, lm[1]-padding, lm[2]+padding, lm[3]+padding)
         self.canvas.rectangle(lm, outline="black", width=2)
+        self.displayList.addRectangle(((lm[0], lm[1]), (lm[2], lm[3])), "black", 2, owner=self.currentOwner)
 
 
         self.canvas.text(topLeftTitleFramePixel, title, fill="black", align="center", font_size=fontSize, font=font)
+        self.displayList.addText(topLeftTitleFramePixel, title, "black", "center", fontSize, textBounds, owner=self.currentOwner)
 
     def drawLine(self, start:Coordinates, end:Coordinates, color="black", width=3):
         """
@@ -100,6 +395,7 @@ class BaseWiringDiagram:
         :param
         """
         self.canvas.line([start.returnCoordinatesTuple(),end.returnCoordinatesTuple()], fill=color, width=width)
+        self.displayList.addLine([start.returnCoordinatesTuple(),end.returnCoordinatesTuple()], color, width, owner=self.currentOwner)
 
 
     def drawHorizontalLine(self, height):
@@ -110,6 +406,7 @@ class BaseWiringDiagram:
         :param end: The ending point of the line.
         """
         self.canvas.line([(0,height),(self.xResolution, height)], fill="black")
+        self.displayList.addLine([(0,height),(self.xResolution, height)], "black", 1, owner=self.currentOwner)
 
     def saveDiagram(self, outputPath):
         """
@@ -120,43 +417,34 @@ class BaseWiringDiagram:
         self.wiringDiagram.save(outputPath)
 
 
-    def drawComponentRows(self, numberOfInputComponents, numberOfOutputComponents):
+    def drawComponentRows(self, numberOfInputComponents, numberOfOutputComponents, controllerKey=0):
         """
         Draws the component rows on the wiring diagram.
 
         :param numberOfComponents: The number of components in each row.
+        :param controllerKey: The controller whose region the rows are drawn in. Each controller's slots follow the slots already drawn, see getSlotKeys.
         """
-        self.drawComponentRectangles(self.outputComponentTopLine, self.outputComponentBottomLine, self.outputComponentLocations, self.outputComponentObjects, numberOfOutputComponents)
+        outputTopLine, outputBottomLine, inputTopLine, inputBottomLine = self.getRegionLines(controllerKey)
+        self.drawComponentRectangles(outputTopLine, outputBottomLine, self.outputComponentLocations, self.outputComponentObjects, numberOfOutputComponents, controllerKey=controllerKey)
 
-        self.drawComponentRectangles(self.inputComponentTopLine, self.inputCompounentBottomLine, self.inputComponentLocations,self.inputComponentObjects ,numberOfInputComponents)
+        self.drawComponentRectangles(inputTopLine, inputBottomLine, self.inputComponentLocations,self.inputComponentObjects ,numberOfInputComponents, controllerKey=controllerKey)
 
-    def drawComponentRectangles(self, topLine, bottomLine, dictToUse, objectDictToUse, numberOfComponents, outline="black"):
+    def drawComponentRectangles(self, topLine, bottomLine, dictToUse, objectDictToUse, numberOfComponents, outline="black", controllerKey=0):
         """ 
         Draws all of the component rectangles on one of the component rows, ensuring they are equally spaced.
 
+        :return: The ComponentRow holding the slots, also kept in self.componentRows under ("input" or "output", controllerKey).
         """
-        # Determine dimensions of each component rectangle based on the number of components, the size of a row, and a small vertical padding and a large padding value
-        verticalPadding = 10
-        horizontalPadding = 20
-
-        componentWidth = self.xResolution * 0.08
-        componentHeight = componentWidth
-
-        # Calculate the total width of all components
-        totalComponentWidth = componentWidth * numberOfComponents
-
-        # Calculate the available width for spacing
-        availableWidth = self.xResolution - totalComponentWidth - 2 * horizontalPadding
-
-        # Calculate the spacing between components
-        spacing = availableWidth / (numberOfComponents + 1)
-
-        for i in range(numberOfComponents):
-            topLeft = (horizontalPadding + spacing * (i + 1) + i * componentWidth, topLine + verticalPadding)
-            bottomRight = (topLeft[0] + componentWidth, bottomLine - verticalPadding)
+        left, _, right, _ = self.getControllerRegion(controllerKey)
+        width = right - left
+        # rows that do not fit across the region wrap into several bands of slots, see ComponentRow
+        componentRow = ComponentRow(self._getGroupName(dictToUse), topLine, left, width, numberOfComponents, rowHeight=bottomLine - topLine, slotWidth=width * BaseWiringDiagram.COMPONENT_SLOT_WIDTH, horizontalPadding=BaseWiringDiagram.SLOT_HORIZONTAL_PADDING, verticalPadding=BaseWiringDiagram.SLOT_VERTICAL_PADDING)
+        self.componentRows[(componentRow.label, controllerKey)] = componentRow
+        self.componentRowFirstSlots[(componentRow.label, controllerKey)] = len(dictToUse)
+
+        for topLeft, bottomRight in componentRow.getSlotBoxes():
             self.drawComponentRectangle(topLeft, bottomRight, dictToUse, objectDictToUse, outline=outline)
-        
-        
+        return componentRow
 
 
     def drawComponentRectangle(self, topLeft, bottomRight, dictLocationToUse, dictComponentToUse, outline=None):
@@ -178,6 +466,7 @@ class BaseWiringDiagram:
         
         self.canvas.rectangle([topLeft, bottomRight], outline=outline, width=2
         )
+        self.displayList.addRectangle((topLeft, bottomRight), outline, 2, owner=("slot", self._getGroupName(dictLocationToUse), componentKey))
 
     @staticmethod
     def findRectangularDimensions(topLeft, bottomRight):
@@ -201,44 +490,47 @@ class BaseWiringDiagram:
         """
         return (int((topLeft[0] + bottomRight[0]) // 2), int((topLeft[1] + bottomRight[1]) // 2))
 
-    def addResizedImage(self, component:Component, centerPoint, destinationDimensions, rotationAngle=0, resize=True, isController=False):
+    def addResizedImage(self, component:Component, centerPoint, destinationDimensions, rotationAngle=0, resize=True):
         """
         Adds an image to the wiring diagram.
 
         :param imagePath: The path to the image to add.
         :param centerPoint: The center point of the image.
         """
-        image = Image.open(component.imagePath)
-        originalImageSize = image.size
-        image = image.rotate(rotationAngle, expand=True)
-        
-        # pin coordinates are based on the original image orientation, so we need to adjust them after rotating
-        
-        
-        if resize:
-            image = image.resize(destinationDimensions)
-            # pin coordinates are based on the original image size, so we need to adjust them after scaling
+        originalImageSize, pastedImageSize, position = self._pasteComponentImage(component, centerPoint, destinationDimensions, rotationAngle=rotationAngle, resize=resize)
 
-        position = (int(centerPoint[0]-destinationDimensions[0]//2), int(centerPoint[1]-destinationDimensions[1]//2))
+        # the pins follow the image through the same rotation, resize and paste position
+        component.adjustCoordinates(originalImageSize, pastedImageSize, rotationAngle, position)
 
 
-        self.wiringDiagram.paste(image, position)
 
-        if rotationAngle != 0:
-            if rotationAngle == 90:
-                position = (int(centerPoint[0]-destinationDimensions[0]//2), int(centerPoint[1]-destinationDimensions[1]//2))
-            elif rotationAngle == 180:
-                position = (int(centerPoint[0]+destinationDimensions[0]//2), int(centerPoint[1]+destinationDimensions[1]//2))
-            elif rotationAngle == 270:
-                position = (int(centerPoint[0]+destinationDimensions[0]//2), int(centerPoint[1]-destinationDimensions[1]//2))
 
-        if isController:
-            destinationDimensions = (destinationDimensions[1], destinationDimensions[0])
-        component.adjustCoordinates(originalImageSize,destinationDimensions, rotationAngle, position)
 
+    def _pasteComponentImage(self, component:Component, centerPoint, destinationDimensions, rotationAngle=0, resize=True):
+        """
+        Pastes a component's image onto the canvas without touching its pin coordinates, and records where it was placed in component.placement.
 
+        :param component: The component whose image to paste.
+        :param centerPoint: The center point of the image on the canvas.
+        :param destinationDimensions: The size of the image on the canvas.
+        :return: The size of the component's original image, the size of the pasted image and the top left pixel it was pasted at.
+        """
+        originalImageSize = AssetCache.getImageSize(component.imagePath)
+        rotatedSize = AffineTransform.rotatedImageSize(originalImageSize, rotationAngle)
+        pastedImageSize = tuple(destinationDimensions) if resize else rotatedSize
+        resample = Image.Resampling.NEAREST if self.isDraft else None
+        # the rotated, resized and trimmed sprite is prepared once per size; quarter turns come pre-rotated from the sprite atlas
+        image, mask, offset = AssetCache.getPasteSprite(component.imagePath, rotationAngle, pastedImageSize, resample)
 
+        position = (int(centerPoint[0]-destinationDimensions[0]//2), int(centerPoint[1]-destinationDimensions[1]//2))
 
+        # only the opaque part of the sprite is pasted; the pins are still placed from the untrimmed image's position and size
+        if image is not None:
+            spritePosition = (position[0] + offset[0], position[1] + offset[1])
+            self.wiringDiagram.paste(image, spritePosition, mask)
+            self.displayList.addImage(image, spritePosition, owner=("component", id(component)), mask=mask)
+        component.placement = (tuple(centerPoint), tuple(destinationDimensions), rotationAngle, resize)
+        return originalImageSize, pastedImageSize, position
 
     def addImage(self, component:Component, centerPoint,  rotationAngle=0):
         """
@@ -250,25 +542,28 @@ class BaseWiringDiagram:
         
 
 
-        with Image.open(component.imagePath) as image:
+        image = AssetCache.getImage(component.imagePath)
          
-            #component.printCoordinates()
-            
-            position = (int(centerPoint[0]-image.width//2), int(centerPoint[1]-image.height//2))
-            component.adjustCoordinatesAfterScaling(image.width, image.height)
-            #component.printCoordinates()
-            
-            
-            
-            image = image.rotate(rotationAngle, expand=True)
-            component.adjustCoordinatesAfterRotation(rotationAngle)
-            #component.printCoordinates()
-            
-            
-            
-            self.wiringDiagram.paste(image, position)
-            component.adjustCoordinatesAfterPlacement(position)
-            #component.printCoordinates()
+        #component.printCoordinates()
+        
+        position = (int(centerPoint[0]-image.width//2), int(centerPoint[1]-image.height//2))
+        component.adjustCoordinatesAfterScaling(image.width, image.height)
+        #component.printCoordinates()
+        
+        
+        
+        image, mask, offset = AssetCache.getPasteSprite(component.imagePath, rotationAngle)
+        component.adjustCoordinatesAfterRotation(rotationAngle)
+        #component.printCoordinates()
+        
+        
+        
+        if image is not None:
+            spritePosition = (position[0] + offset[0], position[1] + offset[1])
+            self.wiringDiagram.paste(image, spritePosition, mask)
+            self.displayList.addImage(image, spritePosition, owner=("component", id(component)), mask=mask)
+        component.adjustCoordinatesAfterPlacement(position)
+        #component.printCoordinates()
 
 
 
@@ -277,31 +572,39 @@ class BaseWiringDiagram:
         self.outputComponentTopLine = self.yResolution * BaseWiringDiagram.DISTANCE_BETWEEN_TOP_COMPONENTS_AND_TOP
         self.drawHorizontalLine(self.outputComponentTopLine)
 
-        self.outputComponentBottomLine = self.outputComponentTopLine+self.yResolution * 0.12
+        self.outputComponentBottomLine = self.outputComponentTopLine+self.yResolution * BaseWiringDiagram.COMPONENT_ROW_HEIGHT
         self.drawHorizontalLine(self.outputComponentBottomLine)
 
 
-        self.inputComponentTopLine = self.outputComponentBottomLine+self.yResolution * 0.32
+        self.inputComponentTopLine = self.outputComponentBottomLine+self.yResolution * BaseWiringDiagram.DISTANCE_BETWEEN_COMPONENT_ROWS
         self.drawHorizontalLine(self.inputComponentTopLine)
 
-        self.inputCompounentBottomLine = self.inputComponentTopLine+self.yResolution * 0.12
+        self.inputCompounentBottomLine = self.inputComponentTopLine+self.yResolution * BaseWiringDiagram.COMPONENT_ROW_HEIGHT
         self.drawHorizontalLine(self.inputCompounentBottomLine)
 
+        # the lines above are those of the first row of controller regions; the other rows get their own
+        for regionRow in range(1, self.controllerRows):
+            for line in self.getRegionLines(regionRow * self.controllerColumns):
+                self.drawHorizontalLine(line)
+        for column in range(1, self.controllerColumns):
+            separatorX = self.xResolution * column / self.controllerColumns
+            self.drawLine(Coordinates("Region Separator Top", separatorX, self.outputComponentTopLine), Coordinates("Region Separator Bottom", separatorX, self.inputCompounentBottomLine), width=1)
+
     
     def addInfoRectangle(self, lmInfoRectangle,title,author):
         dateTimeAndnanoSeconds = datetime.now()
         dateTime = dateTimeAndnanoSeconds.strftime("%d/%m/%Y %H:%M:%S")
 
-        text = f"Title: {title}\nAuthor: {author}\nDate: {dateTime}\nNot Drawn to Scale" 
+        text = BaseWiringDiagram._infoText(title, author, dateTime)
 
-        wiringDiagram.createFramedText(text, 30, (0,lmInfoRectangle),10)
+        self.createFramedText(text, 30, (0,lmInfoRectangle),BaseWiringDiagram.FRAME_PADDING)
  
     
     def addLegend(self, lmInfoRectangle):
-        wiringDiagram.createFramedText("Legend", 30, (wiringDiagram.xResolution*0.40,lmInfoRectangle),10)
+        self.createFramedText("Legend", 30, (self.xResolution*BaseWiringDiagram.LEGEND_LEFT,lmInfoRectangle),BaseWiringDiagram.FRAME_PADDING)
 
     def addOtherRequirements(self, lmInfoRectangle):
-        wiringDiagram.createFramedText("Other Requirements", 30, (wiringDiagram.xResolution*0.77,lmInfoRectangle),10)
+        self.createFramedText("Other Requirements", 30, (self.xResolution*BaseWiringDiagram.OTHER_REQUIREMENTS_LEFT,lmInfoRectangle),BaseWiringDiagram.FRAME_PADDING)
 
 
 
@@ -314,26 +617,46 @@ class BaseWiringDiagram:
         """
         self.addResizedImage(component, self.findCenter(*compDict[slotKey]), self.findRectangularDimensions(*compDict[slotKey]), rotationAngle=rotationAngle)
         objectDict[slotKey] = component
+        self._setRowComponent(component, slotKey, compDict)
+
+    def _setRowComponent(self, component:Component, slotKey, compDict):
+        """
+        Records a component in the ComponentRow that holds its slot, if the slot belongs to one.
+        """
+        group = self._getGroupName(compDict)
+        for (rowGroup, controllerKey), componentRow in self.componentRows.items():
+            firstSlot = self.componentRowFirstSlots[(rowGroup, controllerKey)]
+            if rowGroup == group and firstSlot <= slotKey < firstSlot + componentRow.maxNumberOfComps:
+                componentRow[slotKey - firstSlot] = component
+                break
 
 
-    def addControllerComponent(self,component:Component):
-        middleOfSecondandThirdLine = int((self.inputComponentTopLine+self.outputComponentBottomLine)//2)
+    def addControllerComponent(self,component:Component, controllerKey=0):
+        """
+        Places a controller in the middle of the band between the rows of its region.
+
+        :param component: The controller.
+        :param controllerKey: The key the diagram's components refer to the controller by.
+        """
+        left, _, right, _ = self.getControllerRegion(controllerKey)
+        _, outputBottomLine, inputTopLine, _ = self.getRegionLines(controllerKey)
+        middleOfSecondandThirdLine = int((inputTopLine+outputBottomLine)//2)
 
-        centerOfMiddleArea = (self.xResolution//2,middleOfSecondandThirdLine)
+        centerOfMiddleArea = (int((left+right)//2),middleOfSecondandThirdLine)
         imageDimensions = component.getImageDimensions()
-        imageDimensions = (imageDimensions[1], imageDimensions[0])
+        imageDimensions = (int(imageDimensions[1]*self.spriteScale), int(imageDimensions[0]*self.spriteScale))
        
         topLeftPixel = (centerOfMiddleArea[0]-imageDimensions[0]//2, centerOfMiddleArea[1]-imageDimensions[1]//2)
 
         bottomRightPixel = (centerOfMiddleArea[0]+imageDimensions[0]//2, centerOfMiddleArea[1]+imageDimensions[1]//2)
         
-        self.controllerComponentLocation[0] = (topLeftPixel, bottomRightPixel)
+        self.controllerComponentLocation[controllerKey] = (topLeftPixel, bottomRightPixel)
         
         rectDimensions = self.findRectangularDimensions(topLeftPixel,bottomRightPixel)
 
         
-        self.addResizedImage(component, centerOfMiddleArea, rectDimensions,  rotationAngle=90, isController=True)
-        self.controllerComponentObjects[0] = component
+        self.addResizedImage(component, centerOfMiddleArea, rectDimensions,  rotationAngle=90)
+        self.controllerComponentObjects[controllerKey] = component
         
 
 
@@ -345,6 +668,7 @@ class BaseWiringDiagram:
         """
         print(f"lm {lm.returnCoordinatesTuple()} rm {rm.returnCoordinatesTuple()}")
         self.canvas.rectangle((lm.returnCoordinatesTuple(), rm.returnCoordinatesTuple()), outline=color, width=width)
+        self.displayList.addRectangle((lm.returnCoordinatesTuple(), rm.returnCoordinatesTuple()), color, width, owner=self.currentOwner)
     def printAllComponents(self):
 
         print("Input Components:")
@@ -387,53 +711,406 @@ class BaseWiringDiagram:
                         print(f"{self.outputComponentObjects[key]}'s pin location is {value}\n")
     def drawWires(self):
         """
-        Draws the wires for the wiring diagram.
+        Draws the wires for the wiring diagram. Nets whose wires cross or run in neighbouring lanes get different colours, see WireColorAllocator; ground wires are always black.
         """
+        self.wireColorAllocator = WireColorAllocator(BaseWiringDiagram.WIRE_LANE_SPACING)
+        for componentDict in (self.inputComponentObjects, self.outputComponentObjects):
+            for component in componentDict.values():
+                if component is None:
+                    continue
+                for endpointPin, wire in component.wires.items():
+                    if endpointPin != PinEnum.GROUND:
+                        self.wireColorAllocator.addWire(self._getNet(component, endpointPin), BaseWiringDiagram._getWireSegments(wire))
+        self.wireColorAllocator.assignColors()
+
         self._drawComponentWires(self.inputComponentObjects)
         self._drawComponentWires(self.outputComponentObjects)
-    
-    HTMLStandardColorStrings = ["red", "blue", "green", "yellow", "purple", "orange", "pink", "brown", "black", "white", "gray", "cyan", "magenta", "lime", "teal", "indigo", "maroon", "olive", "navy", "aquamarine", "turquoise", "silver", "lime", "fuchsia", "aqua", "purple", "yellow", "orange"] 
+
     def _drawComponentWires(self, componentDict):
         """
-        Draws the wires for the components in the wiring diagram.
+        Draws the wires for the components in the wiring diagram, in the colours assigned by drawWires().
 
         :param componentDict: The dictionary of components to draw wires for.
         """
         for component in componentDict.values():
-            print(len(component.wires))
+            if component is None:
+                continue
             for endpointPin, wire in component.wires.items():
-                
-                self._drawWire(wire, color = BaseWiringDiagram.HTMLStandardColorStrings.pop(), pinDestinationPin = endpointPin ,controllerKey=component.controllerKey)
+                color = self.wireColorAllocator.colors.get(self._getNet(component, endpointPin), "black")
+                self.drawComponentWire(component, endpointPin, wire, color)
 
-    def _drawWire(self, wire, color ="black", width=3, pinDestinationPin = None, controllerKey = 0):
+    def _getNet(self, component:Component, endpointPin):
         """
-        Draws a wire on the wiring diagram.
+        Returns the (controller key, controller pin) net a component's wire belongs to.
+        """
+        return (component.controllerKey, self._resolveControllerPin(endpointPin, component, component.controllerKey))
 
-        :param wire: The wire to draw.
+    @staticmethod
+    def _getWireSegments(wire):
+        return [(segment.wireStartPoint.returnCoordinatesTuple(), segment.wireEndPoint.returnCoordinatesTuple()) for segment in wire.segments.values()]
+
+    def colorNewWire(self, component:Component, endpointPin, wire):
         """
+        Chooses the colour of a wire routed after drawWires(), avoiding the colours of the nets it crosses or runs next to without recolouring any wire already drawn.
 
-        if pinDestinationPin is not None:
-            if pinDestinationPin not in [PinEnum.INPUT, PinEnum.OUTPUT]:
+        :return: The colour to draw the wire in.
+        """
+        if endpointPin == PinEnum.GROUND:
+            return "black"
+        return self.wireColorAllocator.colorWire(self._getNet(component, endpointPin), BaseWiringDiagram._getWireSegments(wire))
 
-                if pinDestinationPin == PinEnum.GROUND:
-                    # TODO: add a common ground connection and allow for the use of multiple grounds
-                    pinDestinationPin = 6
-                    color="black"
+    def drawComponentWire(self, component:Component, endpointPin, wire, color):
+        """
+        Draws one of a component's wires, recording it under the owner ("wire", id(component), endpointPin) so it can be removed and repainted later.
 
-                if pinDestinationPin == PinEnum.V3_3:
-                    # TODO: add a common 3.3V connection and allow for the use of multiple 3.3V connections
-                    pinDestinationPin = 1
+        :param component: The component the wire belongs to.
+        :param endpointPin: The key of the wire in component.wires.
+        :param wire: The wire to draw.
+        :param color: The colour of the wire.
+        """
+        self.currentOwner = ("wire", id(component), endpointPin)
+        try:
+            self.drawnWireColors[self.currentOwner] = self._drawWire(wire, color = color, pinDestinationPin = endpointPin ,controllerKey=component.controllerKey, component=component)
+        finally:
+            self.currentOwner = None
 
-                if pinDestinationPin == PinEnum.V5:
-                    # TODO: add a common 5V connection and allow for the use of multiple 5V connections
-                    pinDestinationPin = 2
+    def _drawWire(self, wire, color ="black", width=3, pinDestinationPin = None, controllerKey = 0, component=None):
+        """
+        Draws a wire on the wiring diagram.
+
+        :param wire: The wire to draw.
+        :param component: The component the wire belongs to, used to look up the controller pin its power or ground pin was assigned.
+        :return: The colour the wire was drawn in; ground wires are always black.
+        """
+
+        if pinDestinationPin is not None:
+            if pinDestinationPin == PinEnum.GROUND:
+                color="black"
+            pinDestinationPin = self._resolveControllerPin(pinDestinationPin, component, controllerKey)
 
         for segment in wire.segments.values():
             self.drawLine(segment.wireStartPoint, segment.wireEndPoint, width = width, color =color)
 
         self._drawRectangle(self.controllerComponentObjects[controllerKey].pinLMRMCoordinates[pinDestinationPin]["LM"], self.controllerComponentObjects[controllerKey].pinLMRMCoordinates[pinDestinationPin]["RM"], color=color, width=width)
+        return color
         
 
+    def _getGroupName(self, componentDict):
+        """
+        Returns "input", "output" or "controller" for one of the diagram's location or object dicts.
+        """
+        if componentDict is self.inputComponentLocations or componentDict is self.inputComponentObjects:
+            return "input"
+        if componentDict is self.outputComponentLocations or componentDict is self.outputComponentObjects:
+            return "output"
+        return "controller"
+
+    def repaintRegion(self, box):
+        """
+        Clears a (left, top, right, bottom) region of the canvas and draws everything in the display list that touches it again.
+        """
+        self.displayList.repaintRegion(self.wiringDiagram, box, scale=self.supersampling)
+
+    def setSupersampling(self, scale, tileSize=512):
+        """
+        Draws the whole canvas again anti-aliased, from the display list, at a supersampling factor, and keeps repainting regions at that factor.
+
+        Every tile of the canvas is drawn at scale times its size and shrunk back, so only one enlarged tile is held at a time. Sprites come out unchanged; the edges of wires, frames and text are smoothed.
+
+        :param scale: One of SUPERSAMPLING_SCALES. 1 draws the canvas again without anti-aliasing.
+        :param tileSize: The width and height, in canvas pixels, of the tiles the canvas is drawn in.
+        :return: The number of tiles drawn. Tiles with nothing in them are not drawn.
+        """
+        if scale not in BaseWiringDiagram.SUPERSAMPLING_SCALES:
+            raise ValueError(f"Unknown supersampling factor {scale}. Known factors are {BaseWiringDiagram.SUPERSAMPLING_SCALES}")
+        self.supersampling = scale
+        return self.displayList.repaintTiles(self.wiringDiagram, tileSize, scale)
+
+    def _resolveControllerPin(self, pinDestinationPin, component=None, controllerKey=0):
+        """
+        Returns the physical controller pin a component pin is wired to.
+
+        :param pinDestinationPin: The "PinDestination" of a component pin, either a physical pin number or a power/ground PinEnum.
+        :param component: The component the pin belongs to. Its power and ground pins resolve to the controller pins allocateControllerPins() assigned them.
+        :param controllerKey: The controller the component is wired to.
+        """
+        allocator = self.controllerPinAllocators.get(controllerKey)
+        if component is not None and allocator is not None:
+            controllerPin = allocator.getControllerPin(component, pinDestinationPin)
+            if controllerPin is not None:
+                return controllerPin
+
+        # pins that were never allocated fall back to the first pin of each usage
+        if pinDestinationPin not in [PinEnum.INPUT, PinEnum.OUTPUT]:
+
+            if pinDestinationPin == PinEnum.GROUND:
+                return 6
+
+            if pinDestinationPin == PinEnum.V3_3:
+                return 1
+
+            if pinDestinationPin == PinEnum.V5:
+                return 2
+        return pinDestinationPin
+
+    def getControllerPinName(self, controllerKey, controllerPin):
+        """
+        Returns the printed name of a controller pin, like "GPIO17", or "Pin n" for controllers that do not name their pins.
+        """
+        controller = self.controllerComponentObjects.get(controllerKey)
+        if controller is not None and hasattr(controller, "getPinName"):
+            return controller.getPinName(controllerPin)
+        return f"Pin {controllerPin}"
+
+    def addNetLabels(self, fontSize=14, cellSize=64, pinLabels=True):
+        """
+        Labels every routed wire with the controller pin and the component it connects, like "GPIO17 -> 0 Button Basic Button", and every wired controller pin with its name, like "GPIO17".
+
+        Pin labels are placed first, beside the wires where they leave the controller, so they stay close to their pins. Each net label is then placed next to its wire, beside the segment nearest the component that it fits without covering anything already drawn or another label, turned to run along the wire where only that fits, or away from the wire with a leader line back to it; see LabelPlacer. Call after drawWires().
+
+        :param fontSize: The font size of the labels.
+        :param cellSize: The grid cell size of the spatial index the labels are placed with.
+        :param pinLabels: Whether to label the controller pins as well.
+        :return: The LabelPlacer holding every placed label.
+        """
+        self.netLabelFontSize = fontSize
+        labelPlacer = LabelPlacer.fromDisplayList(self.displayList, (self.xResolution, self.yResolution), fontSize, cellSize=cellSize)
+        # (component, endpoint pin, controller pin name, segments) of every routed wire, and the ones ending on each (controller key, controller pin)
+        routedWires = []
+        pinWires = {}
+        for componentDict in (self.inputComponentObjects, self.outputComponentObjects):
+            for component in componentDict.values():
+                if component is None:
+                    continue
+                for endpointPin, wire in component.wires.items():
+                    if wire.segments:
+                        controllerPin = self._resolveControllerPin(endpointPin, component, component.controllerKey)
+                        routedWire = (component, endpointPin, self.getControllerPinName(component.controllerKey, controllerPin), BaseWiringDiagram._getWireSegments(wire))
+                        routedWires.append(routedWire)
+                        pinWires.setdefault((component.controllerKey, controllerPin), []).append(routedWire)
+
+        if pinLabels:
+            for (controllerKey, controllerPin), wires in pinWires.items():
+                # the segments run from the component to the controller, so the last two are where the first wire leaves the pin
+                lastSegments = [(end, start) for start, end in reversed(wires[0][3][-2:])]
+                anchorOwners = tuple(("wire", id(component), endpointPin) for component, endpointPin, _, _ in wires)
+                self._drawPlacedLabel(labelPlacer, wires[0][2], LabelPlacer.getSegmentAnchors(lastSegments), ("pinLabel", controllerKey, controllerPin), anchorOwners, fontSize)
+
+        for component, endpointPin, pinName, segments in routedWires:
+            # along every segment, from the component to the controller; the component pin itself sits inside the component's image
+            self._drawPlacedLabel(labelPlacer, f"{pinName} -> {component.Label}", LabelPlacer.getSegmentAnchors(segments), ("label", id(component), endpointPin), (("wire", id(component), endpointPin),), fontSize)
+        return labelPlacer
+
+    def _drawPlacedLabel(self, labelPlacer, text, anchors, owner, anchorOwners, fontSize):
+        """
+        Places a label with a LabelPlacer and draws it, with its leader line if it has one, under owner.
+        """
+        placedLabel = labelPlacer.place(text, anchors, owner=owner, anchorOwners=anchorOwners)
+        self.currentOwner = owner
+        try:
+            if placedLabel.leaderLine is not None:
+                # whole pixels, so a slanted leader is drawn the same in every tile it is repainted in
+                start, end = [(round(x), round(y)) for x, y in placedLabel.leaderLine]
+                self.drawLine(Coordinates("Leader Start", *start), Coordinates("Leader End", *end), color=BaseWiringDiagram.LEADER_LINE_COLOR, width=1)
+            self.drawText(placedLabel.box[:2], text, fontSize, angle=placedLabel.angle)
+        finally:
+            self.currentOwner = None
+        return placedLabel
+
+    def getWiringTable(self):
+        """
+        Lists every routed wire as a row of the wiring table: its controller, net, colour, component and component pins, and the header pin it ends on in physical and BCM numbering. Power and ground nets name the header pin they were allocated. Call after drawWires(), so the colours are known.
+
+        :return: A list of dicts keyed by WIRING_TABLE_COLUMNS, one per wire, in the order the wires were drawn.
+        """
+        wiringTable = []
+        for componentDict in (self.inputComponentObjects, self.outputComponentObjects):
+            for component in componentDict.values():
+                if component is None:
+                    continue
+                controllerKey = component.controllerKey
+                bcmOfPin = getattr(self.controllerComponentObjects.get(controllerKey), "physicalToBCMDict", {})
+                for endpointPin in component.wires:
+                    headerPin = self._resolveControllerPin(endpointPin, component, controllerKey)
+                    componentPins = [f"{pinNumber} ({pinDict['Usage']})" for pinNumber, pinDict in component.pinLMRMCoordinates.items() if pinDict["PinDestination"] == endpointPin]
+                    bcmName = bcmOfPin.get(headerPin)
+                    wiringTable.append({
+                        "controller": controllerKey,
+                        "net": self.getControllerPinName(controllerKey, headerPin),
+                        "color": self.drawnWireColors.get(("wire", id(component), endpointPin)),
+                        "component": component.Label,
+                        "componentPin": ", ".join(componentPins),
+                        "headerPin": headerPin,
+                        "bcm": int(bcmName) if bcmName is not None and bcmName.isdigit() else None,
+                    })
+        return wiringTable
+
+    def fillLegend(self, wiringTable=None, fontSize=14):
+        """
+        Fills the legend with a table of the routed nets: a swatch of each wire's colour, the net, the component and pin it connects, and the header pin in physical and BCM numbering. Rows that do not fit below the legend heading continue in another table to the right; rows that fit nowhere are counted on the last line, which points to the wiring table file.
+
+        Every text is measured once, before anything is drawn, and texts repeated across rows are measured only the first time, so the cost grows linearly with the number of nets. The drawing is recorded under the owner ("legend",), so it can be removed and drawn again.
+
+        :param wiringTable: The rows to show, see getWiringTable. Defaults to the diagram's wiring table.
+        :param fontSize: The font size of the table.
+        :return: The bounds of everything drawn.
+        """
+        legend = next((framedText for framedText in self.framedTexts if framedText[0] == "Legend"), None)
+        if self.isDraft or legend is None:
+            return []
+        if wiringTable is None:
+            wiringTable = self.getWiringTable()
+        self.legendFontSize = fontSize
+        _, headingFontSize, (left, headingTop), padding = legend
+        top = headingTop + BaseWiringDiagram._measureText("Legend", headingFontSize)[1] + 2 * padding
+        right = self.xResolution * BaseWiringDiagram.OTHER_REQUIREMENTS_LEFT - padding
+        bottom = self.yResolution - padding
+
+        # the whole table is measured in one pass, before its layout is known
+        font = self.displayList.getFont(fontSize)
+        ascent, descent = font.getmetrics()
+        rowHeight = ascent + descent + 2
+        headings = ("Net", "Component", "Pin", "Header", "BCM")
+        cellRows = [tuple(str(value) if value is not None else "" for value in (row["net"], row["component"], row["componentPin"], row["headerPin"], row["bcm"])) for row in wiringTable]
+        textWidths = {}
+        columnWidths = [0] * len(headings)
+        for cells in [headings] + cellRows:
+            for column, text in enumerate(cells):
+                if text not in textWidths:
+                    textWidths[text] = font.getlength(text)
+                columnWidths[column] = max(columnWidths[column], textWidths[text])
+
+        columnGap = fontSize
+        swatchWidth = 2 * rowHeight
+        tableWidth = swatchWidth + sum(columnWidths) + len(headings) * columnGap
+        rowsPerTable = int((bottom - top) // rowHeight) - 1
+        if rowsPerTable <= 0:
+            return []
+        numberOfTables = max(1, int((right - left + columnGap) // (tableWidth + columnGap)))
+        numberOfShownRows = len(cellRows)
+        if numberOfShownRows > rowsPerTable * numberOfTables:
+            # the last line of the last table says how many rows were left out
+            numberOfShownRows = rowsPerTable * numberOfTables - 1
+            overflowText = f"+ {len(cellRows) - numberOfShownRows} more nets, see the wiring table"
+            textWidths[overflowText] = font.getlength(overflowText)
+
+        drawnBounds = []
+        def drawCell(position, text):
+            self.canvas.text(position, text, fill="black", font=font)
+            textBounds = (position[0], position[1], position[0] + textWidths[text], position[1] + ascent + descent)
+            drawnBounds.append(self.displayList.addText(position, text, "black", "left", fontSize, textBounds, owner=self.currentOwner).bounds)
+
+        self.currentOwner = ("legend",)
+        try:
+            for table in range(numberOfTables):
+                tableRows = range(table * rowsPerTable, min(numberOfShownRows, (table + 1) * rowsPerTable))
+                tableLeft = left + table * (tableWidth + columnGap)
+                columnLefts = [tableLeft + swatchWidth + columnGap + sum(columnWidths[:column]) + column * columnGap for column in range(len(headings))]
+                if tableRows:
+                    for column, heading in enumerate(headings):
+                        drawCell((columnLefts[column], top), heading)
+                for line, rowIndex in enumerate(tableRows, start=1):
+                    rowTop = top + line * rowHeight
+                    color = wiringTable[rowIndex]["color"]
+                    if color is not None:
+                        # on whole pixels, which PIL draws the same whatever tile they are repainted in
+                        swatchMiddle = int(rowTop + rowHeight / 2)
+                        swatch = [(int(tableLeft), swatchMiddle), (int(tableLeft + swatchWidth), swatchMiddle)]
+                        self.canvas.line(swatch, fill=color, width=rowHeight // 2)
+                        drawnBounds.append(self.displayList.addLine(swatch, color, rowHeight // 2, owner=self.currentOwner).bounds)
+                    for column, text in enumerate(cellRows[rowIndex]):
+                        drawCell((columnLefts[column], rowTop), text)
+            if numberOfShownRows < len(cellRows):
+                drawCell((left + (numberOfTables - 1) * (tableWidth + columnGap), top + rowsPerTable * rowHeight), overflowText)
+        finally:
+            self.currentOwner = None
+        return drawnBounds
+
+    def drawText(self, topLeft, text, fontSize, color="black", angle=0):
+        """
+        Draws unframed text on the wiring diagram.
+
+        :param topLeft: The position of the text.
+        :param text: The text to draw.
+        :param fontSize: The font size of the text.
+        :param angle: 0 for level text, or 90 for text turned to read from bottom to top, with topLeft the top left of the turned text.
+        """
+        if self.isDraft:
+            return
+        if angle == 90:
+            mask = self.displayList.getVerticalTextMask(text, fontSize)
+            left, top = int(topLeft[0]), int(topLeft[1])
+            self.wiringDiagram.paste(color, (left, top), mask)
+            self.displayList.addText(topLeft, text, color, "left", fontSize, (left, top, left + mask.width, top + mask.height), owner=self.currentOwner, angle=90)
+            return
+        if angle != 0:
+            raise ValueError(f"Text can only be drawn level or turned 90 degrees, not {angle} degrees")
+        font = self.displayList.getFont(fontSize)
+        textBounds = self.canvas.textbbox(topLeft, text, font_size=fontSize, font=font)
+        self.canvas.text(topLeft, text, fill=color, font_size=fontSize, font=font)
+        self.displayList.addText(topLeft, text, color, "left", fontSize, textBounds, owner=self.currentOwner)
+
+    def addSheetConnectors(self, sheetConnectors, fontSize=20):
+        """
+        Labels the nets of this sheet that continue on other sheets of the same circuit. Every controller gets one framed list beside it, naming the controller pins of each shared net on this sheet and the sheets the net continues on. Call after the pins have been allocated, so power and ground nets name the pins they were given.
+
+        :param sheetConnectors: (controller key, destination) -> the numbers of the other sheets the net is on. A destination is a physical controller pin or a power/ground PinEnum.
+        :param fontSize: The font size of the labels.
+        """
+        padding = BaseWiringDiagram.FRAME_PADDING
+        labelsOfController = {}
+        # signal nets first, in pin order, then power and ground
+        for (controllerKey, destination), sheetNumbers in sorted(sheetConnectors.items(), key=lambda item: (item[0][0], isinstance(item[0][1], PinEnum), int(item[0][1].value if isinstance(item[0][1], PinEnum) else item[0][1]))):
+            if controllerKey not in self.controllerComponentObjects or not sheetNumbers:
+                continue
+            controllerPins = set()
+            for componentDict in (self.inputComponentObjects, self.outputComponentObjects):
+                for component in componentDict.values():
+                    if component is None or component.controllerKey != controllerKey:
+                        continue
+                    for pinDict in component.pinLMRMCoordinates.values():
+                        if pinDict["PinDestination"] == destination:
+                            controllerPins.add(self._resolveControllerPin(destination, component, controllerKey))
+            if not controllerPins:
+                continue
+            pinText = ", ".join(str(pin) for pin in sorted(controllerPins))
+            netName = f" ({destination.name})" if isinstance(destination, PinEnum) else ""
+            sheetText = ", ".join(str(sheetNumber) for sheetNumber in sheetNumbers)
+            labelsOfController.setdefault(controllerKey, []).append(f"Pin{'s' if len(controllerPins) > 1 else ''} {pinText}{netName} -> sheet{'s' if len(sheetNumbers) > 1 else ''} {sheetText}")
+
+        for controllerKey, labels in labelsOfController.items():
+            text = "Continues on\n" + "\n".join(labels)
+            (controllerLeft, controllerTop), (controllerRight, _) = self.controllerComponentLocation[controllerKey]
+            regionLeft, _, regionRight, _ = self.getControllerRegion(controllerKey)
+            textWidth, textHeight = BaseWiringDiagram._measureText(text, fontSize)
+            # to the right of the controller, else to its left, else above it where the list is only crossed by wires
+            if controllerRight + 3 * padding + textWidth + padding <= regionRight:
+                topLeft = (controllerRight + 3 * padding, controllerTop)
+            elif controllerLeft - 3 * padding - textWidth - padding >= regionLeft:
+                topLeft = (controllerLeft - 3 * padding - textWidth, controllerTop)
+            else:
+                topLeft = (max(regionLeft + padding, regionRight - textWidth - 2 * padding), controllerTop - textHeight - 3 * padding)
+            self.createFramedText(text, fontSize, topLeft, padding)
+
+    def drawDraftWires(self, width=1):
+        """
+        Draws a straight placeholder line from every component pin to the controller pin it is wired to. Used by draft renders instead of routing.
+
+        :param width: The width of the placeholder lines.
+        """
+        self.allocateControllerPins()
+        for componentDict in (self.inputComponentObjects, self.outputComponentObjects):
+            for component in componentDict.values():
+                if component is None:
+                    continue
+                controllerPins = self.controllerComponentObjects[component.controllerKey].pinLMRMCoordinates
+                for pinDict in component.pinLMRMCoordinates.values():
+                    controllerPin = controllerPins[self._resolveControllerPin(pinDict["PinDestination"], component, component.controllerKey)]
+                    start = Component._determinePinCenter(pinDict["LM"], pinDict["RM"])
+                    end = Component._determinePinCenter(controllerPin["LM"], controllerPin["RM"])
+                    color = "black" if pinDict["PinDestination"] == PinEnum.GROUND else "gray"
+                    self.drawLine(start, end, color=color, width=width)
+
 if __name__ == "__main__":
     wiringDiagram = BaseWiringDiagram(1920, 1080)
     wiringDiagram.addTitle("Edgar's Bird Exhibit Diagram",70)
@@ -0,0 +1,570 @@
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from PIL import Image
+
+from AffineTransform import AffineTransform
+from AssetCache import AssetCache
+from ButtonComponent import ButtonComponent
+from ComponentLibrary import ComponentLibrary
+from Coordinates import Coordinates
+from LEDComponent import LEDComponent
+from PiGPIOPinHeader import PiGPIOPinHeader
+from RenderWorkerPool import RenderWorkerPool
+
+
+def _summarizeWorkers(workerReports):
+    startupTimes = [report["startupSeconds"] for report in workerReports]
+    residentSizes = [report["residentKB"] for report in workerReports if report["residentKB"] is not None]
+    sharedSizes = [report["sharedKB"] for report in workerReports if report["sharedKB"] is not None]
+    return {
+        "workers": len(workerReports),
+        "meanStartupSeconds": sum(startupTimes) / len(startupTimes),
+        "maxStartupSeconds": max(startupTimes),
+        "meanResidentKB": sum(residentSizes) / len(residentSizes) if residentSizes else None,
+        "meanSharedKB": sum(sharedSizes) / len(sharedSizes) if sharedSizes else None,
+    }
+
+
+def benchmarkWorkerStartup(numberOfWorkers: int = 4):
+    """
+    Compares the startup latency and memory of preloaded, forked workers against workers that load their own assets.
+    Returns:
+        dict: A summary per mode ("preforked" and, where fork is available, "cold").
+    """
+    results = {}
+
+    startTime = time.perf_counter()
+    with RenderWorkerPool(numberOfWorkers) as pool:
+        results["preforked"] = _summarizeWorkers(pool.measureWorkers())
+        results["preforked"]["parentPreloadSeconds"] = pool.preloadSeconds
+    results["preforked"]["poolLifetimeSeconds"] = time.perf_counter() - startTime
+
+    if pool.isForking:
+        coldPool = RenderWorkerPool(numberOfWorkers)
+        coldPool.isForking = False
+        startTime = time.perf_counter()
+        with coldPool:
+            results["cold"] = _summarizeWorkers(coldPool.measureWorkers())
+        results["cold"]["poolLifetimeSeconds"] = time.perf_counter() - startTime
+
+    return results
+
+
+def _copyPinDicts(component):
+    # plain pin dicts with their own Coordinates, the way components kept their pins before the PinTable; the canvas view of a component cannot be moved in place
+    return {pinNumber: {key: Coordinates(value.label, value.x, value.y) if isinstance(value, Coordinates) else value for key, value in pinDict.items()} for pinNumber, pinDict in component.pinLMRMCoordinates.items()}
+
+
+def _adjustCoordinatesPerPin(pinLMRMCoordinates, scale, position):
+    # the rotation-free part of the old adjustCoordinates: one walk over every pin dict per step
+    for values in pinLMRMCoordinates.values():
+        for value in values.values():
+            if isinstance(value, Coordinates):
+                value.x, value.y = value.y, value.x
+    for values in pinLMRMCoordinates.values():
+        for value in values.values():
+            if isinstance(value, Coordinates):
+                value.x *= scale[0]
+                value.y *= scale[1]
+    for values in pinLMRMCoordinates.values():
+        for value in values.values():
+            if isinstance(value, Coordinates):
+                value.x += position[0]
+                value.y += position[1]
+
+
+def benchmarkPinTransform(iterations: int = 2000):
+    """
+    Times placing the pins of every component type with the single affine transform of Component.adjustCoordinates, against walking the pin dicts once per step.
+    Returns:
+        dict: Microseconds per placement for every component type.
+    """
+    components = {
+        "Button": ButtonComponent("Button", 17),
+        "LED": LEDComponent("LED", 27),
+        "PiGPIOPinHeader": PiGPIOPinHeader("Pi GPIO Pin Header"),
+    }
+    results = {}
+    for componentType, component in components.items():
+        width, height = component.getImageDimensions()
+        newSize = (height // 2, width // 2)
+
+        pinDicts = {}
+
+        def restorePins():
+            component.setTransform(AffineTransform(), 0)
+            component.pinTable
+            pinDicts["pins"] = _copyPinDicts(component)
+
+        timings = {}
+        for mode, place in (
+            ("affine", lambda: component.adjustCoordinates((width, height), newSize, 90, (100, 200)) or component.pinTable),
+            ("affineAnyAngle", lambda: component.adjustCoordinates((width, height), newSize, 37.5, (100, 200)) or component.pinTable),
+            # moving a placed component only replaces its transform until the pins are read
+            ("relayoutOnly", lambda: component.adjustCoordinates((width, height), newSize, 90, (100, 200))),
+            ("perPinLoops", lambda: _adjustCoordinatesPerPin(pinDicts["pins"], (0.5, 0.5), (100, 200))),
+        ):
+            totalSeconds = 0.0
+            for _ in range(iterations):
+                restorePins()
+                startTime = time.perf_counter()
+                place()
+                totalSeconds += time.perf_counter() - startTime
+            timings[f"{mode}Microseconds"] = totalSeconds / iterations * 1e6
+        restorePins()
+        timings["pins"] = len(component.pinTable)
+        results[componentType] = timings
+    return results
+
+
+def benchmarkComponentConstruction(iterations: int = 2000):
+    """
+    Times creating components of every type once their shared ComponentType has been built.
+    Returns:
+        dict: Microseconds per component for every component type, and the time the first one took.
+    """
+    constructors = {
+        "Button": lambda: ButtonComponent("Button", 17),
+        "LED": lambda: LEDComponent("LED", 27),
+        "PiGPIOPinHeader": lambda: PiGPIOPinHeader("Pi GPIO Pin Header"),
+    }
+    results = {}
+    for componentType, construct in constructors.items():
+        startTime = time.perf_counter()
+        component = construct()
+        firstSeconds = time.perf_counter() - startTime
+
+        startTime = time.perf_counter()
+        for _ in range(iterations):
+            construct()
+        results[componentType] = {
+            "pins": len(component.localPinTable),
+            "firstMicroseconds": firstSeconds * 1e6,
+            "sharedTypeMicroseconds": (time.perf_counter() - startTime) / iterations * 1e6,
+        }
+    return results
+
+
+def benchmarkComponentLibraryLoad(typeCount: int = 500):
+    """
+    Times loading a library of component type definitions without the compiled cache, when the cache is written for the first time, from the cache, and after one definition file changed.
+
+    The library is made of copies of the header definition (40 pins each) under different type names.
+    Returns:
+        dict: Milliseconds per load for every mode.
+    """
+    definitionPath = os.path.join(ComponentLibrary.DEFAULT_DEFINITION_DIRECTORY, "PiGPIOPinHeader.json")
+    with open(definitionPath, "r", encoding="utf-8") as definitionFile:
+        definition = json.load(definitionFile)
+    definition["imagePath"] = os.path.join(ComponentLibrary.DEFAULT_DEFINITION_DIRECTORY, definition["imagePath"])
+
+    results = {}
+    with tempfile.TemporaryDirectory() as libraryDirectory:
+        for index in range(typeCount):
+            definition["typeName"] = f"Header {index}"
+            with open(os.path.join(libraryDirectory, f"Header{index}.json"), "w", encoding="utf-8") as definitionFile:
+                json.dump(definition, definitionFile)
+
+        def timeLoad(useCache=True):
+            # forget the in-process copy, so every load starts like a new run
+            ComponentLibrary.clear()
+            startTime = time.perf_counter()
+            componentTypes = ComponentLibrary.loadDirectory(libraryDirectory, useCache=useCache)
+            seconds = time.perf_counter() - startTime
+            assert len(componentTypes) == typeCount
+            return seconds * 1e3
+
+        results["jsonOnly"] = {"milliseconds": timeLoad(useCache=False)}
+        results["coldStart"] = {"milliseconds": timeLoad()}
+        results["warmStart"] = {"milliseconds": min(timeLoad() for _ in range(5))}
+
+        changedPath = os.path.join(libraryDirectory, "Header0.json")
+        changedStat = os.stat(changedPath)
+        os.utime(changedPath, ns=(changedStat.st_atime_ns, changedStat.st_mtime_ns + 1_000_000_000))
+        results["oneFileChanged"] = {"milliseconds": timeLoad()}
+        results["warmStart"]["cacheKB"] = os.path.getsize(os.path.join(libraryDirectory, "__pycache__", "componentLibrary.cache")) / 1024
+    ComponentLibrary.clear()
+    for summary in results.values():
+        summary["types"] = typeCount
+    return results
+
+
+def benchmarkComponentPaste(iterations: int = 200):
+    """
+    Times pasting every component image onto a canvas in three ways: rotating, resizing and pasting the whole image each time; pasting the cached, rotated and resized image untrimmed; and pasting the cached sprite trimmed to its non-transparent pixels. Both cached modes paste through the same mask, so the two of them differ only by the trim.
+
+    The bundled images gain nothing from the trim: the button and LED are opaque to their edges and the header's alpha reaches every edge, so their trimmed sprite is the whole image. "PaddedLED", the LED image centred on a transparent canvas twice its size, shows what the trim saves on an image with a transparent border.
+    Returns:
+        dict: Microseconds per paste in every mode and the share of the image's pixels the trimmed sprite keeps, for every component image.
+    """
+    components = {
+        "Button": ButtonComponent("Button", 17),
+        "LED": LEDComponent("LED", 27),
+        "PiGPIOPinHeader": PiGPIOPinHeader("Pi GPIO Pin Header"),
+    }
+    imagePaths = {componentType: component.imagePath for componentType, component in components.items()}
+    canvas = Image.new("RGB", (1920, 1080), "white")
+    results = {}
+    with tempfile.TemporaryDirectory() as imageDirectory:
+        ledImage = AssetCache.getImage(imagePaths["LED"]).convert("RGBA")
+        paddedImage = Image.new("RGBA", (ledImage.width * 2, ledImage.height * 2), (0, 0, 0, 0))
+        paddedImage.paste(ledImage, (ledImage.width // 2, ledImage.height // 2))
+        imagePaths["PaddedLED"] = os.path.join(imageDirectory, "PaddedLED.png")
+        paddedImage.save(imagePaths["PaddedLED"])
+
+        for componentType, imagePath in imagePaths.items():
+            width, height = AssetCache.getImageSize(imagePath)
+            size = (height // 2, width // 2)
+            trimmedImage, mask, offset = AssetCache.getPasteSprite(imagePath, 90, size)
+            untrimmedImage = AssetCache.getRotatedImage(imagePath, 90).resize(size)
+            untrimmedMask = None
+            if mask is not None:
+                # the same alpha the trimmed sprite is pasted through, before it was cropped
+                untrimmedMask = untrimmedImage.getchannel("A")
+
+            def pasteWholeImage():
+                image = AssetCache.getImage(imagePath).rotate(90, expand=True).resize(size)
+                canvas.paste(image, (100, 100), image.getchannel("A") if "A" in image.getbands() else None)
+
+            def pasteUntrimmedSprite():
+                canvas.paste(untrimmedImage, (100, 100), untrimmedMask)
+
+            def pasteTrimmedSprite():
+                canvas.paste(trimmedImage, (100 + offset[0], 100 + offset[1]), mask)
+
+            timings = {}
+            for mode, paste in (("wholeImage", pasteWholeImage), ("untrimmedSprite", pasteUntrimmedSprite), ("trimmedSprite", pasteTrimmedSprite)):
+                paste()
+                startTime = time.perf_counter()
+                for _ in range(iterations):
+                    paste()
+                timings[f"{mode}Microseconds"] = (time.perf_counter() - startTime) / iterations * 1e6
+            timings["pastedPixelShare"] = trimmedImage.width * trimmedImage.height / (size[0] * size[1])
+            timings["usesMask"] = mask is not None
+            results[componentType] = timings
+    return results
+
+
+def benchmarkPinExtraction(copies: int = 40):
+    """
+    Times writing draft definitions for a library of component images, in this process and spread over worker processes.
+
+    The library is made of copies of every bundled component image.
+    Returns:
+        dict: Seconds for the whole library and milliseconds per image, per mode.
+    """
+    # the pin extractor pulls in its image analysis code, so it is imported here rather than for every benchmark
+    from PinExtractor import PinExtractor
+
+    extractor = PinExtractor()
+    results = {}
+    with tempfile.TemporaryDirectory() as libraryDirectory:
+        imageDirectory = os.path.join(libraryDirectory, "Images")
+        os.makedirs(imageDirectory)
+        for fileName in os.listdir(AssetCache.DEFAULT_IMAGE_DIRECTORY):
+            if fileName.lower().endswith(".png"):
+                stem = os.path.splitext(fileName)[0].replace(" ", "")
+                for index in range(copies):
+                    shutil.copyfile(os.path.join(AssetCache.DEFAULT_IMAGE_DIRECTORY, fileName), os.path.join(imageDirectory, f"{stem}{index}.png"))
+        imageCount = len(os.listdir(imageDirectory))
+
+        for mode, numberOfWorkers in (("oneProcess", 1), ("workerPool", None)):
+            outputDirectory = os.path.join(libraryDirectory, mode)
+            startTime = time.perf_counter()
+            drafts = extractor.writeDrafts(imageDirectory, outputDirectory, numberOfWorkers)
+            seconds = time.perf_counter() - startTime
+            results[mode] = {
+                "images": imageCount,
+                "failedImages": sum(isinstance(result, str) for result in drafts.values()),
+                "seconds": seconds,
+                "millisecondsPerImage": seconds / imageCount * 1e3,
+            }
+    return results
+
+
+def _routedWireStatistics(diagram):
+    # total Manhattan length of every routed segment, and the number of horizontal and vertical segments of different wires that cross
+    horizontalSegments, verticalSegments = [], []
+    length = 0.0
+    for componentDict in (diagram.inputComponentObjects, diagram.outputComponentObjects):
+        for component in componentDict.values():
+            for wire in component.wires.values():
+                for segment in wire.segments.values():
+                    start, end = segment.wireStartPoint, segment.wireEndPoint
+                    length += abs(end.x - start.x) + abs(end.y - start.y)
+                    if start.y == end.y and start.x != end.x:
+                        horizontalSegments.append((id(wire), min(start.x, end.x), max(start.x, end.x), start.y))
+                    elif start.x == end.x and start.y != end.y:
+                        verticalSegments.append((id(wire), min(start.y, end.y), max(start.y, end.y), start.x))
+    crossings = sum(
+        1
+        for horizontalWire, left, right, y in horizontalSegments
+        for verticalWire, top, bottom, x in verticalSegments
+        if horizontalWire != verticalWire and left < x < right and top < y < bottom
+    )
+    return length, crossings
+
+
+def benchmarkPlacement(componentsPerRow: int = 10, repeats: int = 3, seed: int = 1):
+    """
+    Routes a circuit whose components are listed in a scrambled GPIO order, with the rows filled in that order and ordered by each placement method.
+    Returns:
+        dict: Per placement, the layout and routing seconds and the total length and crossings of the routed wires.
+    """
+    # imported here so the other benchmarks do not load the pipeline
+    import contextlib
+    import random
+    from DiagramPipeline import CircuitSpec, DiagramPipeline
+
+    gpioPins = [3, 5, 7, 8, 10, 11, 12, 13, 15, 16, 18, 19, 21, 22, 23, 24, 26, 29, 31, 32, 33, 35, 36, 37, 38, 40]
+    random.Random(seed).shuffle(gpioPins)
+    inputComponents = [("Button", gpioPins[index % len(gpioPins)]) for index in range(componentsPerRow)]
+    outputComponents = [("LED", gpioPins[(index + componentsPerRow) % len(gpioPins)]) for index in range(componentsPerRow)]
+
+    results = {}
+    for placement in (None, "barycenter", "median", "anneal"):
+        layoutTimes, routeTimes = [], []
+        for _ in range(repeats):
+            pipeline = DiagramPipeline(CircuitSpec("Placement", "Benchmarks", inputComponents, outputComponents, placement=placement))
+            # the router prints every step; the benchmark times the routing, not the terminal
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                startTime = time.perf_counter()
+                pipeline.layout()
+                layoutTimes.append(time.perf_counter() - startTime)
+                startTime = time.perf_counter()
+                pipeline.route()
+                routeTimes.append(time.perf_counter() - startTime)
+        length, crossings = _routedWireStatistics(pipeline.diagram)
+        results[placement or "listOrder"] = {
+            "layoutSeconds": min(layoutTimes),
+            "routeSeconds": min(routeTimes),
+            "routedWireLength": round(length),
+            "routedCrossings": crossings,
+        }
+    return results
+
+
+def benchmarkLabelPlacement(numberOfControllers: int = 6, componentsPerRow: int = 10):
+    """
+    Places a net label on every wire and a pin label on every wired controller pin of a routed circuit, finding collisions through the grid of the spatial index against one cell holding everything, which checks every drawn item.
+
+    The circuit has several controllers in a grid, each with full rows, for a few hundred labels on one canvas.
+    Returns:
+        dict: Per mode, the number of labels and indexed boxes, the milliseconds taken and, for pin and net labels apart, how many had to overlap something, were turned to run along their wire or were placed away from it with a leader line.
+    """
+    import contextlib
+    from DiagramPipeline import CircuitSpec, DiagramPipeline
+
+    gpioPins = [3, 5, 7, 8, 10, 11, 12, 13, 15, 16, 18, 19, 21, 22, 23, 24, 26, 29, 31, 32, 33, 35, 36, 37, 38, 40]
+    inputComponents, outputComponents = [], []
+    for controllerKey in range(numberOfControllers):
+        inputComponents += [("Button", gpioPins[index], controllerKey) for index in range(componentsPerRow)]
+        outputComponents += [("LED", gpioPins[componentsPerRow + index], controllerKey) for index in range(componentsPerRow)]
+    circuitSpec = CircuitSpec("Labels", "Benchmarks", inputComponents, outputComponents, placement="barycenter", numberOfControllers=numberOfControllers, controllerColumns=3)
+
+    results = {}
+    for mode, cellSize in (("gridIndex", 64), ("linearScan", 1 << 30)):
+        pipeline = DiagramPipeline(circuitSpec, numberOfRouteWorkers=1)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            pipeline.layout()
+            pipeline.route()
+            pipeline.rasterize()
+        startTime = time.perf_counter()
+        labelPlacer = pipeline.diagram.addNetLabels(cellSize=cellSize)
+        milliseconds = (time.perf_counter() - startTime) * 1e3
+        results[mode] = {
+            "labels": len(labelPlacer.placedLabels),
+            "indexedBoxes": len(labelPlacer.spatialIndex),
+            "milliseconds": milliseconds,
+        }
+        for kind, ownerKind in (("pinLabels", "pinLabel"), ("netLabels", "label")):
+            placedLabels = [placedLabel for placedLabel in labelPlacer.placedLabels if placedLabel.owner[0] == ownerKind]
+            results[mode][kind] = {
+                "labels": len(placedLabels),
+                "overlapping": sum(1 for placedLabel in placedLabels if placedLabel.isOverlapping),
+                "vertical": sum(1 for placedLabel in placedLabels if placedLabel.angle == 90),
+                "leaderLines": sum(1 for placedLabel in placedLabels if placedLabel.leaderLine is not None),
+            }
+    return results
+
+
+def benchmarkLegendTable(netCounts: tuple = (100, 1000, 10000), xResolution: int = 4000, yResolution: int = 4000):
+    """
+    Fills the legend of an empty canvas from wiring tables of growing size. The legend only has room for so many rows, so past that the time is the measuring pass, which should grow linearly with the number of nets.
+    Returns:
+        dict: Per number of nets, the milliseconds taken, the microseconds per net and the number of legend rows drawn.
+    """
+    from BaseWiringDiagram import BaseWiringDiagram
+    from DiagramPipeline import DiagramPipeline
+    from WireColorAllocator import WireColorAllocator
+
+    colors = WireColorAllocator.generatePalette(28)
+    results = {}
+    for numberOfNets in netCounts:
+        wiringTable = [{"controller": 0, "net": f"GPIO{index % 28}", "color": colors[index % len(colors)], "component": f"{index} LED Basic LED", "componentPin": "2 (OUTPUT)", "headerPin": index % 40 + 1, "bcm": index % 28} for index in range(numberOfNets)]
+        diagram = BaseWiringDiagram(xResolution, yResolution)
+        diagram.addLegend(yResolution * (1 - DiagramPipeline.DISTANCE_BETWEEN_INFO_RECTANGLES_AND_BOTTOM))
+        startTime = time.perf_counter()
+        drawnBounds = diagram.fillLegend(wiringTable)
+        seconds = time.perf_counter() - startTime
+        results[f"{numberOfNets}nets"] = {
+            "milliseconds": seconds * 1e3,
+            "microsecondsPerNet": seconds * 1e6 / numberOfNets,
+            "drawnRows": sum(1 for item in diagram.displayList if item.owner == ("legend",) and item.kind == "line"),
+        }
+    return results
+
+
+def benchmarkWireColoring(numberOfControllers: int = 2, componentsPerRow: int = 10):
+    """
+    Colours the nets of a routed circuit with a WireColorAllocator, and by handing out the 28 named colours diagrams used to cycle through, in drawing order.
+    Returns:
+        dict: Per mode, the number of nets and colours, the pairs of crossing or neighbouring nets that share a colour, the smallest CIELAB distance between such a pair and the milliseconds taken.
+    """
+    import contextlib
+    from PIL import ImageColor
+    from BaseWiringDiagram import BaseWiringDiagram
+    from DiagramPipeline import CircuitSpec, DiagramPipeline
+    from WireColorAllocator import WireColorAllocator, _srgbToLab
+    from Utilities.PinEnum import PinEnum
+
+    namedColors = ["red", "blue", "green", "yellow", "purple", "orange", "pink", "brown", "black", "white", "gray", "cyan", "magenta", "lime", "teal", "indigo", "maroon", "olive", "navy", "aquamarine", "turquoise", "silver", "lime", "fuchsia", "aqua", "purple", "yellow", "orange"]
+    gpioPins = [3, 5, 7, 8, 10, 11, 12, 13, 15, 16, 18, 19, 21, 22, 23, 24, 26, 29, 31, 32, 33, 35, 36, 37, 38, 40]
+    inputComponents, outputComponents = [], []
+    for controllerKey in range(numberOfControllers):
+        inputComponents += [("Button", gpioPins[index], controllerKey) for index in range(componentsPerRow)]
+        outputComponents += [("LED", gpioPins[componentsPerRow + index], controllerKey) for index in range(componentsPerRow)]
+    pipeline = DiagramPipeline(CircuitSpec("Colours", "Benchmarks", inputComponents, outputComponents, placement="barycenter", numberOfControllers=numberOfControllers), numberOfRouteWorkers=1)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        pipeline.layout()
+        pipeline.route()
+    diagram = pipeline.diagram
+    wires = [(diagram._getNet(component, endpointPin), BaseWiringDiagram._getWireSegments(wire))
+             for componentDict in (diagram.inputComponentObjects, diagram.outputComponentObjects) for component in componentDict.values() if component is not None
+             for endpointPin, wire in component.wires.items() if endpointPin != PinEnum.GROUND]
+
+    startTime = time.perf_counter()
+    allocator = WireColorAllocator(BaseWiringDiagram.WIRE_LANE_SPACING)
+    for net, segments in wires:
+        allocator.addWire(net, segments)
+    allocatedColors = allocator.assignColors()
+    allocatorMilliseconds = (time.perf_counter() - startTime) * 1e3
+
+    startTime = time.perf_counter()
+    remainingColors, cycledColors = [], {}
+    for net, _ in wires:
+        if not remainingColors:
+            remainingColors = list(namedColors)
+        cycledColors.setdefault(net, remainingColors.pop())
+    cycleMilliseconds = (time.perf_counter() - startTime) * 1e3
+
+    results = {}
+    for mode, colors, milliseconds in (("allocator", allocatedColors, allocatorMilliseconds), ("namedListCycle", cycledColors, cycleMilliseconds)):
+        labOfColor = {color: _srgbToLab(*ImageColor.getrgb(color)[:3]) for color in set(colors.values())}
+        pairs = {(net, neighbour) for net, neighbours in allocator.neighbours.items() for neighbour in neighbours if str(net) < str(neighbour)}
+        distances = [WireColorAllocator._distance(labOfColor[colors[net]], labOfColor[colors[neighbour]]) ** 0.5 for net, neighbour in pairs]
+        results[mode] = {
+            "nets": len(colors),
+            "colors": len(labOfColor),
+            "neighbouringPairs": len(pairs),
+            "pairsSharingAColor": sum(1 for distance in distances if distance == 0),
+            "smallestNeighbourDistance": round(min(distances), 1) if distances else None,
+            "milliseconds": milliseconds,
+        }
+    return results
+
+
+def _residentPeakMB():
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+
+
+def _measureSupersampling(circuitSpec, scale, tileSize):
+    """
+    Renders a circuit and then draws its canvas again at a supersampling factor, in a process of its own so the peak memory belongs to this render alone.
+    """
+    import contextlib
+    from DiagramPipeline import DiagramPipeline
+
+    pipeline = DiagramPipeline(circuitSpec, numberOfRouteWorkers=1)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        pipeline.layout()
+        pipeline.route()
+        pipeline.rasterize()
+    diagram = pipeline.diagram
+    peakBefore = _residentPeakMB()
+    startTime = time.perf_counter()
+    tiles = diagram.setSupersampling(scale, tileSize)
+    milliseconds = (time.perf_counter() - startTime) * 1e3
+    peakAfter = _residentPeakMB()
+
+    # a dirty region the size of one component slot, as DiagramDiff repaints it
+    regionWidth, regionHeight = diagram.xResolution // 10, diagram.yResolution // 8
+    region = (diagram.xResolution // 2, diagram.yResolution // 2, diagram.xResolution // 2 + regionWidth, diagram.yResolution // 2 + regionHeight)
+    startTime = time.perf_counter()
+    diagram.repaintRegion(region)
+    regionMilliseconds = (time.perf_counter() - startTime) * 1e3
+
+    tileWidth, tileHeight = min(tileSize, diagram.xResolution), min(tileSize, diagram.yResolution)
+    return {
+        "milliseconds": milliseconds,
+        "tilesDrawn": tiles,
+        "tileMB": tileWidth * tileHeight * scale * scale * 3 / (1 << 20),
+        "peakResidentGrowthMB": round(peakAfter - peakBefore, 1) if peakBefore is not None else None,
+        "dirtyRegionMilliseconds": regionMilliseconds,
+    }
+
+
+def benchmarkSupersampling(scales: tuple = (1, 2, 4), tileSize: int = 512, componentsPerRow: int = 10):
+    """
+    Draws the canvas of a routed circuit again at every supersampling factor, in tiles and as one tile covering the whole canvas, each in a fresh process.
+
+    The enlarged tile is the only large image a supersampled render holds, so its size bounds the extra memory, while the total pixels drawn, and so the time, grow with the square of the factor either way.
+    Returns:
+        dict: Per factor and tiling, the milliseconds taken, the tiles drawn, the size of one enlarged tile, the growth of the peak resident memory (None where it cannot be read) and the milliseconds to repaint one dirty region.
+    """
+    from DiagramPipeline import CircuitSpec
+
+    gpioPins = [3, 5, 7, 8, 10, 11, 12, 13, 15, 16, 18, 19, 21, 22, 23, 24, 26, 29, 31, 32, 33, 35, 36, 37, 38, 40]
+    circuitSpec = CircuitSpec("Supersampling", "Benchmarks", [("Button", pin) for pin in gpioPins[:componentsPerRow]], [("LED", pin) for pin in gpioPins[componentsPerRow:2 * componentsPerRow]], placement="barycenter", netLabels=True)
+
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        for scale in scales:
+            for mode, size in (("tiled", tileSize), ("wholeCanvas", 1 << 30)):
+                results[f"{scale}x {mode}"] = pool.apply(_measureSupersampling, (circuitSpec, scale, size))
+    return results
+
+
+def _printResults(title, results):
+    print(title)
+    for mode, summary in results.items():
+        print(f"  {mode}:")
+        for key, value in summary.items():
+            print(f"    {key}: {value}")
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    _printResults("Component library load", benchmarkComponentLibraryLoad())
+    _printResults("Component construction", benchmarkComponentConstruction())
+    _printResults("Pin transform", benchmarkPinTransform())
+    _printResults("Component paste", benchmarkComponentPaste())
+    _printResults("Pin extraction", benchmarkPinExtraction())
+    _printResults("Placement", benchmarkPlacement())
+    _printResults("Label placement", benchmarkLabelPlacement())
+    _printResults("Legend table", benchmarkLegendTable())
+    _printResults("Wire colouring", benchmarkWireColoring())
+    _printResults("Supersampling", benchmarkSupersampling())
+    _printResults("Worker startup", benchmarkWorkerStartup())
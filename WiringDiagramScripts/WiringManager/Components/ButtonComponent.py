@@ -1,4 +1,6 @@
 from Component import Component
+from ComponentLibrary import ComponentLibrary
+from ComponentTypeRegistry import ComponentTypeRegistry
 from Coordinates import Coordinates
 from Utilities.PinEnum import *
 import os
@@ -6,10 +8,18 @@ from Utilities.DirectionEnum import *
 
 
 class ButtonComponent(Component):
+    TYPE_NAME = "Basic Button"
+
+    @staticmethod
+    def _buildType():
+        """
+        Loads the ComponentType shared by every button. Pin 1's destination is the button's GPIO, set per button. The pins are defined in ComponentDefinitions/BasicButton.json.
+        """
+        return ComponentLibrary.loadDirectory()[ButtonComponent.TYPE_NAME]
+
     def __init__(self, name:str, controllerInputGPIO:int, controllerKey:int = 0):
-        dirname = os.path.dirname(__file__)
-        filename = os.path.join(dirname, "Images/BasicButton.png")
-        self.imagePath = filename
+        componentType = ComponentTypeRegistry.getType(ButtonComponent.TYPE_NAME)
+        self.imagePath = componentType.imagePath
         self.Label = name + " Basic Button"
 
         # the following is used to map the components made from the GUI 
@@ -18,27 +28,9 @@ class ButtonComponent(Component):
         self.controllerInputGPIO = controllerInputGPIO
         self.controllerKey = controllerKey
         
-        self.electricalValuesDict = {"Voltage Input": [3.3, 5]}
-
-
-        self.pinLMRMCoordinates = {
-            1: {
-                "Usage": PinEnum.INPUT,
-                "PinDestination": self.controllerInputGPIO,
-                "LM": Coordinates("LM GPIO Signal In", 90, 300),
-                "RM": Coordinates("LM GPIO Signal In", 111, 360),
-                "PinLocation": DirectionEnum.DOWN
-                
-            },
-            2: {
-                "Usage": PinEnum.GROUND,
-                "PinDestination": PinEnum.GROUND,
-                "LM": Coordinates("Ground Pin", 255, 300),
-                "RM": Coordinates("Ground Pin",278, 360),
-                "PinLocation": DirectionEnum.DOWN
-            },
-        }  # (left most, rightmost) based on the width of the pin in the image in pixels.
-        super().__init__(self.Label, self.imagePath, self.electricalValuesDict, self.pinLMRMCoordinates, isPowered=False, controllerKey=controllerKey)
-
-
- 
+        self.electricalValuesDict = dict(componentType.electricalValuesDict)
+
+        super().__init__(self.Label, self.imagePath, self.electricalValuesDict, None, isPowered=componentType.isPowered, controllerKey=controllerKey, componentType=componentType, pinDestinations={1: self.controllerInputGPIO})
+
+
+ComponentTypeRegistry.register(ButtonComponent.TYPE_NAME, ButtonComponent._buildType, ButtonComponent)
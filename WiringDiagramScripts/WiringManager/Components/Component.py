@@ -1,7 +1,11 @@
 from abc import ABC, abstractmethod
 import json
-from PIL import Image, UnidentifiedImageError
 from Coordinates import Coordinates
+from AssetCache import AssetCache
+from PinTable import PinTable
+from AffineTransform import AffineTransform
+from ComponentTypeRegistry import ComponentType
+from array import array
 from math import radians, cos, sin
 from Utilities.DirectionEnum import *
 
@@ -9,9 +13,16 @@ from Wire import WireLines
 class Component(ABC):
     """
     Abstract base class to represent a component.
+
+    A component keeps its pins in the coordinates of its original image (localPinTable) together with the transform that places the image on the canvas. The canvas coordinates in pinTable and pinLMRMCoordinates are worked out when they are first read and kept until the transform changes, so a component can be placed again or moved without rebuilding it.
     """
+    # class-level defaults, so subclasses can assign pinLMRMCoordinates before calling Component.__init__
+    transform = AffineTransform()
+    rotationAngle = 0
+    componentType = None
+    _worldPinTable = None
 
-    def __init__(self, componentLabel: str, imagePath: str, electricalValuesDict: dict[str, dict[str, any]], pinLMRMCoordinates: dict[int, dict[str,Coordinates]], isPowered: bool = False, controllerKey: int = None):
+    def __init__(self, componentLabel: str, imagePath: str, electricalValuesDict: dict[str, dict[str, any]], pinLMRMCoordinates: dict[int, dict[str,Coordinates]], isPowered: bool = False, controllerKey: int = None, componentType: ComponentType = None, pinDestinations: dict = None):
         """
         Initializes a new Component object
 
@@ -34,17 +45,66 @@ class Component(ABC):
                 "RM": A Coordinates object representing the rightmost point of the pin. This is where the lowest point where the wire will be connected to the pin. Assure that the RM is to the right of the LM. This can be adjust for aesthetic purposes. Make sure to make this value as the absolute rightmost point of the pin. This is to ensure that the wire is connected in a visually appealing way.
 
             isPowered (bool): A boolean to indicate if the component is powered from a power pin on the Pi or an external power source.
+
+            componentType (ComponentType): The shared type of the component, from the ComponentTypeRegistry. When given, pinLMRMCoordinates is ignored and the type's pin table and image size are shared instead of being built again.
+
+            pinDestinations (dict): With componentType, the physical pin number and destination of every pin whose destination differs per component, like the GPIO of a signal pin.
         """
+        self.componentType = componentType # the shared type of the component, or None if the component carries its own pin table
         self.Label = componentLabel # label for the component
         self.imagePath = imagePath  # path to image file of the component
         self.electricalValuesDict = electricalValuesDict # a dictionary of electrical measurements relevant to the component and their rated values
         
-        self.pinLMRMCoordinates = pinLMRMCoordinates # a dictionary of key int (representing physical pin number) and value tuple of (int, int) (representing the center of the pin). The tuple can be placed anywhere vertically on the pin but MUST be centered horizontally. The tuple represents the highest point the wire can be connected to the pin. This can be adjusted for aesthetic purposes.
+        # the pins are stored as arrays in a PinTable; pinLMRMCoordinates is a dict-like view of where they are on the canvas
+        if componentType is not None:
+            self.localPinTable = componentType.createPinTable(pinDestinations)
+        else:
+            self.pinLMRMCoordinates = pinLMRMCoordinates # a dictionary of key int (representing physical pin number) and value tuple of (int, int) (representing the center of the pin). The tuple can be placed anywhere vertically on the pin but MUST be centered horizontally. The tuple represents the highest point the wire can be connected to the pin. This can be adjusted for aesthetic purposes.
         self.imageDimensions = self.getImageDimensions() # dimensions of the image file's contents in pixels to be used for placing the component on the canvas
         self.isPowered = isPowered # a boolean to indicate if the component is powered from something other than a GPIO Pin, like a power pin on the Pi or an external power source. This means another wire for the power source is needed for the wiring diagram.
         self.controllerKey = controllerKey # a key to identify the controller that the component is connected to. This is used to identify the controller that the component is connected to in the wiring diagram.
 
         self.wires = {} # a dictionary of wires that are connected to the component. The key is an int and the value is the wire object.
+        self.placement = None # (center point, dimensions, rotation angle, resized) of the component's image on the canvas, set when it is placed.
+
+    @property
+    def pinLMRMCoordinates(self):
+        """
+        The pins on the canvas, as a dict-like view in the format described by __init__. Read it again after the component is moved; a view kept from before shows the old placement.
+
+        Usage, PinDestination and any extra keys can be written through the view and are kept when the component is moved. LM, RM and PinLocation are worked out from the pins in image coordinates and the transform, so writing them raises a TypeError; assign a new pin dict in image coordinates to this property, or place the component again, to change them.
+        """
+        return self.pinTable.asPinDict()
+
+    @pinLMRMCoordinates.setter
+    def pinLMRMCoordinates(self, pinLMRMCoordinates):
+        # the given pins are in the coordinates of the component's original image
+        self.localPinTable = PinTable.fromPinDict(pinLMRMCoordinates)
+        self._worldPinTable = None
+
+    @property
+    def pinTable(self):
+        """
+        The PinTable of the pins on the canvas, worked out from localPinTable and the transform the first time it is needed after a change.
+        """
+        if self._worldPinTable is None:
+            worldPinTable = self.localPinTable.transformed(self.transform)
+            # a pin is on whichever side of the component its original side is turned closest to
+            self._determinePinLocationAfterRotation((round(self.rotationAngle / 90) * 90) % 360, worldPinTable)
+            self._worldPinTable = worldPinTable
+        return self._worldPinTable
+
+    def setTransform(self, transform: AffineTransform, rotationAngle: float = None):
+        """
+        Places the component by setting the transform from its original image to the canvas. The pins are not moved until they are next read.
+        Args:
+            transform (AffineTransform): The transform from image to canvas coordinates.
+            rotationAngle (float): The counterclockwise rotation of the image, used to work out which side each pin is on. Left unchanged when None.
+        """
+        self.transform = transform
+        if rotationAngle is not None:
+            self.rotationAngle = rotationAngle
+        self._worldPinTable = None
 
     def __str__(self):
         return f"Component: {self.Label}\nImage Path: {self.imagePath}\nElectrical Values: {self.electricalValuesDict}\nPin Coordinates: {self.pinLMRMCoordinates}\nImage Dimensions: {self.imageDimensions}\nIs Powered: {self.isPowered}"
@@ -84,11 +144,7 @@ class Component(ABC):
 
         xPlacement, yPlacement = topLeftCoordinates
 
-        for values in self.pinLMRMCoordinates.values():
-            for value in values.values():
-                if isinstance(value, Coordinates):
-                    value.x += xPlacement
-                    value.y += yPlacement
+        self.setTransform(self.transform.then(AffineTransform.translation(xPlacement, yPlacement)))
 
     def printCoordinates(self):
         for values in self.pinLMRMCoordinates.values():
@@ -107,29 +163,18 @@ class Component(ABC):
 
 
         """
-        for values in self.pinLMRMCoordinates.values():
-            for value in values.values():
-                if isinstance(value, Coordinates):
-                    xResolution, yResolution = self.getImageDimensions()
-
-                    # use old and new resolution to create a ratio to scale the coordinates
-                    value.x = int(value.x * xDestinationResolution / xResolution)
-                    value.y = int(value.y * yDestinationResolution / yResolution)
-                    # I HAVE ABSOLUTELY NO IDEA IF THIS WILL WORK. I'M JUST GUESSING.
+        # use old and new resolution to create a ratio to scale the coordinates
+        xResolution, yResolution = self.getImageDimensions()
+        self.setTransform(self.transform.then(AffineTransform.scaling(xDestinationResolution / xResolution, yDestinationResolution / yResolution)))
 
     def adjustCoordinatesAfterRotation(self, rotation: int):
-
-        def rotate_point(x, y, angle):
-            rad = radians(angle)
-            new_x = x * cos(rad) - y * sin(rad)
-            new_y = x * sin(rad) + y * cos(rad)
-            return new_x, new_y
-
-
-        for values in self.pinLMRMCoordinates.values():
-            for info in values.values():
-                if isinstance(info, Coordinates):
-                    info.x, info.y = rotate_point(info.x, info.y, rotation)
+        """
+        Rotates the coordinates of the pins about the origin.
+        Args:
+            rotation (int): The angle of rotation in degrees.
+        """
+        rad = radians(rotation)
+        self.setTransform(self.transform.then(AffineTransform(cos(rad), -sin(rad), 0.0, sin(rad), cos(rad), 0.0)))
 
     def getImageDimensions(self):
         """
@@ -137,18 +182,10 @@ class Component(ABC):
         Returns:
             tuple: The width and height of the image file in pixels.
         """
-        
-        try:
-            with Image.open(self.imagePath) as img:
-                return img.size
-        except FileNotFoundError:
-            raise ValueError(f"Image file not found at path: {self.imagePath}")
-        except IOError:
-            raise ValueError(f"Error occurred while opening the image file at path: {self.imagePath}")
-        except UnidentifiedImageError:
-            raise ValueError(f"Image file at path: {self.imagePath} is not a valid image file")
-        except Exception as e:
-            raise ValueError(f"An unexpected error occurred while getting image dimensions: {e}")
+        if self.componentType is not None and self.componentType.imagePath == self.imagePath:
+            return self.componentType.imageSize
+        # the decoded image is shared process-wide, so this does not reopen the file; AssetCache raises a ValueError for missing or unreadable images
+        return AssetCache.getImageSize(self.imagePath)
         
        
 
@@ -189,76 +226,30 @@ class Component(ABC):
         """
         Adjusts the coordinates of the pins due to resizing, rotation, and new position.
 
+        The rotation, the scaling and the move are composed into one affine transform that replaces any earlier placement. The pins are moved with one matrix multiply over all their corners the next time they are read, see PinTable.applyTransform.
+
         :param original_size: The original size of the image (width, height).
-        :param new_size: The new size of the image (width, height).
-        :param rotation_angle: The rotation angle in degrees.
+        :param new_size: The size of the image on the canvas after it is rotated and resized (width, height).
+        :param rotation_angle: The counterclockwise rotation angle in degrees, as passed to Image.rotate(expand=True). Any angle is supported.
         :param new_position: The new position of the top-left corner of the image (x, y).
         """
+        self.setTransform(AffineTransform.placement(original_size, new_size, rotation_angle, new_position), rotation_angle)
 
 
-        # Adjust for rotation
-        # account for only 90, 180, 270 degrees
-        
-        if rotation_angle == 90:
-            for values in self.pinLMRMCoordinates.values():
-                for value in values.values():
-                    if isinstance(value, Coordinates):
-                        value.x, value.y = value.y, value.x
-        elif rotation_angle == 180:
-            for values in self.pinLMRMCoordinates.values():
-                for value in values.values():
-                    if isinstance(value, Coordinates):
-                        value.x, value.y = -value.x, -value.y
-        elif rotation_angle == 270:
-            for values in self.pinLMRMCoordinates.values():
-                for value in values.values():
-                    if isinstance(value, Coordinates):
-                        value.x, value.y = -value.y, value.x
-        elif rotation_angle == 0:
-            pass
-        else:
-            raise ValueError("Invalid rotation angle. Only 0, 90, 180, and 270 degrees are supported.")
-        self._determinePinLocationAfterRotation(rotation_angle)
-
-                
-        # Adjust for resizing
-        scale_x = new_size[0] / original_size[0]
-        scale_y = new_size[1] / original_size[1]
-        #print(f"scale_x: {scale_x}, scale_y: {scale_y}")
-        for values in self.pinLMRMCoordinates.values():
-            for value in values.values():
-                if isinstance(value, Coordinates):
-                    value.x *= scale_x
-                    #print(f"new x: {value.x}")
-                    value.y *= scale_y
-                    #print(f"new y: {value.y}")
-        
-        #print(f"Adjusting for new position")
-        # Adjust for new position
-        for values in self.pinLMRMCoordinates.values():
-            for value in values.values():
-                if isinstance(value, Coordinates):
-                    value.x += new_position[0]
-                   # print(f"new x: {value.x}")
-                    value.y += new_position[1]
-                  #  print(f"new y: {value.y}")
-
-
-    def _determinePinLocationAfterRotation(self, rotationAngle):
+    def _determinePinLocationAfterRotation(self, rotationAngle, pinTable: PinTable):
         """
         changes the Direction enum that represent what side fo the component that pin is on (relative to the component's original image) based on the rotation of the component's original image.
         Args:
             rotationAngle (int): The angle of rotation in degrees.
+            pinTable (PinTable): The table whose pin sides are changed.
         """
 
-        for key1,values in self.pinLMRMCoordinates.items():
-               # print(f"FIRST SEARCH ME {key1}\n{values}")
-                for key2,value in values.items():
-                    
-                    if isinstance(value, DirectionEnum):
-                       # print(f"SECOND SEARCH ME {key2}\n{value.value}\nrotation {rotationAngle}")
-                        self.pinLMRMCoordinates[key1][key2] = self._determineNewDirection(value, rotationAngle)
-                       # print(f"DID I CHANGE? {key1} {key2}\n{self.pinLMRMCoordinates[key1][key2].value}")
+        # one byte table maps every side code to its turned code, so all pins are turned in a single translate() call
+        quarterTurns = (rotationAngle // 90) % 4
+        translation = bytearray(range(256))
+        for code in range(4):
+            translation[code] = ROTATION_TABLE[code][quarterTurns]
+        pinTable.directionCodes[:] = array("b", pinTable.directionCodes.tobytes().translate(translation))
 
 
     @staticmethod                    
@@ -279,37 +270,9 @@ class Component(ABC):
         Returns:
             DirectionEnum: The new direction of the pin.
         """
-        if rotationAngle == 270:
-            if currentDirection == UP:
-                return RIGHT
-            elif currentDirection == RIGHT:
-                return DOWN
-            elif currentDirection == DOWN:
-                return LEFT
-            elif currentDirection == LEFT:
-                return UP
-        elif rotationAngle == 180:
-            if currentDirection == UP:
-                return DOWN
-            elif currentDirection == RIGHT:
-                return LEFT
-            elif currentDirection == DOWN:
-                return UP
-            elif currentDirection == LEFT:
-                return RIGHT
-        elif rotationAngle == 90:
-            if currentDirection == UP:
-                return LEFT
-            elif currentDirection == RIGHT:
-                return UP
-            elif currentDirection == DOWN:
-                return RIGHT
-            elif currentDirection == LEFT:
-                return DOWN
-        elif rotationAngle == 0:
-            return currentDirection
-        else:
-            raise ValueError("Invalid rotation angle. Only 0, 90, 180, and 270 degrees are supported.")
+        if rotationAngle % 90 != 0:
+            raise ValueError("Invalid rotation angle. Only multiples of 90 degrees are supported.")
+        return currentDirection.rotated(int(rotationAngle // 90))
 
 
 # Example usage
@@ -0,0 +1,383 @@
+"""
+Component types defined by JSON data files.
+
+Every *.json file in a definition directory describes one component type:
+
+    {
+        "typeName": "Basic Button",
+        "imagePath": "../Images/BasicButton.png",
+        "isPowered": false,
+        "electricalValues": {"Voltage Input": [3.3, 5]},
+        "pins": {
+            "1": {"Usage": "INPUT", "LM": [90, 300], "RM": [111, 360], "PinLocation": "DOWN", "PinDestination": null}
+        }
+    }
+
+imagePath is relative to the definition file. Usage and PinDestination are PinEnum names (like "GROUND"); any other Usage string, like a header's "Ground" or "17", is kept as text and null marks an unused pin. A PinDestination may also be a GPIO number. PinLocation is a DirectionEnum name and PinDestination is only given for pins that are wired.
+
+Parsing and validating hundreds of JSON files on every start is slow, so each validated definition is compiled into a record of packed arrays and all records of a directory are kept in one binary cache file. A record is used as long as the modification time and size of its definition file and image are unchanged; otherwise that one file is compiled again and the cache is rewritten.
+"""
+
+import json
+import marshal
+import os
+import struct
+import sys
+
+import numpy as np
+from PIL import Image, UnidentifiedImageError
+
+from Component import Component
+from ComponentTypeRegistry import ComponentType, ComponentTypeRegistry
+from PinTable import PinTable, NO_DIRECTION
+from Utilities.DirectionEnum import DirectionEnum
+from Utilities.PinEnum import PinEnum
+
+CACHE_MAGIC = b"WDCLIB"
+CACHE_VERSION = 1
+CACHE_FILE_NAME = "componentLibrary.cache"
+
+# magic, cache version, marshal version, 1 on little-endian machines
+_CACHE_HEADER = struct.Struct("<6sHBB")
+
+_TOP_LEVEL_KEYS = {"typeName", "imagePath", "isPowered", "electricalValues", "pins"}
+_PIN_KEYS = {"Usage", "LM", "RM", "PinLocation", "PinDestination"}
+
+
+def _encodeValue(value):
+    # marshal only stores built-in types, so PinEnums are stored as a 1-tuple of their name
+    return (value.name,) if isinstance(value, PinEnum) else value
+
+
+def _decodeValue(value):
+    return PinEnum[value[0]] if isinstance(value, tuple) else value
+
+
+def _readImageSize(imagePath: str):
+    # only the image header is read; the pixels are decoded later by the AssetCache, when the component is drawn
+    try:
+        with Image.open(imagePath) as image:
+            return image.size
+    except FileNotFoundError:
+        raise ValueError(f"Image file not found at path: {imagePath}")
+    except UnidentifiedImageError:
+        raise ValueError(f"Image file at path: {imagePath} is not a valid image file")
+    except IOError:
+        raise ValueError(f"Error occurred while opening the image file at path: {imagePath}")
+
+
+def _isNumber(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class ComponentLibrary:
+    """
+    Loads the component types of a definition directory, validating the JSON files and keeping a compiled cache of them.
+    """
+    DEFAULT_DEFINITION_DIRECTORY = os.path.join(os.path.dirname(__file__), "ComponentDefinitions")
+
+    # normalized directory -> (file signature, {typeName: ComponentType}) of the last load in this process
+    _loadedDirectories = {}
+
+    @staticmethod
+    def compileDefinition(definitionPath: str, definition: dict, imageSize: tuple = None):
+        """
+        Validates a parsed definition and compiles it into a cache record.
+        Args:
+            definitionPath (str): The path of the definition file, used for error messages and to find the image.
+            definition (dict): The parsed JSON.
+            imageSize (tuple): The size of the image, if it is already known.
+        Returns:
+            tuple: The compiled record, without the file signature.
+        """
+        def fail(message):
+            raise ValueError(f"{definitionPath}: {message}")
+
+        if not isinstance(definition, dict):
+            fail("a component definition must be a JSON object")
+        unknownKeys = set(definition) - _TOP_LEVEL_KEYS
+        if unknownKeys:
+            fail(f"unknown keys {sorted(unknownKeys)}")
+
+        typeName = definition.get("typeName")
+        if not isinstance(typeName, str) or not typeName:
+            fail("\"typeName\" must be a non-empty string")
+        imagePath = definition.get("imagePath")
+        if not isinstance(imagePath, str) or not imagePath:
+            fail("\"imagePath\" must be a non-empty string")
+        imagePath = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(definitionPath)), imagePath))
+        isPowered = definition.get("isPowered", False)
+        if not isinstance(isPowered, bool):
+            fail("\"isPowered\" must be true or false")
+        electricalValuesDict = definition.get("electricalValues", {})
+        if not isinstance(electricalValuesDict, dict):
+            fail("\"electricalValues\" must be a JSON object")
+        pins = definition.get("pins")
+        if not isinstance(pins, dict) or not pins:
+            fail("\"pins\" must be a non-empty JSON object")
+
+        if imageSize is None:
+            imageSize = _readImageSize(imagePath)
+        width, height = imageSize
+
+        table = PinTable()
+        # the (LM x, LM y, RM x, RM y) of every pin, made into table.corners in one go once all pins are read
+        pinCorners = []
+        for pinKey, pinDict in pins.items():
+            if not pinKey.isdigit() or int(pinKey) < 1:
+                fail(f"pin number \"{pinKey}\" must be a positive integer")
+            pinNumber = int(pinKey)
+            if pinNumber in table.rowOfPin:
+                fail(f"pin {pinNumber} is defined more than once")
+            if not isinstance(pinDict, dict):
+                fail(f"pin {pinNumber} must be a JSON object")
+            unknownKeys = set(pinDict) - _PIN_KEYS
+            if unknownKeys:
+                fail(f"pin {pinNumber} has unknown keys {sorted(unknownKeys)}")
+
+            if "Usage" not in pinDict:
+                fail(f"pin {pinNumber} has no \"Usage\"")
+            usage = pinDict["Usage"]
+            if usage is not None and (not isinstance(usage, str) or not usage):
+                fail(f"pin {pinNumber} \"Usage\" must be a PinEnum name, a non-empty string or null")
+            usage = PinEnum[usage] if usage in PinEnum.__members__ else usage
+
+            corners = []
+            for corner in ("LM", "RM"):
+                point = pinDict.get(corner)
+                if not isinstance(point, list) or len(point) != 2 or not all(_isNumber(value) for value in point):
+                    fail(f"pin {pinNumber} \"{corner}\" must be [x, y] in pixels")
+                if not (0 <= point[0] <= width and 0 <= point[1] <= height):
+                    fail(f"pin {pinNumber} \"{corner}\" {point} is outside the {width}x{height} image")
+                corners.append(point)
+            (lmX, lmY), (rmX, rmY) = corners
+            if lmX > rmX or lmY > rmY:
+                fail(f"pin {pinNumber} \"LM\" must be the top left and \"RM\" the bottom right corner")
+
+            side = pinDict.get("PinLocation")
+            if side is not None and side not in DirectionEnum.__members__:
+                fail(f"pin {pinNumber} \"PinLocation\" must be one of {list(DirectionEnum.__members__)}")
+
+            destination = pinDict.get("PinDestination")
+            if isinstance(destination, str):
+                if destination not in PinEnum.__members__:
+                    fail(f"pin {pinNumber} \"PinDestination\" \"{destination}\" is not a PinEnum name")
+                destination = PinEnum[destination]
+            elif destination is not None and (not isinstance(destination, int) or isinstance(destination, bool)):
+                fail(f"pin {pinNumber} \"PinDestination\" must be a PinEnum name, a GPIO number or null")
+
+            table.rowOfPin[pinNumber] = len(table.pinNumbers)
+            table.pinNumbers.append(pinNumber)
+            pinCorners.append((lmX, lmY, rmX, rmY))
+            table.usageCodes.append(table._usageToCode(usage))
+            table.directionCodes.append(DirectionEnum[side].code if side is not None else NO_DIRECTION)
+            table.destinations.append(destination)
+            table.hasDestination.append("PinDestination" in pinDict)
+        table.corners = np.array(pinCorners, dtype=np.float32).reshape(-1, 4)
+
+        return (
+            typeName, imagePath, width, height, isPowered, electricalValuesDict,
+            table.pinNumbers.tobytes(), table.lmX.tobytes(), table.lmY.tobytes(), table.rmX.tobytes(), table.rmY.tobytes(),
+            table.usageCodes.tobytes(), table.directionCodes.tobytes(),
+            tuple(_encodeValue(usage) for usage in table.usages),
+            tuple(_encodeValue(destination) for destination in table.destinations),
+            tuple(table.hasDestination),
+        )
+
+    @staticmethod
+    def buildType(record: tuple):
+        """
+        Builds the ComponentType of a compiled record.
+        """
+        (typeName, imagePath, width, height, isPowered, electricalValuesDict,
+         pinNumbers, lmX, lmY, rmX, rmY, usageCodes, directionCodes, usages, destinations, hasDestination) = record
+
+        table = PinTable()
+        for values, data in ((table.pinNumbers, pinNumbers), (table.usageCodes, usageCodes), (table.directionCodes, directionCodes)):
+            values.frombytes(data)
+        table.corners = np.column_stack([np.frombuffer(data, dtype=np.float32) for data in (lmX, lmY, rmX, rmY)])
+        table.rowOfPin = {pinNumber: row for row, pinNumber in enumerate(table.pinNumbers)}
+        table.usages = [_decodeValue(usage) for usage in usages]
+        table.destinations = [_decodeValue(destination) for destination in destinations]
+        table.hasDestination = list(hasDestination)
+        table.extras = [{} for _ in table.pinNumbers]
+        return ComponentType(typeName, imagePath, electricalValuesDict, None, isPowered=isPowered, pinTable=table, imageSize=(width, height))
+
+    @staticmethod
+    def loadDefinition(definitionPath: str):
+        """
+        Validates a single definition file and returns its ComponentType, without using the cache.
+        """
+        try:
+            with open(definitionPath, "r", encoding="utf-8") as definitionFile:
+                definition = json.load(definitionFile)
+        except json.JSONDecodeError as error:
+            raise ValueError(f"{definitionPath}: invalid JSON ({error})")
+        return ComponentLibrary.buildType(ComponentLibrary.compileDefinition(definitionPath, definition))
+
+    @staticmethod
+    def writeDefinition(definitionPath: str, definition: dict):
+        """
+        Writes a definition in the layout of the bundled files: one line per top-level value and one line per pin.
+        """
+        lines = ["{"]
+        for key, value in definition.items():
+            if key != "pins":
+                lines.append(f"    {json.dumps(key)}: {json.dumps(value)},")
+        lines.append("    \"pins\": {")
+        pinLines = [f"        {json.dumps(str(pinNumber))}: {json.dumps(pinDict)}" for pinNumber, pinDict in definition.get("pins", {}).items()]
+        if pinLines:
+            lines.append(",\n".join(pinLines))
+        lines.append("    }")
+        lines.append("}")
+        with open(definitionPath, "w", encoding="utf-8") as definitionFile:
+            definitionFile.write("\n".join(lines) + "\n")
+
+    @staticmethod
+    def _readCache(cachePath: str):
+        try:
+            with open(cachePath, "rb") as cacheFile:
+                data = cacheFile.read()
+        except OSError:
+            return {}
+        if len(data) < _CACHE_HEADER.size:
+            return {}
+        magic, version, marshalVersion, isLittleEndian = _CACHE_HEADER.unpack_from(data)
+        # the packed arrays are in native byte order, so a cache from another machine is not used
+        if magic != CACHE_MAGIC or version != CACHE_VERSION or marshalVersion != marshal.version or isLittleEndian != (sys.byteorder == "little"):
+            return {}
+        try:
+            records = marshal.loads(data[_CACHE_HEADER.size:])
+        except (EOFError, ValueError, TypeError):
+            return {}
+        return records if isinstance(records, dict) else {}
+
+    @staticmethod
+    def _writeCache(cachePath: str, records: dict):
+        temporaryPath = f"{cachePath}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(cachePath), exist_ok=True)
+            with open(temporaryPath, "wb") as cacheFile:
+                cacheFile.write(_CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, marshal.version, sys.byteorder == "little"))
+                cacheFile.write(marshal.dumps(records))
+            os.replace(temporaryPath, cachePath)
+        except OSError:
+            # a read-only library still loads, it is just compiled again next time
+            try:
+                os.remove(temporaryPath)
+            except OSError:
+                pass
+
+    @staticmethod
+    def loadDirectory(definitionDirectory: str = None, cachePath: str = None, useCache: bool = True):
+        """
+        Loads every component type defined in a directory.
+        Args:
+            definitionDirectory (str): The directory of *.json definitions. Defaults to the ComponentDefinitions directory.
+            cachePath (str): The compiled cache file. Defaults to __pycache__/componentLibrary.cache in the definition directory.
+            useCache (bool): Whether to read and write the compiled cache.
+        Returns:
+            dict: Type name to ComponentType.
+        """
+        if definitionDirectory is None:
+            definitionDirectory = ComponentLibrary.DEFAULT_DEFINITION_DIRECTORY
+        if cachePath is None:
+            cachePath = os.path.join(definitionDirectory, "__pycache__", CACHE_FILE_NAME)
+
+        definitionFiles = []
+        with os.scandir(definitionDirectory) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.lower().endswith(".json"):
+                    fileStat = entry.stat()
+                    definitionFiles.append((entry.name, fileStat.st_mtime_ns, fileStat.st_size))
+        definitionFiles.sort()
+
+        directoryKey = os.path.normcase(os.path.abspath(definitionDirectory))
+        loaded = ComponentLibrary._loadedDirectories.get(directoryKey)
+        if useCache and loaded is not None and loaded[0] == tuple(definitionFiles):
+            return loaded[1]
+
+        cachedRecords = ComponentLibrary._readCache(cachePath) if useCache else {}
+        records = {}
+        imageSignatures = {}
+        isCacheStale = len(cachedRecords) != len(definitionFiles)
+
+        def imageSignature(imagePath):
+            if imagePath not in imageSignatures:
+                try:
+                    imageStat = os.stat(imagePath)
+                    imageSignatures[imagePath] = (imageStat.st_mtime_ns, imageStat.st_size)
+                except OSError:
+                    imageSignatures[imagePath] = None
+            return imageSignatures[imagePath]
+
+        for fileName, mtime, size in definitionFiles:
+            cached = cachedRecords.get(fileName)
+            # a cached record is (definition mtime, definition size, image signature, compiled record)
+            if cached is not None and cached[0] == mtime and cached[1] == size and cached[2] == imageSignature(cached[3][1]):
+                records[fileName] = cached
+                continue
+            isCacheStale = True
+            definitionPath = os.path.join(definitionDirectory, fileName)
+            try:
+                with open(definitionPath, "r", encoding="utf-8") as definitionFile:
+                    definition = json.load(definitionFile)
+            except json.JSONDecodeError as error:
+                raise ValueError(f"{definitionPath}: invalid JSON ({error})")
+            record = ComponentLibrary.compileDefinition(definitionPath, definition)
+            records[fileName] = (mtime, size, imageSignature(record[1]), record)
+
+        componentTypes = {}
+        for fileName, (_, _, _, record) in records.items():
+            typeName = record[0]
+            if typeName in componentTypes:
+                raise ValueError(f"{os.path.join(definitionDirectory, fileName)}: component type \"{typeName}\" is already defined in {definitionDirectory}")
+            componentTypes[typeName] = ComponentLibrary.buildType(record)
+
+        if useCache:
+            if isCacheStale:
+                ComponentLibrary._writeCache(cachePath, records)
+            ComponentLibrary._loadedDirectories[directoryKey] = (tuple(definitionFiles), componentTypes)
+        return componentTypes
+
+    @staticmethod
+    def registerDirectory(definitionDirectory: str = None, cachePath: str = None):
+        """
+        Loads a definition directory and registers every type in it with the ComponentTypeRegistry.
+        Returns:
+            list: The names of the registered types.
+        """
+        componentTypes = ComponentLibrary.loadDirectory(definitionDirectory, cachePath)
+        for typeName, componentType in componentTypes.items():
+            # types that already have a class of their own, like the bundled LED, keep it
+            ComponentTypeRegistry.register(typeName, lambda componentType=componentType: componentType, ComponentTypeRegistry.getComponentClass(typeName) or LibraryComponent)
+        return list(componentTypes)
+
+    @staticmethod
+    def clear():
+        """
+        Forgets the directories loaded in this process. The cache files stay on disk.
+        """
+        ComponentLibrary._loadedDirectories.clear()
+
+
+class LibraryComponent(Component):
+    """
+    A component of any registered type, for types that are only defined by a definition file.
+    """
+    def __init__(self, name: str, typeName: str, pinDestinations: dict = None, controllerKey: int = 0):
+        """
+        Creates a new LibraryComponent object.
+        Args:
+            name (str): The name of the component.
+            typeName (str): The registered type, like one added by ComponentLibrary.registerDirectory().
+            pinDestinations (dict): Physical pin number to destination for the pins wired per component, like {1: 17} for a GPIO.
+            controllerKey (int): The controller the component is wired to.
+        """
+        componentType = ComponentTypeRegistry.getType(typeName)
+        self.imagePath = componentType.imagePath
+        self.Label = f"{name} {typeName}"
+        self.controllerKey = controllerKey
+        self.electricalValuesDict = dict(componentType.electricalValuesDict)
+
+        super().__init__(self.Label, self.imagePath, self.electricalValuesDict, None, isPowered=componentType.isPowered, controllerKey=controllerKey, componentType=componentType, pinDestinations=pinDestinations)
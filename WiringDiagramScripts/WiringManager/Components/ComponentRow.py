@@ -1,59 +1,274 @@
-import WiringDiagramScripts.WiringManager.Components.Component as Component
-import Components.Coordinates as Coordinates
+import heapq
+import math
+
+from Component import Component
 
 
 class ComponentRow:
     """
     Represent a row of components to be drawn in a wiring diagram using PIL through WiringManager.
 
-    This class is used to represent a row of components to be drawn in a wiring diagram using PIL through WiringManager. The components will be drawn in order from left to right. The row will create an arbitrary number of slots for components to be drawn in. The slots will be equidistant from each other (providing empty space in between) and will be drawn in order from left to right. The row will also have a label that will be drawn at the top of the row.
-    
+    The row has a fixed number of slots, indexed from 0, that each hold a component or nothing. The slots are laid out left to right, equidistant from each other, with empty space in between. When more slots are needed than fit across the row, the row wraps into several bands stacked inside its height, each band holding at most slotsPerBand slots.
+
+    Slots are looked up by index, and components by identity, in constant time. The box of a single slot is computed directly from its index, and getSlotBoxes() computes the boxes of the whole row in one pass.
     """
-    def __init__(self, label:str, topYCoordinate:int, topXCoordinate:int, widthOfImage: int,maxNumberOfComps:int, components:list[Component] =[]):
+    # a band never holds more slots than this, so the gaps between slots stay wide enough to route wires through
+    MAX_SLOTS_PER_BAND = 10
+    # the slot width used when none is given, as a fraction of the width of the image
+    DEFAULT_SLOT_WIDTH_FRACTION = 0.08
+
+    def __init__(self, label:str, topYCoordinate:int, topXCoordinate:int, widthOfImage: int,maxNumberOfComps:int, components:list[Component] =None, rowHeight: float = 0, slotWidth: float = None, minimumSpacing: float = 0, horizontalPadding: float = 20, verticalPadding: float = 10):
         """
         Creates a new ComponentRow object representing a row of components to be drawn.
-        
+
         Args:
-        
+
             label (str): The label of the component row.
             topYCoordinate (int): The y-coordinate of the top of the row.
-            topXCoordinate (int): The x-coordinate of the top of the row.
-            components (list): A list of Component objects representing the components in the row. These components will be drawn in order from left to right.
+            topXCoordinate (int): The x-coordinate of the left of the row.
+            widthOfImage (int): The width of the row.
+            maxNumberOfComps (int): The number of slots in the row.
+            components (list): A list of Component objects placed in the first slots, in order from left to right.
+            rowHeight (float): The height of the row, shared by all of its bands.
+            slotWidth (float): The width of a slot. Defaults to DEFAULT_SLOT_WIDTH_FRACTION of widthOfImage.
+            minimumSpacing (float): The smallest gap allowed between two slots; a band holds only as many slots as leave this gap.
+            horizontalPadding (float): The space kept free at the left and right of the row.
+            verticalPadding (float): The space kept free above and below the slots of each band.
         """
+        if maxNumberOfComps < 0:
+            raise ValueError(f"A component row cannot have {maxNumberOfComps} slots")
         self.label = label
         self.topYCoordinate = topYCoordinate
         self.topXCoordinate = topXCoordinate
-        self.components = components
         self.maxNumberOfComps = maxNumberOfComps
         self.widthOfImage = widthOfImage
+        self.rowHeight = rowHeight
+        self.slotWidth = slotWidth if slotWidth is not None else widthOfImage * ComponentRow.DEFAULT_SLOT_WIDTH_FRACTION
+        self.minimumSpacing = minimumSpacing
+        self.horizontalPadding = horizontalPadding
+        self.verticalPadding = verticalPadding
+
+        self.slots = [None] * maxNumberOfComps
+        # id(component) -> slot index, so membership and removal do not scan the slots
+        self._slotOfComponent = {}
+        # empty slots below _nextUnusedSlot, kept as a heap so addComponent fills the leftmost one
+        self._freeSlots = []
+        self._nextUnusedSlot = 0
+
+        for component in components or []:
+            self.addComponent(component)
+
+    @staticmethod
+    def fitSlotsPerBand(widthOfImage: float, slotWidth: float, minimumSpacing: float = 0, horizontalPadding: float = 20):
+        """
+        Returns the most slots one band of the given width holds while keeping minimumSpacing between them, capped at MAX_SLOTS_PER_BAND. At least one slot always fits.
+        """
+        # k slots need k * slotWidth + (k + 1) * minimumSpacing + 2 * horizontalPadding of width
+        fittingSlots = math.floor((widthOfImage - 2 * horizontalPadding - minimumSpacing) / (slotWidth + minimumSpacing)) if slotWidth + minimumSpacing > 0 else ComponentRow.MAX_SLOTS_PER_BAND
+        return max(1, min(ComponentRow.MAX_SLOTS_PER_BAND, fittingSlots))
+
+    @staticmethod
+    def countBands(numberOfSlots: int, slotsPerBand: int):
+        """
+        Returns the number of bands numberOfSlots slots wrap into.
+        """
+        return max(1, -(-numberOfSlots // slotsPerBand))
+
+    @property
+    def slotsPerBand(self):
+        return min(max(1, self.maxNumberOfComps), ComponentRow.fitSlotsPerBand(self.widthOfImage, self.slotWidth, self.minimumSpacing, self.horizontalPadding))
 
-    # must be able to determine the width of a component's image based on the number of components in the row and the width of the row
+    @property
+    def numberOfBands(self):
+        return ComponentRow.countBands(self.maxNumberOfComps, self.slotsPerBand)
 
-    # must be able to determine the x-coordinate of the center of the component based on the number of components in the row and the width of the row
+    @property
+    def bandHeight(self):
+        return self.rowHeight / self.numberOfBands
 
-    # must be able to determine the y-coordinate of the center of the component based on the number of components in the row and the width of the row
+    def getSlotBoxes(self):
+        """
+        Returns the (topLeft, bottomRight) box of every slot, in slot order.
 
-    # must be able to determine the amount of "white" space between components based on the number of components in the row and the width of the row
+        Each full band spreads slotsPerBand slots evenly across the row; the last band spreads however many slots are left over the same way.
+        """
+        slotsPerBand = self.slotsPerBand
+        bandHeight = self.bandHeight
+        slotWidth = self.slotWidth
+        boxes = []
+        for band in range(self.numberOfBands):
+            numberOfSlotsInBand = min(slotsPerBand, self.maxNumberOfComps - band * slotsPerBand)
+            spacing = (self.widthOfImage - slotWidth * numberOfSlotsInBand - 2 * self.horizontalPadding) / (numberOfSlotsInBand + 1)
+            bandTop = self.topYCoordinate + band * bandHeight
+            for i in range(numberOfSlotsInBand):
+                topLeft = (self.topXCoordinate + self.horizontalPadding + spacing * (i + 1) + i * slotWidth, bandTop + self.verticalPadding)
+                bottomRight = (topLeft[0] + slotWidth, bandTop + bandHeight - self.verticalPadding)
+                boxes.append((topLeft, bottomRight))
+        return boxes
 
-    # must override the __str__ method to return a string representation of the ComponentRow object
+    def getSlotBox(self, index: int):
+        """
+        Returns the (topLeft, bottomRight) box of a slot.
+        """
+        band, i = divmod(self._checkIndex(index), self.slotsPerBand)
+        bandHeight = self.bandHeight
+        bandTop = self.topYCoordinate + band * bandHeight
+        topLeft = (self.topXCoordinate + self.horizontalPadding + self.getSpacing(band) * (i + 1) + i * self.slotWidth, bandTop + self.verticalPadding)
+        return (topLeft, (topLeft[0] + self.slotWidth, bandTop + bandHeight - self.verticalPadding))
 
-    # must override the __repr__ method to return a string representation of the ComponentRow object that can be used to recreate the object
+    def getComponentWidth(self):
+        """
+        Returns the width a component's image is drawn at.
+        """
+        return self.slotWidth
 
-    # must ovveride the __getitem__ method to return the component at the specified index
+    def getComponentHeight(self):
+        """
+        Returns the height a component's image is drawn at.
+        """
+        return self.bandHeight - 2 * self.verticalPadding
 
-    # must override the __setitem__ method to set the component at the specified index
+    def getCenterX(self, index: int):
+        topLeft, bottomRight = self.getSlotBox(index)
+        return (topLeft[0] + bottomRight[0]) / 2
 
-    # must override the __delitem__ method to delete the component at the specified index
+    def getCenterY(self, index: int):
+        topLeft, bottomRight = self.getSlotBox(index)
+        return (topLeft[1] + bottomRight[1]) / 2
 
-    # must override the __len__ method to return the number of components in the row, not the number of slots
+    def getSpacing(self, band: int = 0):
+        """
+        Returns the width of the white space between two neighbouring slots of a band.
+        """
+        numberOfSlotsInBand = min(self.slotsPerBand, self.maxNumberOfComps - band * self.slotsPerBand)
+        return (self.widthOfImage - self.slotWidth * numberOfSlotsInBand - 2 * self.horizontalPadding) / (numberOfSlotsInBand + 1)
+
+    def _checkIndex(self, index: int):
+        if not isinstance(index, int):
+            raise TypeError(f"Slot indices must be integers, not {type(index).__name__}")
+        if index < 0:
+            index += self.maxNumberOfComps
+        if not 0 <= index < self.maxNumberOfComps:
+            raise IndexError(f"Slot {index} is out of range for the {self.maxNumberOfComps} slots of {self.label}")
+        return index
+
+    def isFull(self):
+        return len(self._slotOfComponent) == self.maxNumberOfComps
+
+    def addComponent(self, component: Component):
+        """
+        Places a component in the leftmost empty slot.
+        Returns:
+            int: The index of the slot the component was placed in.
+        Raises:
+            ValueError: If the row is full or the component is already in it.
+        """
+        if self.isFull():
+            raise ValueError(f"{self.label} is full; it has {self.maxNumberOfComps} slots")
+        # slots filled through __setitem__ stay in the heap and are skipped here
+        while self._freeSlots and self.slots[self._freeSlots[0]] is not None:
+            heapq.heappop(self._freeSlots)
+        if self._freeSlots:
+            index = heapq.heappop(self._freeSlots)
+        else:
+            index = self._nextUnusedSlot
+            self._nextUnusedSlot += 1
+        self._place(index, component)
+        return index
+
+    def removeComponent(self, componentOrIndex):
+        """
+        Empties the slot of a component, given either the component or its slot index.
+        Returns:
+            Component: The removed component.
+        Raises:
+            ValueError: If the row is empty, the slot is empty or the component is not in the row.
+            IndexError: If the index is out of range.
+        """
+        if not self._slotOfComponent:
+            raise ValueError(f"{self.label} is empty")
+        if isinstance(componentOrIndex, int):
+            index = self._checkIndex(componentOrIndex)
+            if self.slots[index] is None:
+                raise ValueError(f"Slot {index} of {self.label} is empty")
+        else:
+            index = self._slotOfComponent.get(id(componentOrIndex))
+            if index is None:
+                raise ValueError(f"The component {componentOrIndex} is not in {self.label}")
+        component = self.slots[index]
+        self._empty(index)
+        return component
+
+    def indexOf(self, component: Component):
+        """
+        Returns the slot index of a component.
+        Raises:
+            ValueError: If the component is not in the row.
+        """
+        index = self._slotOfComponent.get(id(component))
+        if index is None:
+            raise ValueError(f"The component {component} is not in {self.label}")
+        return index
+
+    def _place(self, index: int, component: Component):
+        if not isinstance(component, Component):
+            raise ValueError(f"The component {component} must be an instance of the Component class.")
+        if id(component) in self._slotOfComponent:
+            raise ValueError(f"The component {component} is already in {self.label}")
+        self.slots[index] = component
+        self._slotOfComponent[id(component)] = index
+
+    def _empty(self, index: int):
+        del self._slotOfComponent[id(self.slots[index])]
+        self.slots[index] = None
+        if index < self._nextUnusedSlot:
+            heapq.heappush(self._freeSlots, index)
+
+    def __getitem__(self, index: int):
+        """
+        Returns the component in a slot, or None if the slot is empty.
+        """
+        return self.slots[self._checkIndex(index)]
+
+    def __setitem__(self, index: int, component: Component):
+        """
+        Places a component in a slot, replacing whatever was there.
+        """
+        index = self._checkIndex(index)
+        if self.slots[index] is component:
+            return
+        if self.slots[index] is not None:
+            self._empty(index)
+        self._place(index, component)
+        if index >= self._nextUnusedSlot:
+            # the slots skipped over become free slots
+            for skippedIndex in range(self._nextUnusedSlot, index):
+                heapq.heappush(self._freeSlots, skippedIndex)
+            self._nextUnusedSlot = index + 1
+
+    def __delitem__(self, index: int):
+        index = self._checkIndex(index)
+        if self.slots[index] is None:
+            raise ValueError(f"Slot {index} of {self.label} is empty")
+        self._empty(index)
+
+    def __len__(self):
+        """
+        Returns the number of components in the row, not the number of slots.
+        """
+        return len(self._slotOfComponent)
 
-    # must override the __iter__ method to iterate over the components in the row
+    def __iter__(self):
+        return (component for component in self.slots if component is not None)
 
-    # must override the __reversed__ method to iterate over the components in the row in reverse order  
-    
-    # must be able to add a component to the row, throwing an exception if the row is full
+    def __reversed__(self):
+        return (component for component in reversed(self.slots) if component is not None)
 
-    # must be able to remove a component from the row, throwing an exception if the row is empty, key is out of range, or the component is not in the row
+    def __contains__(self, component):
+        return id(component) in self._slotOfComponent
 
-    # must override the __contains__ method to return True if the component is in the row, False otherwise
+    def __str__(self):
+        return f"{self.label}: {len(self)} of {self.maxNumberOfComps} slots filled in {self.numberOfBands} band(s)"
 
+    def __repr__(self):
+        return f"ComponentRow({self.label!r}, {self.topYCoordinate!r}, {self.topXCoordinate!r}, {self.widthOfImage!r}, {self.maxNumberOfComps!r}, {list(self)!r}, rowHeight={self.rowHeight!r}, slotWidth={self.slotWidth!r}, minimumSpacing={self.minimumSpacing!r}, horizontalPadding={self.horizontalPadding!r}, verticalPadding={self.verticalPadding!r})"
@@ -0,0 +1,118 @@
+from AssetCache import AssetCache
+from PinTable import PinTable
+
+
+class ComponentType:
+    """
+    The data every component of one type shares: its image, electrical values and pin table.
+
+    A ComponentType is built once per process by the ComponentTypeRegistry and is read-only afterwards. Component instances keep a reference to it and only store what differs between them, their placement and pin destinations.
+    """
+    def __init__(self, typeName: str, imagePath: str, electricalValuesDict: dict, pinLMRMCoordinates: dict, isPowered: bool = False, pinTable: PinTable = None, imageSize: tuple = None):
+        """
+        Creates a new ComponentType object.
+        Args:
+            typeName (str): The name the type is registered under.
+            imagePath (str): The path to the image file of the component.
+            electricalValuesDict (dict): A dictionary of electrical measurements and their rated values.
+            pinLMRMCoordinates (dict): The pins in the format described by Component.__init__, in the coordinates of the image.
+            isPowered (bool): Whether the component is powered from something other than a GPIO pin.
+            pinTable (PinTable): An already built pin table, used instead of pinLMRMCoordinates.
+            imageSize (tuple): The size of the image, if it is already known; otherwise the image is loaded to find it.
+        """
+        self.typeName = typeName
+        self.imagePath = imagePath
+        self.electricalValuesDict = electricalValuesDict
+        self.isPowered = isPowered
+        self.pinTable = pinTable if pinTable is not None else PinTable.fromPinDict(pinLMRMCoordinates)
+        self.imageSize = tuple(imageSize) if imageSize is not None else AssetCache.getImageSize(imagePath)
+
+        # usage -> physical pin numbers with that usage, in pin order
+        self.pinsByUsage = {}
+        for row, pinNumber in enumerate(self.pinTable.pinNumbers):
+            self.pinsByUsage.setdefault(self.pinTable.getUsage(row), []).append(pinNumber)
+
+    def __repr__(self):
+        return f"ComponentType({self.typeName!r}, {len(self.pinTable)} pins)"
+
+    def getPinsByUsage(self, usage):
+        """
+        Returns the physical pin numbers with the given usage, like every ground pin of a header.
+        """
+        return self.pinsByUsage.get(usage, [])
+
+    def createPinTable(self, pinDestinations: dict = None):
+        """
+        Returns a pin table for one component of this type.
+        Args:
+            pinDestinations (dict): Physical pin number to destination for the pins that differ per component, like the GPIO a signal pin is wired to.
+        """
+        return self.pinTable.withDestinations(pinDestinations)
+
+
+class ComponentTypeRegistry:
+    """
+    Process-wide registry of component types.
+
+    Each component module registers a builder for its type. The type is built the first time a component of it is created and shared by every later one, so creating a component no longer rebuilds its pin dictionary or reopens its image.
+    """
+    _builders = {}
+    _types = {}
+    _componentClasses = {}
+
+    @staticmethod
+    def register(typeName: str, builder, componentClass=None):
+        """
+        Registers the builder of a component type.
+        Args:
+            typeName (str): The name of the type.
+            builder (callable): Called without arguments; returns the ComponentType.
+            componentClass (type): The Component subclass components of this type are created as, used to rebuild them, see DiagramSnapshot.
+        """
+        ComponentTypeRegistry._builders[typeName] = builder
+        ComponentTypeRegistry._types.pop(typeName, None)
+        ComponentTypeRegistry._componentClasses[typeName] = componentClass
+
+    @staticmethod
+    def getComponentClass(typeName: str):
+        """
+        Returns the Component subclass registered for a type, or None if the type was registered without one.
+        """
+        return ComponentTypeRegistry._componentClasses.get(typeName)
+
+    @staticmethod
+    def getType(typeName: str):
+        """
+        Returns the shared ComponentType, building it on first use.
+        """
+        componentType = ComponentTypeRegistry._types.get(typeName)
+        if componentType is None:
+            builder = ComponentTypeRegistry._builders.get(typeName)
+            if builder is None:
+                raise ValueError(f"Unknown component type \"{typeName}\"")
+            componentType = builder()
+            ComponentTypeRegistry._types[typeName] = componentType
+        return componentType
+
+    @staticmethod
+    def getTypeNames():
+        return list(ComponentTypeRegistry._builders)
+
+    @staticmethod
+    def isBuilt(typeName: str):
+        return typeName in ComponentTypeRegistry._types
+
+    @staticmethod
+    def buildAll():
+        """
+        Builds every registered type, so worker processes forked afterwards share them.
+        """
+        for typeName in ComponentTypeRegistry._builders:
+            ComponentTypeRegistry.getType(typeName)
+
+    @staticmethod
+    def clear():
+        """
+        Drops the built types. The builders stay registered.
+        """
+        ComponentTypeRegistry._types.clear()
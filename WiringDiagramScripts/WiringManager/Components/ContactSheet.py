@@ -0,0 +1,210 @@
+"""
+Renders many small diagrams into the cells of one contact sheet image, such as the overview page of an exhibit catalogue.
+
+The sheet lives in a block of shared memory, 3 bytes per pixel, that every worker of a RenderWorkerPool writes its cells into directly: a worker renders one circuit, shrinks the canvas to fit its cell and copies the rows of the cell into place, so no more than one full-size diagram per worker is ever held. The finished sheet is then encoded straight out of the shared memory. PNG sheets are compressed and written a row at a time; other formats are handed to Pillow as one image of the sheet.
+"""
+
+import math
+import multiprocessing
+import os
+import struct
+import zlib
+from multiprocessing import shared_memory
+
+from PIL import Image, ImageColor
+
+from DiagramPipeline import CircuitSpec, DiagramPipeline
+from RenderWorkerPool import RenderWorkerPool
+
+
+def getContactSheetLayout(circuitSpecs: list[CircuitSpec], columns: int = None, cellWidth: int = 600, gutter: int = 20):
+    """
+    Lays the cells of a contact sheet out in rows, in the order of the specs.
+    Args:
+        circuitSpecs (list): The circuits, one per cell.
+        columns (int): The number of cells side by side. Defaults to the smallest square grid that fits every cell.
+        cellWidth (int): The width of a cell in pixels. Every cell is as tall as the tallest diagram needs at that width.
+        gutter (int): The space, in pixels, between the cells and around the edge of the sheet.
+    Returns:
+        tuple: The (width, height) of the sheet and the (left, top, right, bottom) box of every cell.
+    """
+    if not circuitSpecs:
+        raise ValueError("A contact sheet needs at least one circuit")
+    if columns is None:
+        columns = math.ceil(math.sqrt(len(circuitSpecs)))
+    if columns < 1 or cellWidth < 1 or gutter < 0:
+        raise ValueError(f"A contact sheet needs at least one column of cells at least one pixel wide, not {columns} column(s) of {cellWidth} pixels with a {gutter} pixel gutter")
+    cellHeight = max(math.ceil(cellWidth * yResolution / xResolution) for xResolution, yResolution in (circuitSpec.getResolution() for circuitSpec in circuitSpecs))
+    rows = -(-len(circuitSpecs) // columns)
+    cellBoxes = []
+    for index in range(len(circuitSpecs)):
+        left = gutter + (index % columns) * (cellWidth + gutter)
+        top = gutter + (index // columns) * (cellHeight + gutter)
+        cellBoxes.append((left, top, left + cellWidth, top + cellHeight))
+    return (gutter + columns * (cellWidth + gutter), gutter + rows * (cellHeight + gutter)), cellBoxes
+
+
+def _fitIntoCell(image: Image.Image, cellBox: tuple[int, int, int, int]):
+    """
+    Shrinks an image to fit a cell, keeping its aspect ratio, and returns it with the position that centres it in the cell. Images that already fit are not enlarged.
+    """
+    cellWidth, cellHeight = cellBox[2] - cellBox[0], cellBox[3] - cellBox[1]
+    scale = min(1, cellWidth / image.width, cellHeight / image.height)
+    if scale < 1:
+        # reducing_gap shrinks by whole factors with Image.reduce first, so only the last step is resampled
+        image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.Resampling.LANCZOS, reducing_gap=3.0)
+    return image, (cellBox[0] + (cellWidth - image.width) // 2, cellBox[1] + (cellHeight - image.height) // 2)
+
+
+def _copyIntoSheet(sheetBuffer, sheetWidth: int, image: Image.Image, position: tuple[int, int]):
+    """
+    Copies the rows of an RGB image into an RGB sheet buffer with its top left corner at position.
+    """
+    rowBytes = image.width * 3
+    pixels = memoryview(image.tobytes())
+    for row in range(image.height):
+        start = ((position[1] + row) * sheetWidth + position[0]) * 3
+        sheetBuffer[start:start + rowBytes] = pixels[row * rowBytes:(row + 1) * rowBytes]
+
+
+def _renderCell(circuitSpec: CircuitSpec, sheetName: str, sheetSize: tuple[int, int], cellBox: tuple[int, int, int, int]):
+    """
+    Renders one circuit and writes it into its cell of the shared sheet.
+    Returns:
+        tuple: The (left, top, right, bottom) box the diagram was drawn in.
+    """
+    pipeline = DiagramPipeline(circuitSpec)
+    for stageName in pipeline.getRemainingStages():
+        if stageName != "encode":
+            pipeline.runStage(stageName)
+    cell, position = _fitIntoCell(pipeline.diagram.wiringDiagram.convert("RGB"), cellBox)
+    # the full-size canvas is not needed once the cell is made
+    pipeline = None
+
+    sharedSheet = shared_memory.SharedMemory(name=sheetName)
+    try:
+        _copyIntoSheet(sharedSheet.buf, sheetSize[0], cell, position)
+    finally:
+        sharedSheet.close()
+    return (position[0], position[1], position[0] + cell.width, position[1] + cell.height)
+
+
+def _writePNGChunk(pngFile, chunkType: bytes, data: bytes):
+    pngFile.write(struct.pack(">I", len(data)))
+    pngFile.write(chunkType)
+    pngFile.write(data)
+    pngFile.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(chunkType))))
+
+
+def _streamPNG(sheetBuffer, sheetSize: tuple[int, int], pngFile, chunkSize: int = 1 << 20):
+    """
+    Writes an RGB sheet buffer as a PNG file, compressing it a row at a time, so the encoder never holds more than about chunkSize bytes of it.
+    """
+    width, height = sheetSize
+    rowBytes = width * 3
+    pngFile.write(b"\x89PNG\r\n\x1a\n")
+    # 8 bits per channel, truecolour, no interlacing
+    _writePNGChunk(pngFile, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+    compressor = zlib.compressobj(6)
+    pending = []
+    pendingBytes = 0
+    for row in range(height):
+        # every row starts with its filter type; 0 leaves the row unfiltered
+        for data in (compressor.compress(b"\x00"), compressor.compress(sheetBuffer[row * rowBytes:(row + 1) * rowBytes])):
+            if data:
+                pending.append(data)
+                pendingBytes += len(data)
+        if pendingBytes >= chunkSize:
+            _writePNGChunk(pngFile, b"IDAT", b"".join(pending))
+            pending, pendingBytes = [], 0
+    pending.append(compressor.flush())
+    _writePNGChunk(pngFile, b"IDAT", b"".join(pending))
+    _writePNGChunk(pngFile, b"IEND", b"")
+
+
+def writeSheet(sheetBuffer, sheetSize: tuple[int, int], outputPath: str):
+    """
+    Encodes an RGB sheet buffer into an image file. A .png file is streamed out of the buffer; any other format Pillow can write is saved from one image of the sheet.
+    Args:
+        sheetBuffer: The pixels of the sheet, 3 bytes each, row by row.
+        sheetSize (tuple): The (width, height) of the sheet.
+        outputPath (str): The image file to write.
+    """
+    # written next to the output and moved over it at the end, so a failed run never leaves half an image
+    temporaryPath = f"{outputPath}.{os.getpid()}.tmp"
+    try:
+        if os.path.splitext(outputPath)[1].lower() == ".png":
+            with open(temporaryPath, "wb") as pngFile:
+                _streamPNG(sheetBuffer, sheetSize, pngFile)
+        else:
+            sheet = Image.frombuffer("RGB", sheetSize, sheetBuffer, "raw", "RGB", 0, 1)
+            sheet.save(temporaryPath, format=Image.registered_extensions().get(os.path.splitext(outputPath)[1].lower()))
+            sheet.close()
+        os.replace(temporaryPath, outputPath)
+    finally:
+        if os.path.exists(temporaryPath):
+            os.remove(temporaryPath)
+
+
+def renderContactSheet(circuitSpecs: list[CircuitSpec], outputPath: str, columns: int = None, cellWidth: int = 600, gutter: int = 20, background="white", numberOfWorkers: int = None, pool: RenderWorkerPool = None):
+    """
+    Renders every circuit into its own cell of one sheet image, rendering the circuits in parallel.
+    Args:
+        circuitSpecs (list): The circuits, one per cell, filling the rows of the sheet from the left.
+        outputPath (str): The image file to write. PNG is streamed; other formats are saved from one image of the sheet.
+        columns (int): The number of cells side by side, see getContactSheetLayout.
+        cellWidth (int): The width of a cell in pixels.
+        gutter (int): The space, in pixels, between the cells and around the edge of the sheet.
+        background: The colour of the sheet around the diagrams.
+        numberOfWorkers (int): The number of worker processes. Defaults to the number of CPUs, or the number of circuits if that is fewer; 1 renders in this process.
+        pool (RenderWorkerPool): A pool that is already running, used instead of starting one.
+    Returns:
+        list: The (left, top, right, bottom) box of the sheet every diagram was drawn in, in the order of the specs.
+    """
+    if os.path.splitext(outputPath)[1].lower() not in Image.registered_extensions():
+        raise ValueError(f"Unknown contact sheet output format for {outputPath}")
+    sheetSize, cellBoxes = getContactSheetLayout(circuitSpecs, columns, cellWidth, gutter)
+    rowBytes = sheetSize[0] * 3
+
+    sharedSheet = shared_memory.SharedMemory(create=True, size=rowBytes * sheetSize[1])
+    try:
+        backgroundRow = bytes(ImageColor.getrgb(background)[:3]) * sheetSize[0]
+        for row in range(sheetSize[1]):
+            sharedSheet.buf[row * rowBytes:(row + 1) * rowBytes] = backgroundRow
+
+        jobs = [(circuitSpec, sharedSheet.name, sheetSize, cellBox) for circuitSpec, cellBox in zip(circuitSpecs, cellBoxes)]
+        if pool is not None:
+            drawnBoxes = pool.starmap(_renderCell, jobs)
+        else:
+            if numberOfWorkers is None:
+                numberOfWorkers = min(os.cpu_count() or 1, len(jobs))
+            # the workers of a RenderWorkerPool are daemons, which cannot start processes of their own
+            if numberOfWorkers <= 1 or multiprocessing.current_process().daemon:
+                drawnBoxes = [_renderCell(*job) for job in jobs]
+            else:
+                with RenderWorkerPool(numberOfWorkers) as workerPool:
+                    drawnBoxes = workerPool.starmap(_renderCell, jobs)
+
+        writeSheet(sharedSheet.buf, sheetSize, outputPath)
+    finally:
+        sharedSheet.close()
+        sharedSheet.unlink()
+    return drawnBoxes
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    multiprocessing.freeze_support()
+    outputPath = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), "diagramTest", "contactSheet.png")
+    numberOfCircuits = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    gpioPins = [3, 5, 7, 8, 10, 11, 12, 13, 15, 16, 18, 19, 21, 22, 23, 24, 26, 29, 31, 32, 33, 35, 36, 37, 38, 40]
+    circuitSpecs = [CircuitSpec(f"Exhibit {index + 1}", "Benchmarks",
+                                [("Button", gpioPins[pin]) for pin in range(index % 4 + 1)],
+                                [("LED", gpioPins[12 + pin]) for pin in range(index % 3 + 1)])
+                    for index in range(numberOfCircuits)]
+    os.makedirs(os.path.dirname(os.path.abspath(outputPath)), exist_ok=True)
+    startTime = time.perf_counter()
+    drawnBoxes = renderContactSheet(circuitSpecs, outputPath)
+    print(f"Rendered {len(drawnBoxes)} diagrams into {outputPath} in {time.perf_counter() - startTime:.2f} s")
@@ -0,0 +1,133 @@
+from Component import Component
+from Utilities.PinEnum import PinEnum
+
+
+class ControllerPinAllocator:
+    """
+    Assigns a controller's power and ground pins to the component pins wired to them.
+
+    Component pins only say they need ground, 3.3V or 5V; the controller usually has several pins for each. Every request is matched to the nearest free controller pin of the right usage, so power nets spread over the whole header instead of all meeting at one pin. When every pin of a usage is taken, further requests share the nearest pin with the fewest wires.
+    """
+    # the controller pin usage that each power or ground destination is wired to
+    USAGE_OF_DESTINATION = {
+        PinEnum.GROUND: "Ground",
+        PinEnum.V3_3: "3.3V Power",
+        PinEnum.V5: "5V Power",
+    }
+
+    def __init__(self, controller: Component):
+        """
+        Creates a new ControllerPinAllocator object. The controller must already be placed on the canvas.
+        Args:
+            controller (Component): The controller whose pins are handed out.
+        """
+        self.controller = controller
+        controllerPins = controller.pinLMRMCoordinates
+
+        # destination -> every controller pin that can serve it, and those still free
+        self.candidatePins = ControllerPinAllocator.getCandidatePins(controller)
+        self.freePins = {destination: set(pins) for destination, pins in self.candidatePins.items()}
+
+        self.pinCenters = {}
+        for pins in self.candidatePins.values():
+            for pinNumber in pins:
+                center = Component._determinePinCenter(controllerPins[pinNumber]["LM"], controllerPins[pinNumber]["RM"])
+                self.pinCenters[pinNumber] = (center.x, center.y)
+
+        self.wireCounts = {pinNumber: 0 for pinNumber in self.pinCenters}
+        # (id(component), destination) -> (component, controller pin)
+        self.assignments = {}
+
+    @staticmethod
+    def getCandidatePins(controller: Component):
+        """
+        Returns every controller pin each power or ground destination can be wired to.
+        Args:
+            controller (Component): The controller.
+        Returns:
+            dict: PinEnum destination -> list of controller pin numbers, in pin order.
+        """
+        candidatePins = {}
+        for destination, usage in ControllerPinAllocator.USAGE_OF_DESTINATION.items():
+            if controller.componentType is not None:
+                candidatePins[destination] = list(controller.componentType.getPinsByUsage(usage))
+            else:
+                candidatePins[destination] = [pinNumber for pinNumber, pinDict in controller.pinLMRMCoordinates.items() if pinDict["Usage"] == usage]
+        return candidatePins
+
+    def _distance(self, componentPinCenter, controllerPin):
+        # wires are routed in horizontal and vertical segments, so the Manhattan distance is what a wire costs
+        x, y = self.pinCenters[controllerPin]
+        return abs(componentPinCenter[0] - x) + abs(componentPinCenter[1] - y)
+
+    def allocate(self, components):
+        """
+        Assigns controller pins to every power and ground pin of the components that does not have one yet.
+
+        All requests are matched together: every (request, free pin) pair is sorted by distance once, and pairs are taken shortest first while both the request and the pin are still open.
+        Args:
+            components: The components to assign pins to.
+        """
+        requests = []
+        for component in components:
+            for pinDict in component.pinLMRMCoordinates.values():
+                destination = pinDict.get("PinDestination")
+                if destination not in ControllerPinAllocator.USAGE_OF_DESTINATION or (id(component), destination) in self.assignments:
+                    continue
+                center = Component._determinePinCenter(pinDict["LM"], pinDict["RM"])
+                requests.append((component, destination, (center.x, center.y)))
+
+        pairs = []
+        for requestIndex, (component, destination, center) in enumerate(requests):
+            for controllerPin in self.freePins[destination]:
+                pairs.append((self._distance(center, controllerPin), requestIndex, controllerPin))
+        pairs.sort()
+
+        isAssigned = [False] * len(requests)
+        for _, requestIndex, controllerPin in pairs:
+            component, destination, _ = requests[requestIndex]
+            if isAssigned[requestIndex] or controllerPin not in self.freePins[destination]:
+                continue
+            self._assign(component, destination, controllerPin)
+            isAssigned[requestIndex] = True
+
+        for requestIndex, (component, destination, center) in enumerate(requests):
+            if isAssigned[requestIndex]:
+                continue
+            if not self.candidatePins[destination]:
+                raise ValueError(f"{self.controller.Label} has no pin for {destination}")
+            controllerPin = min(self.candidatePins[destination], key=lambda pin: (self.wireCounts[pin], self._distance(center, pin)))
+            self._assign(component, destination, controllerPin)
+
+    def _assign(self, component, destination, controllerPin):
+        self.assignments[(id(component), destination)] = (component, controllerPin)
+        self.freePins[destination].discard(controllerPin)
+        self.wireCounts[controllerPin] += 1
+
+    def release(self, component):
+        """
+        Frees the controller pins assigned to a component, like one that is removed from the diagram.
+        """
+        for key in [key for key in self.assignments if key[0] == id(component)]:
+            _, controllerPin = self.assignments.pop(key)
+            self.wireCounts[controllerPin] -= 1
+            if self.wireCounts[controllerPin] == 0:
+                self.freePins[key[1]].add(controllerPin)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # assignments are keyed by id(component), which does not survive pickling, so they travel as (component, destination, pin)
+        state["assignments"] = [(component, key[1], controllerPin) for key, (component, controllerPin) in self.assignments.items()]
+        return state
+
+    def __setstate__(self, state):
+        assignments = state.pop("assignments")
+        self.__dict__.update(state)
+        self.assignments = {(id(component), destination): (component, controllerPin) for component, destination, controllerPin in assignments}
+
+    def getControllerPin(self, component, destination):
+        """
+        Returns the controller pin assigned to a component's power or ground destination, or None.
+        """
+        assignment = self.assignments.get((id(component), destination))
+        return assignment[1] if assignment is not None else None
@@ -194,4 +194,43 @@ class Coordinates:
         return Coordinates(math.floor(self.x), math.floor(self.y))
     def __ceil__(self):
         return Coordinates(math.ceil(self.x), math.ceil(self.y))
-    
\ No newline at end of file
+    
+
+class Point:
+    """
+    A small, immutable point for hot paths that create many points, like rasterizing a line pixel by pixel.
+
+    Unlike Coordinates, a Point has no label and no per-instance __dict__. It compares and hashes equal to a Coordinates object at the same position.
+    """
+    __slots__ = ("x", "y")
+
+    def __init__(self, x: int | float, y: int | float):
+        object.__setattr__(self, "x", x)
+        object.__setattr__(self, "y", y)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Point objects are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Point objects are immutable")
+
+    def returnCoordinatesTuple(self):
+        """
+        Returns the point's coordinates within a tuple.
+        """
+        return (self.x, self.y)
+
+    def __eq__(self, other):
+        return self.x == other.x and self.y == other.y
+
+    def __ne__(self, other):
+        return self.x != other.x or self.y != other.y
+
+    def __hash__(self):
+        return hash((self.x, self.y))
+
+    def __repr__(self):
+        return f"Point({self.x}, {self.y})"
+
+    def __reduce__(self):
+        return (Point, (self.x, self.y))
@@ -0,0 +1,281 @@
+from BaseWiringDiagram import BaseWiringDiagram
+from DiagramPipeline import CircuitSpec, DiagramPipeline
+from DisplayList import mergeBoxes
+from Utilities.PinEnum import PinEnum
+
+
+class SlotChange:
+    """
+    A component slot whose contents differ between two circuits.
+    """
+    ADDED = "added"
+    REMOVED = "removed"
+    TYPE_CHANGED = "type changed"
+    GPIO_CHANGED = "gpio changed"
+
+    def __init__(self, row: str, slotKey: int, kind: str, oldEntry, newEntry):
+        """
+        Creates a new SlotChange object.
+        Args:
+            row (str): "input" or "output".
+            slotKey (int): The slot in the row.
+            kind (str): One of the SlotChange kinds.
+            oldEntry: What the slot held before, or None.
+            newEntry: What the slot holds now, or None.
+        """
+        self.row = row
+        self.slotKey = slotKey
+        self.kind = kind
+        self.oldEntry = oldEntry
+        self.newEntry = newEntry
+
+    def __repr__(self):
+        return f"SlotChange({self.row!r}, {self.slotKey}, {self.kind!r}, {self.oldEntry} -> {self.newEntry})"
+
+
+class CircuitDiff:
+    """
+    The differences between two circuits at the level of components, slots and nets.
+    """
+    def __init__(self):
+        self.fullRenderReasons = []
+        self.slotChanges = []
+        # (row, slot key, old destination, new destination) for every net whose route changes
+        self.netChanges = []
+        # filled in when the diff is applied to a diagram
+        self.changedRegions = []
+
+    def requiresFullRender(self):
+        """
+        Returns True if the change moves the layout, so nothing can be reused.
+        """
+        return len(self.fullRenderReasons) > 0
+
+    def isEmpty(self):
+        return not self.fullRenderReasons and not self.slotChanges and not self.netChanges
+
+    def report(self):
+        """
+        Returns a human readable summary of the changes and the canvas regions they repainted, for reviewers.
+        """
+        if self.isEmpty():
+            return "No changes."
+        lines = []
+        for reason in self.fullRenderReasons:
+            lines.append(f"Full render: {reason}")
+        for change in self.slotChanges:
+            lines.append(f"{change.row.capitalize()} slot {change.slotKey}: {change.kind} ({change.oldEntry} -> {change.newEntry})")
+        for row, slotKey, oldDestination, newDestination in self.netChanges:
+            lines.append(f"Net of {row} slot {slotKey} rerouted: controller pin {oldDestination} -> {newDestination}")
+        for left, top, right, bottom in self.changedRegions:
+            lines.append(f"Repainted region ({left}, {top}) to ({right}, {bottom}), {right - left}x{bottom - top} pixels")
+        return "\n".join(lines)
+
+
+def diffCircuitSpecs(oldSpec: CircuitSpec, newSpec: CircuitSpec):
+    """
+    Compares two circuit specs.
+    Args:
+        oldSpec (CircuitSpec): The circuit that has been rendered.
+        newSpec (CircuitSpec): The circuit to render.
+    Returns:
+        CircuitDiff: The differences between them.
+    """
+    diff = CircuitDiff()
+    # a resolution left as None is sized to the content, so a new component type can resize the canvas and move every slot
+    oldResolution, newResolution = oldSpec.getResolution(), newSpec.getResolution()
+    if oldResolution != newResolution:
+        diff.fullRenderReasons.append(f"the canvas changed from {oldResolution[0]}x{oldResolution[1]} to {newResolution[0]}x{newResolution[1]} pixels")
+    for attribute in ("title", "author", "titleFontSize", "inputRotationAngle", "outputRotationAngle", "placement", "numberOfControllers", "controllerColumns", "sheetConnectors", "netLabels", "supersampling"):
+        if getattr(oldSpec, attribute) != getattr(newSpec, attribute):
+            diff.fullRenderReasons.append(f"{attribute} changed from {getattr(oldSpec, attribute)!r} to {getattr(newSpec, attribute)!r}")
+
+    for row, oldEntries, newEntries in (("input", oldSpec.inputComponents, newSpec.inputComponents), ("output", oldSpec.outputComponents, newSpec.outputComponents)):
+        if len(oldEntries) != len(newEntries):
+            # the slots of a row are spaced by how many there are, so every slot in the row moves
+            diff.fullRenderReasons.append(f"the {row} row changed from {len(oldEntries)} to {len(newEntries)} components")
+        elif newSpec.placement is not None and list(map(tuple, oldEntries)) != list(map(tuple, newEntries)):
+            # a spec entry is not tied to a slot once the placement optimizer orders the row
+            diff.fullRenderReasons.append(f"the {row} row is ordered by the {newSpec.placement} placement, so any change to it can move every slot")
+        elif newSpec.numberOfControllers > 1 and list(map(tuple, oldEntries)) != list(map(tuple, newEntries)):
+            # the controllers are routed together in worker processes, which keep no router to reroute a single net with
+            diff.fullRenderReasons.append(f"the {row} row of a circuit with {newSpec.numberOfControllers} controllers changed, and those are only routed as a whole")
+        elif newSpec.netLabels and list(map(tuple, oldEntries)) != list(map(tuple, newEntries)):
+            # every label was placed around the labels and wires before it, so one changed net can move any of them
+            diff.fullRenderReasons.append(f"the {row} row changed and its net labels are placed around each other")
+
+        for slotKey in range(max(len(oldEntries), len(newEntries))):
+            oldEntry = tuple(oldEntries[slotKey]) if slotKey < len(oldEntries) else None
+            newEntry = tuple(newEntries[slotKey]) if slotKey < len(newEntries) else None
+            if oldEntry == newEntry:
+                continue
+            if oldEntry is None:
+                diff.slotChanges.append(SlotChange(row, slotKey, SlotChange.ADDED, oldEntry, newEntry))
+                diff.netChanges.append((row, slotKey, None, newEntry[1]))
+            elif newEntry is None:
+                diff.slotChanges.append(SlotChange(row, slotKey, SlotChange.REMOVED, oldEntry, newEntry))
+                diff.netChanges.append((row, slotKey, oldEntry[1], None))
+            elif oldEntry[0] != newEntry[0]:
+                diff.slotChanges.append(SlotChange(row, slotKey, SlotChange.TYPE_CHANGED, oldEntry, newEntry))
+                diff.netChanges.append((row, slotKey, oldEntry[1], newEntry[1]))
+            else:
+                diff.slotChanges.append(SlotChange(row, slotKey, SlotChange.GPIO_CHANGED, oldEntry, newEntry))
+                diff.netChanges.append((row, slotKey, oldEntry[1], newEntry[1]))
+    return diff
+
+
+def _describeComponent(component):
+    if component is None:
+        return None
+    destinations = tuple(sorted(str(pinDict.get("PinDestination")) for pinDict in component.pinLMRMCoordinates.values()))
+    return (type(component).__name__, destinations)
+
+
+def _describeWires(component):
+    wires = {}
+    for destination, wire in component.wires.items():
+        wires[destination] = tuple((segment.wireStartPoint.returnCoordinatesTuple(), segment.wireEndPoint.returnCoordinatesTuple()) for segment in wire.segments.values())
+    return wires
+
+
+def diffDiagrams(oldDiagram: BaseWiringDiagram, newDiagram: BaseWiringDiagram):
+    """
+    Compares two placed and routed diagrams slot by slot and net by net.
+    Args:
+        oldDiagram (BaseWiringDiagram): The first diagram.
+        newDiagram (BaseWiringDiagram): The second diagram.
+    Returns:
+        CircuitDiff: The differences between them. Wire changes are reported as net changes keyed by wire destination.
+    """
+    diff = CircuitDiff()
+    if (oldDiagram.xResolution, oldDiagram.yResolution) != (newDiagram.xResolution, newDiagram.yResolution):
+        diff.fullRenderReasons.append(f"resolution changed from {(oldDiagram.xResolution, oldDiagram.yResolution)} to {(newDiagram.xResolution, newDiagram.yResolution)}")
+
+    for row, oldLocations, newLocations, oldObjects, newObjects in (
+        ("input", oldDiagram.inputComponentLocations, newDiagram.inputComponentLocations, oldDiagram.inputComponentObjects, newDiagram.inputComponentObjects),
+        ("output", oldDiagram.outputComponentLocations, newDiagram.outputComponentLocations, oldDiagram.outputComponentObjects, newDiagram.outputComponentObjects),
+    ):
+        if oldLocations != newLocations:
+            diff.fullRenderReasons.append(f"the {row} row slots moved")
+
+        for slotKey in sorted(set(oldObjects) | set(newObjects)):
+            oldComponent, newComponent = oldObjects.get(slotKey), newObjects.get(slotKey)
+            oldDescription, newDescription = _describeComponent(oldComponent), _describeComponent(newComponent)
+            if oldDescription != newDescription:
+                if oldDescription is None:
+                    kind = SlotChange.ADDED
+                elif newDescription is None:
+                    kind = SlotChange.REMOVED
+                elif oldDescription[0] != newDescription[0]:
+                    kind = SlotChange.TYPE_CHANGED
+                else:
+                    kind = SlotChange.GPIO_CHANGED
+                diff.slotChanges.append(SlotChange(row, slotKey, kind, oldDescription, newDescription))
+
+            oldWires = _describeWires(oldComponent) if oldComponent is not None else {}
+            newWires = _describeWires(newComponent) if newComponent is not None else {}
+            for destination in set(oldWires) | set(newWires):
+                if oldWires.get(destination) != newWires.get(destination):
+                    diff.netChanges.append((row, slotKey, destination if destination in oldWires else None, destination if destination in newWires else None))
+    return diff
+
+
+def _removeComponentWires(diagram: BaseWiringDiagram, component, destinations=None):
+    """
+    Removes a component's wires (all of them, or only those to the given destinations) from the component and the display list.
+    Returns:
+        list: The bounds of the removed drawing.
+    """
+    removedBounds = []
+    for destination in list(component.wires):
+        if destinations is None or destination in destinations:
+            removedBounds += diagram.displayList.removeOwner(("wire", id(component), destination))
+            del component.wires[destination]
+    return removedBounds
+
+
+def _routeAndDrawPin(diagram: BaseWiringDiagram, component, pinDict):
+    """
+    Routes and draws the wire of a single component pin.
+    Returns:
+        list: The bounds of the new drawing.
+    """
+    color = "black" if pinDict["Usage"] == PinEnum.GROUND else "red"
+    wire = diagram.wirer._createWire(f"{component.Label} {pinDict['Usage']}", pinDict, component.controllerKey, color=color, component=component)
+    component.addWire(wire, pinDict["PinDestination"])
+    diagram.drawComponentWire(component, pinDict["PinDestination"], wire, diagram.colorNewWire(component, pinDict["PinDestination"], wire))
+    return diagram.displayList.getOwnerBounds(("wire", id(component), pinDict["PinDestination"]))
+
+
+def applyCircuitDiff(pipeline: DiagramPipeline, newSpec: CircuitSpec, outputPath: str = None):
+    """
+    Brings a rendered pipeline up to date with a new spec, reusing every unchanged placement and route.
+
+    Only the nets of changed slots are rerouted and only the canvas regions they touch are repainted. If the change moves the layout, the pipeline is rendered again from scratch.
+
+    Args:
+        pipeline (DiagramPipeline): A pipeline that has finished its layout, route and rasterize stages.
+        newSpec (CircuitSpec): The circuit to render.
+        outputPath (str): When given, the updated diagram is saved here.
+    Returns:
+        CircuitDiff: What changed, including the repainted regions.
+    """
+    diff = diffCircuitSpecs(pipeline.circuitSpec, newSpec)
+    diagram = pipeline.diagram
+    if diff.requiresFullRender() or diagram is None or diagram.wirer is None or "rasterize" not in pipeline.completedStages:
+        if not diff.requiresFullRender():
+            diff.fullRenderReasons.append("the previous render had not been routed and rasterized")
+        pipeline.circuitSpec = newSpec
+        pipeline.diagram = None
+        pipeline.completedStages = []
+        for stageName in pipeline.getRemainingStages():
+            if stageName != "encode" or outputPath is not None:
+                pipeline.runStage(stageName, outputPath)
+        diff.changedRegions = [(0, 0, pipeline.diagram.xResolution, pipeline.diagram.yResolution)]
+        return diff
+
+    dirtyBounds = []
+    for change in diff.slotChanges:
+        if change.row == "input":
+            locations, objects, rotationAngle = diagram.inputComponentLocations, diagram.inputComponentObjects, newSpec.inputRotationAngle
+        else:
+            locations, objects, rotationAngle = diagram.outputComponentLocations, diagram.outputComponentObjects, newSpec.outputRotationAngle
+        component = objects[change.slotKey]
+
+        if change.kind == SlotChange.GPIO_CHANGED:
+            # the component keeps its placement; only its signal net moves
+            oldGPIO, newGPIO = change.oldEntry[1], change.newEntry[1]
+            dirtyBounds += _removeComponentWires(diagram, component, destinations=[oldGPIO])
+            component.controllerInputGPIO = newGPIO
+            for pinDict in component.pinLMRMCoordinates.values():
+                if pinDict.get("PinDestination") == oldGPIO:
+                    pinDict["PinDestination"] = newGPIO
+                    dirtyBounds += _routeAndDrawPin(diagram, component, pinDict)
+            continue
+
+        # the component is swapped for one of another type, so its image and all of its nets change
+        dirtyBounds += _removeComponentWires(diagram, component)
+        dirtyBounds += diagram.displayList.removeOwner(("component", id(component)))
+        diagram.releaseControllerPins(component)
+        componentType, controllerInputGPIO = change.newEntry[:2]
+        newComponent = CircuitSpec.createComponent(componentType, f"{change.slotKey} {componentType}", controllerInputGPIO)
+        diagram.addComponent(newComponent, change.slotKey, locations, objects, rotationAngle=rotationAngle)
+        dirtyBounds += diagram.displayList.getOwnerBounds(("component", id(newComponent)))
+        diagram.allocateControllerPins([newComponent])
+        for pinDict in newComponent.pinLMRMCoordinates.values():
+            dirtyBounds += _routeAndDrawPin(diagram, newComponent, pinDict)
+
+    if pipeline.wiringTable is not None:
+        # the legend lists every net, so it is drawn again from the updated wires
+        dirtyBounds += diagram.displayList.removeOwner(("legend",))
+        pipeline.wiringTable = diagram.getWiringTable()
+        dirtyBounds += diagram.fillLegend(pipeline.wiringTable)
+
+    diff.changedRegions = mergeBoxes(dirtyBounds)
+    for box in diff.changedRegions:
+        diagram.repaintRegion(box)
+
+    pipeline.circuitSpec = newSpec
+    if outputPath is not None:
+        pipeline.encode(outputPath)
+    return diff
@@ -0,0 +1,393 @@
+import threading
+
+from BaseWiringDiagram import BaseWiringDiagram
+from ButtonComponent import ButtonComponent
+from ComponentTypeRegistry import ComponentTypeRegistry
+from LEDComponent import LEDComponent
+from PiGPIOPinHeader import PiGPIOPinHeader
+from PlacementOptimizer import PlacementOptimizer
+from WiringTable import WIRING_TABLE_FORMATS, getWiringTablePath, writeWiringTable
+
+
+class CircuitSpec:
+    """
+    A plain description of a circuit that can be turned into a wiring diagram.
+
+    A spec only holds picklable data (strings, ints and tuples), so it can be handed to worker processes or stored and compared later.
+    """
+    # maps the component type names used in a spec to the classes that build them
+    COMPONENT_TYPES = {
+        "Button": ButtonComponent,
+        "LED": LEDComponent,
+    }
+
+    def __init__(self, title: str, author: str, inputComponents: list[tuple[str, int]] = None, outputComponents: list[tuple[str, int]] = None, xResolution: int = None, yResolution: int = None, titleFontSize: int = 70, inputRotationAngle: int = 180, outputRotationAngle: int = 0, placement: str = None, numberOfControllers: int = 1, controllerColumns: int = None, sheetConnectors: dict = None, netLabels: bool = False, wiringTableFormat: str = None, supersampling: int = 1):
+        """
+        Creates a new CircuitSpec object.
+
+        Args:
+            title (str): The title of the diagram.
+            author (str): The author shown in the info rectangle.
+            inputComponents (list): (component type name, controller GPIO physical pin) pairs for the input row. With several controllers, an entry may name its controller as a third item, (type name, pin, controller key); entries without one belong to controller 0.
+            outputComponents (list): (component type name, controller GPIO physical pin) pairs for the output row, named the same way as the input row.
+            xResolution (int): The width of the diagram in pixels. None fits the width to the content.
+            yResolution (int): The height of the diagram in pixels. None fits the height to the content.
+            titleFontSize (int): The font size of the title.
+            inputRotationAngle (int): The rotation applied to every input component image.
+            outputRotationAngle (int): The rotation applied to every output component image.
+            placement (str): None fills the slots of each row in the order the components are listed. One of PlacementOptimizer.METHODS reorders each row to shorten and uncross its wires.
+            numberOfControllers (int): The number of controller headers on the canvas, each with its own input and output rows, see BaseWiringDiagram.setControllerLayout.
+            controllerColumns (int): The number of controllers side by side. Defaults to all of them in one row.
+            sheetConnectors (dict): For one sheet of a larger circuit, (controller key, destination) -> the numbers of the other sheets that net continues on, see splitIntoSheets.
+            netLabels (bool): Label every wire with the controller pin and component it connects, and every wired controller pin with its name, see BaseWiringDiagram.addNetLabels.
+            wiringTableFormat (str): "csv" or "json" to write the wiring table next to the image when it is saved, see WiringTable.
+            supersampling (int): One of BaseWiringDiagram.SUPERSAMPLING_SCALES. Above 1 the finished diagram is drawn again anti-aliased, see BaseWiringDiagram.setSupersampling. Drafts ignore it.
+        """
+        self.title = title
+        self.author = author
+        self.inputComponents = list(inputComponents) if inputComponents is not None else []
+        self.outputComponents = list(outputComponents) if outputComponents is not None else []
+        self.xResolution = xResolution
+        self.yResolution = yResolution
+        self.titleFontSize = titleFontSize
+        self.inputRotationAngle = inputRotationAngle
+        self.outputRotationAngle = outputRotationAngle
+        self.placement = placement
+        self.numberOfControllers = numberOfControllers
+        self.controllerColumns = controllerColumns
+        self.sheetConnectors = dict(sheetConnectors) if sheetConnectors is not None else {}
+        self.netLabels = netLabels
+        self.wiringTableFormat = f".{wiringTableFormat.lower().lstrip('.')}" if wiringTableFormat is not None else None
+        self.supersampling = supersampling
+
+        if self.wiringTableFormat is not None and self.wiringTableFormat not in WIRING_TABLE_FORMATS:
+            raise ValueError(f"Unknown wiring table format \"{wiringTableFormat}\". Known formats are {list(WIRING_TABLE_FORMATS)}")
+        if supersampling not in BaseWiringDiagram.SUPERSAMPLING_SCALES:
+            raise ValueError(f"Unknown supersampling factor {supersampling}. Known factors are {BaseWiringDiagram.SUPERSAMPLING_SCALES}")
+        if placement is not None and placement not in PlacementOptimizer.METHODS:
+            raise ValueError(f"Unknown placement method \"{placement}\". Known methods are {PlacementOptimizer.METHODS}")
+
+        if numberOfControllers < 1:
+            raise ValueError(f"A circuit needs at least one controller, not {numberOfControllers}")
+        if controllerColumns is not None and controllerColumns < 1:
+            raise ValueError(f"A controller layout needs at least one column, not {controllerColumns}")
+
+        for entry in self.inputComponents + self.outputComponents:
+            if len(entry) not in (2, 3):
+                raise ValueError(f"A component entry is (type name, pin) or (type name, pin, controller key), not {entry!r}")
+            if entry[0] not in CircuitSpec.COMPONENT_TYPES:
+                raise ValueError(f"Unknown component type \"{entry[0]}\". Known types are {list(CircuitSpec.COMPONENT_TYPES)}")
+            if not 0 <= CircuitSpec.getControllerKey(entry) < numberOfControllers:
+                raise ValueError(f"The component entry {entry!r} names controller {CircuitSpec.getControllerKey(entry)}, but the circuit has {numberOfControllers} controller(s)")
+
+    def __repr__(self):
+        return f"CircuitSpec({self.title!r}, inputs={self.inputComponents}, outputs={self.outputComponents}, resolution=({self.xResolution}, {self.yResolution}), controllers={self.numberOfControllers})"
+
+    @staticmethod
+    def getControllerKey(entry):
+        """
+        Returns the controller a component entry belongs to.
+        """
+        return entry[2] if len(entry) > 2 else 0
+
+    def getControllerEntries(self, entries: list, controllerKey: int):
+        """
+        Returns the (index in entries, entry) of every entry of a row that belongs to a controller, in order.
+        """
+        return [(index, entry) for index, entry in enumerate(entries) if CircuitSpec.getControllerKey(entry) == controllerKey]
+
+    def getNets(self):
+        """
+        Returns the (controller key, destination) of every net of the circuit. A destination is a physical controller pin or, for power and ground, a PinEnum.
+        """
+        nets = set()
+        for entry in self.inputComponents + self.outputComponents:
+            component = CircuitSpec.createComponent(entry[0], "Net", entry[1], CircuitSpec.getControllerKey(entry))
+            for pinDict in component.pinLMRMCoordinates.values():
+                nets.add((component.controllerKey, pinDict["PinDestination"]))
+        return nets
+
+    def splitIntoSheets(self, componentsPerSheet: int):
+        """
+        Splits the circuit into sheets that each hold at most componentsPerSheet components, so a large circuit is drawn as several readable diagrams instead of one huge canvas.
+
+        The components are shared out evenly and in order, each row keeping its share of every sheet. Every sheet draws the controllers, and labels the nets it shares with other sheets through its sheetConnectors.
+        Args:
+            componentsPerSheet (int): The most components one sheet holds.
+        Returns:
+            list: A CircuitSpec per sheet, or just this spec if it fits on one sheet.
+        """
+        if componentsPerSheet < 1:
+            raise ValueError(f"A sheet must hold at least one component, not {componentsPerSheet}")
+        numberOfInputs, numberOfOutputs = len(self.inputComponents), len(self.outputComponents)
+        numberOfComponents = numberOfInputs + numberOfOutputs
+        numberOfSheets = -(-numberOfComponents // componentsPerSheet)
+        if numberOfSheets <= 1:
+            return [self]
+
+        sheets = []
+        for sheetIndex in range(numberOfSheets):
+            start = sheetIndex * numberOfComponents // numberOfSheets
+            end = (sheetIndex + 1) * numberOfComponents // numberOfSheets
+            # the inputs before a sheet are their share of all components before it, rounded down; the outputs make up the rest
+            inputStart, inputEnd = start * numberOfInputs // numberOfComponents, end * numberOfInputs // numberOfComponents
+            sheets.append(CircuitSpec(
+                f"{self.title} (Sheet {sheetIndex + 1} of {numberOfSheets})", self.author,
+                self.inputComponents[inputStart:inputEnd], self.outputComponents[start - inputStart:end - inputEnd],
+                xResolution=self.xResolution, yResolution=self.yResolution, titleFontSize=self.titleFontSize,
+                inputRotationAngle=self.inputRotationAngle, outputRotationAngle=self.outputRotationAngle, placement=self.placement,
+                numberOfControllers=self.numberOfControllers, controllerColumns=self.controllerColumns, netLabels=self.netLabels, wiringTableFormat=self.wiringTableFormat, supersampling=self.supersampling))
+
+        netsOfSheets = [sheet.getNets() for sheet in sheets]
+        sheetsOfNet = {}
+        for sheetNumber, nets in enumerate(netsOfSheets, start=1):
+            for net in nets:
+                sheetsOfNet.setdefault(net, []).append(sheetNumber)
+        for sheetNumber, (sheet, nets) in enumerate(zip(sheets, netsOfSheets), start=1):
+            sheet.sheetConnectors = {net: tuple(otherSheet for otherSheet in sheetsOfNet[net] if otherSheet != sheetNumber) for net in nets if len(sheetsOfNet[net]) > 1}
+        return sheets
+
+    def getControllerGrid(self):
+        """
+        Returns the (columns, rows) of the grid of controller regions.
+        """
+        columns = min(self.controllerColumns, self.numberOfControllers) if self.controllerColumns is not None else self.numberOfControllers
+        return (columns, -(-self.numberOfControllers // columns))
+
+    def getResolution(self):
+        """
+        Returns the (xResolution, yResolution) of the diagram. A resolution left as None is the smallest one the components, controller, wires and text fit in, found by BaseWiringDiagram.computeMinimalResolution. With several controllers every region gets the size the busiest one needs.
+        """
+        if self.xResolution is not None and self.yResolution is not None:
+            return (self.xResolution, self.yResolution)
+        controllerColumns, controllerRows = self.getControllerGrid()
+        minimalResolution = (1, 1)
+        for controllerKey in range(self.numberOfControllers):
+            inputComponentTypes = [ComponentTypeRegistry.getType(CircuitSpec.COMPONENT_TYPES[entry[0]].TYPE_NAME) for _, entry in self.getControllerEntries(self.inputComponents, controllerKey)]
+            outputComponentTypes = [ComponentTypeRegistry.getType(CircuitSpec.COMPONENT_TYPES[entry[0]].TYPE_NAME) for _, entry in self.getControllerEntries(self.outputComponents, controllerKey)]
+            regionResolution = BaseWiringDiagram.computeMinimalResolution(
+                inputComponentTypes,
+                outputComponentTypes,
+                ComponentTypeRegistry.getType(PiGPIOPinHeader.TYPE_NAME),
+                title=self.title, author=self.author, titleFontSize=self.titleFontSize,
+                inputRotationAngle=self.inputRotationAngle, outputRotationAngle=self.outputRotationAngle,
+                infoRectangleFraction=DiagramPipeline.DISTANCE_BETWEEN_INFO_RECTANGLES_AND_BOTTOM,
+                controllerColumns=controllerColumns, controllerRows=controllerRows)
+            minimalResolution = (max(minimalResolution[0], regionResolution[0]), max(minimalResolution[1], regionResolution[1]))
+        return (self.xResolution if self.xResolution is not None else minimalResolution[0], self.yResolution if self.yResolution is not None else minimalResolution[1])
+
+    @staticmethod
+    def createComponent(componentType: str, label: str, controllerInputGPIO: int, controllerKey: int = 0):
+        """
+        Builds a component object from its type name.
+        Args:
+            componentType (str): A key of CircuitSpec.COMPONENT_TYPES.
+            label (str): The label of the component.
+            controllerInputGPIO (int): The physical pin of the controller the component's signal pin is wired to.
+            controllerKey (int): The controller the component is connected to.
+        Returns:
+            Component: The new component.
+        """
+        return CircuitSpec.COMPONENT_TYPES[componentType](label, controllerInputGPIO, controllerKey=controllerKey)
+
+
+class DiagramPipeline:
+    """
+    Runs a CircuitSpec through the stages needed to produce a wiring diagram image.
+
+    The stages are run in the order given by DiagramPipeline.STAGES. Each stage keeps its results on the pipeline, so the stages can be run one at a time.
+    """
+    STAGES = ("layout", "route", "rasterize", "encode")
+
+    # the info, legend and other requirements rectangles sit this far from the bottom of the image
+    DISTANCE_BETWEEN_INFO_RECTANGLES_AND_BOTTOM = 0.18
+
+    # draft renders are drawn at this fraction of the spec's resolution unless told otherwise
+    DEFAULT_DRAFT_SCALE = 0.25
+
+    def __init__(self, circuitSpec: CircuitSpec, draftScale: float = None, numberOfRouteWorkers: int = None):
+        """
+        Creates a new DiagramPipeline object.
+        Args:
+            circuitSpec (CircuitSpec): The circuit to draw.
+            draftScale (float): When given, the pipeline produces a draft at this fraction of the spec's resolution instead of the full-quality diagram.
+            numberOfRouteWorkers (int): The number of processes the controllers of a multi-controller circuit are routed in. Defaults to the number of CPUs.
+        """
+        self.circuitSpec = circuitSpec
+        self.draftScale = draftScale
+        self.numberOfRouteWorkers = numberOfRouteWorkers
+        self.diagram = None
+        # the rows of the legend and the wiring table file, see BaseWiringDiagram.getWiringTable; set when rasterized
+        self.wiringTable = None
+        self.completedStages = []
+
+    def layout(self):
+        """
+        Creates the canvas, draws the frame of the diagram and places every component.
+        """
+        spec = self.circuitSpec
+        xResolution, yResolution = spec.getResolution()
+        if self.draftScale is None:
+            self.diagram = BaseWiringDiagram(xResolution, yResolution)
+        else:
+            self.diagram = BaseWiringDiagram(max(1, int(xResolution * self.draftScale)), max(1, int(yResolution * self.draftScale)), isDraft=True, spriteScale=self.draftScale)
+        self.diagram.setControllerLayout(spec.numberOfControllers, spec.controllerColumns)
+        self.diagram.addTitle(spec.title, spec.titleFontSize)
+        self.diagram.addComponentRows()
+
+        lmInfoRectangle = self.diagram.yResolution * (1 - DiagramPipeline.DISTANCE_BETWEEN_INFO_RECTANGLES_AND_BOTTOM)
+        self.diagram.addInfoRectangle(lmInfoRectangle, spec.title, spec.author)
+        self.diagram.addLegend(lmInfoRectangle)
+        self.diagram.addOtherRequirements(lmInfoRectangle)
+
+        for controllerKey in range(spec.numberOfControllers):
+            self.diagram.drawComponentRows(len(spec.getControllerEntries(spec.inputComponents, controllerKey)), len(spec.getControllerEntries(spec.outputComponents, controllerKey)), controllerKey)
+
+        # the controllers go first, so the placement optimizer knows where their pins are
+        for controllerKey in range(spec.numberOfControllers):
+            label = "Pi GPIO Pin Header" if spec.numberOfControllers == 1 else f"{controllerKey}"
+            self.diagram.addControllerComponent(PiGPIOPinHeader(label, controllerKey=controllerKey), controllerKey)
+
+        for controllerKey in range(spec.numberOfControllers):
+            for group, entries, locations, objects, rotationAngle in (("input", spec.inputComponents, self.diagram.inputComponentLocations, self.diagram.inputComponentObjects, spec.inputRotationAngle), ("output", spec.outputComponents, self.diagram.outputComponentLocations, self.diagram.outputComponentObjects, spec.outputRotationAngle)):
+                components = [CircuitSpec.createComponent(entry[0], f"{index} {entry[0]}", entry[1], controllerKey) for index, entry in spec.getControllerEntries(entries, controllerKey)]
+                rowSlotKeys = self.diagram.getSlotKeys(group, controllerKey)
+                slotIndices = self.placeRow(components, [locations[slotKey] for slotKey in rowSlotKeys], rotationAngle, controllerKey)
+                for component, slotIndex in zip(components, slotIndices):
+                    self.diagram.addComponent(component, rowSlotKeys[slotIndex], locations, objects, rotationAngle=rotationAngle)
+
+        self.completedStages.append("layout")
+
+    def placeRow(self, components: list, slotBoxes: list, rotationAngle: int, controllerKey: int = 0):
+        """
+        Chooses the slot of every component of a row, using the spec's placement method.
+        Args:
+            components (list): The components of the row, in the order the spec lists them.
+            slotBoxes (list): The (topLeft, bottomRight) boxes of the row's slots, in slot order.
+            rotationAngle (int): The rotation the row's component images are placed with.
+            controllerKey (int): The controller the row is wired to.
+        Returns:
+            list: The index in slotBoxes of every component's slot.
+        """
+        if self.circuitSpec.placement is None or not components:
+            return list(range(len(components)))
+        optimizer = PlacementOptimizer(self.diagram.controllerComponentObjects[controllerKey], slotBoxes, rotationAngle)
+        # drafts only need a rough order, so they skip annealing
+        method = "barycenter" if self.diagram.isDraft and self.circuitSpec.placement == "anneal" else self.circuitSpec.placement
+        return optimizer.optimize(components, method)
+
+    def route(self):
+        """
+        Determines the path of every wire. Drafts are not routed; their wires are drawn as straight lines when rasterized.
+        """
+        if self.diagram.isDraft:
+            self.completedStages.append("route")
+            return
+        self.diagram.routeWires(self.numberOfRouteWorkers)
+        self.completedStages.append("route")
+
+    def rasterize(self):
+        """
+        Draws the routed wires onto the canvas, fills the legend with them, and adds the labels of the nets that continue on other sheets. A supersampled spec then has the whole canvas drawn again anti-aliased.
+        """
+        if self.diagram.isDraft:
+            self.diagram.drawDraftWires()
+        else:
+            self.diagram.drawWires()
+            self.wiringTable = self.diagram.getWiringTable()
+            self.diagram.fillLegend(self.wiringTable)
+        if self.circuitSpec.sheetConnectors:
+            self.diagram.addSheetConnectors(self.circuitSpec.sheetConnectors)
+        # labels go last, so they are placed around everything else; drafts have no routed wires to label
+        if self.circuitSpec.netLabels and not self.diagram.isDraft:
+            self.diagram.addNetLabels()
+        if self.circuitSpec.supersampling > 1 and not self.diagram.isDraft:
+            self.diagram.setSupersampling(self.circuitSpec.supersampling)
+        self.completedStages.append("rasterize")
+
+    def encode(self, outputPath: str):
+        """
+        Saves the finished diagram, and its wiring table next to it if the spec asks for one.
+        Args:
+            outputPath (str): The path to save the diagram to.
+        """
+        self.diagram.saveDiagram(outputPath)
+        if self.circuitSpec.wiringTableFormat is not None and self.wiringTable is not None:
+            writeWiringTable(self.wiringTable, getWiringTablePath(outputPath, self.circuitSpec.wiringTableFormat))
+        self.completedStages.append("encode")
+
+    def runStage(self, stageName: str, outputPath: str = None):
+        """
+        Runs a single stage by name.
+        Args:
+            stageName (str): One of DiagramPipeline.STAGES.
+            outputPath (str): The path to save the diagram to. Only used by the "encode" stage.
+        """
+        if stageName not in DiagramPipeline.STAGES:
+            raise ValueError(f"Unknown stage \"{stageName}\". Known stages are {DiagramPipeline.STAGES}")
+        if stageName == "encode":
+            self.encode(outputPath)
+        else:
+            getattr(self, stageName)()
+
+    def getRemainingStages(self):
+        """
+        Returns the stages that have not been run yet, in order.
+        """
+        return [stage for stage in DiagramPipeline.STAGES if stage not in self.completedStages]
+
+    def run(self, outputPath: str):
+        """
+        Runs every remaining stage and saves the diagram.
+        Args:
+            outputPath (str): The path to save the diagram to.
+        Returns:
+            BaseWiringDiagram: The finished diagram.
+        """
+        for stageName in self.getRemainingStages():
+            self.runStage(stageName, outputPath)
+        return self.diagram
+
+    def runDraft(self):
+        """
+        Runs every stage except encoding. Meant for draft pipelines, whose image is shown rather than saved.
+        Returns:
+            Image: The drawn canvas.
+        """
+        for stageName in self.getRemainingStages():
+            if stageName != "encode":
+                self.runStage(stageName)
+        return self.diagram.wiringDiagram
+
+
+def renderProgressive(circuitSpec: CircuitSpec, outputPath: str, onStage, onError=None, draftScale: float = DiagramPipeline.DEFAULT_DRAFT_SCALE):
+    """
+    Draws a quick draft of the circuit, then renders the full-quality diagram on a background thread.
+
+    onStage is called with ("draft", image) before this function returns, then with (stageName, image) from the background thread after each stage of the full render. The image passed is the live canvas and must not be modified.
+
+    Args:
+        circuitSpec (CircuitSpec): The circuit to draw.
+        outputPath (str): Where to save the full-quality diagram.
+        onStage (callable): Called as onStage(stageName, image).
+        onError (callable): Called as onError(exception) if the full render fails.
+        draftScale (float): The fraction of the full resolution the draft is drawn at.
+    Returns:
+        Thread: The thread running the full-quality render.
+    """
+    onStage("draft", DiagramPipeline(circuitSpec, draftScale=draftScale).runDraft())
+
+    def renderFullQuality():
+        pipeline = DiagramPipeline(circuitSpec)
+        try:
+            for stageName in pipeline.getRemainingStages():
+                pipeline.runStage(stageName, outputPath)
+                onStage(stageName, pipeline.diagram.wiringDiagram)
+        except Exception as e:
+            if onError is None:
+                raise
+            onError(e)
+
+    fullRenderThread = threading.Thread(target=renderFullQuality, name=f"Full render of {circuitSpec.title}", daemon=True)
+    fullRenderThread.start()
+    return fullRenderThread
@@ -0,0 +1,133 @@
+"""
+Renders a large circuit as several sheets instead of one huge canvas.
+
+The circuit is split by CircuitSpec.splitIntoSheets. Every sheet is laid out, routed and encoded on its own by a worker of a RenderWorkerPool, so a worker never holds more than one sheet's canvas. The sheets are then either kept as a numbered PNG set or streamed, one page at a time, into a multi-page TIFF or PDF.
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+from PIL import Image, TiffImagePlugin
+
+from DiagramPipeline import CircuitSpec, DiagramPipeline
+from RenderWorkerPool import RenderWorkerPool
+from WiringTable import getWiringTablePath
+
+# output file extension -> the format the sheets are combined into; PNG keeps one file per sheet
+SHEET_FORMATS = {
+    ".png": "PNG",
+    ".tif": "TIFF",
+    ".tiff": "TIFF",
+    ".pdf": "PDF",
+}
+
+
+def getSheetPaths(outputPath: str, numberOfSheets: int):
+    """
+    Returns the numbered file names of a PNG sheet set, such as diagram_sheet01.png, diagram_sheet02.png and so on. A single sheet keeps outputPath.
+    """
+    if numberOfSheets == 1:
+        return [outputPath]
+    root, extension = os.path.splitext(outputPath)
+    digits = len(str(numberOfSheets))
+    return [f"{root}_sheet{sheetNumber:0{digits}d}{extension}" for sheetNumber in range(1, numberOfSheets + 1)]
+
+
+def _renderJobs(jobs: list, numberOfWorkers: int = None, pool: RenderWorkerPool = None):
+    """
+    Renders (CircuitSpec, output path) jobs, in a pool unless there is only one worker to use.
+    """
+    if pool is not None:
+        return pool.render(jobs)
+    if numberOfWorkers is None:
+        numberOfWorkers = min(os.cpu_count() or 1, len(jobs))
+    # the workers of a RenderWorkerPool are daemons, which cannot start processes of their own
+    if numberOfWorkers <= 1 or multiprocessing.current_process().daemon:
+        for circuitSpec, outputPath in jobs:
+            DiagramPipeline(circuitSpec).run(outputPath)
+        return [outputPath for _, outputPath in jobs]
+    with RenderWorkerPool(numberOfWorkers) as workerPool:
+        return workerPool.render(jobs)
+
+
+def combineSheets(sheetPaths: list, outputPath: str):
+    """
+    Writes sheet images into one multi-page TIFF or PDF. Pages are read and written one at a time, so only one sheet is ever decoded.
+    Args:
+        sheetPaths (list): The sheet images, in page order.
+        outputPath (str): The .tif, .tiff or .pdf file to write.
+    """
+    imageFormat = SHEET_FORMATS.get(os.path.splitext(outputPath)[1].lower())
+    if imageFormat not in ("TIFF", "PDF"):
+        raise ValueError(f"Sheets can only be combined into a TIFF or PDF file, not {outputPath}")
+    # written next to the output and moved over it at the end, so a failed run never leaves half a document
+    temporaryPath = f"{outputPath}.{os.getpid()}.tmp"
+    try:
+        if imageFormat == "TIFF":
+            with TiffImagePlugin.AppendingTiffWriter(temporaryPath, True) as tiffFile:
+                for sheetPath in sheetPaths:
+                    with Image.open(sheetPath) as sheet:
+                        sheet.save(tiffFile, format="TIFF", compression="tiff_deflate")
+                    tiffFile.newFrame()
+        else:
+            for pageIndex, sheetPath in enumerate(sheetPaths):
+                with Image.open(sheetPath) as sheet:
+                    # every page after the first is added to the end of the file without reading the pages before it
+                    sheet.convert("RGB").save(temporaryPath, format="PDF", append=pageIndex > 0)
+        os.replace(temporaryPath, outputPath)
+    finally:
+        if os.path.exists(temporaryPath):
+            os.remove(temporaryPath)
+
+
+def renderSheets(circuitSpec: CircuitSpec, outputPath: str, componentsPerSheet: int, numberOfWorkers: int = None, pool: RenderWorkerPool = None):
+    """
+    Renders a circuit as sheets of at most componentsPerSheet components each, rendering the sheets in parallel.
+    Args:
+        circuitSpec (CircuitSpec): The circuit to draw.
+        outputPath (str): A .png path writes a numbered PNG per sheet (see getSheetPaths); a .tif, .tiff or .pdf path writes one multi-page document. A spec with a wiringTableFormat also gets a wiring table per sheet, named like the sheet PNGs.
+        componentsPerSheet (int): The most components one sheet holds.
+        numberOfWorkers (int): The number of worker processes. Defaults to the number of CPUs, or the number of sheets if that is fewer; 1 renders in this process.
+        pool (RenderWorkerPool): A pool that is already running, used instead of starting one.
+    Returns:
+        list: The images written.
+    """
+    extension = os.path.splitext(outputPath)[1].lower()
+    if extension not in SHEET_FORMATS:
+        raise ValueError(f"Unknown sheet output format \"{extension}\". Known formats are {list(SHEET_FORMATS)}")
+    sheets = circuitSpec.splitIntoSheets(componentsPerSheet)
+
+    if SHEET_FORMATS[extension] == "PNG":
+        return _renderJobs(list(zip(sheets, getSheetPaths(outputPath, len(sheets)))), numberOfWorkers, pool)
+
+    sheetDirectory = tempfile.mkdtemp(prefix="sheets", dir=os.path.dirname(os.path.abspath(outputPath)))
+    try:
+        sheetPaths = [os.path.join(sheetDirectory, f"sheet{sheetNumber}.png") for sheetNumber in range(1, len(sheets) + 1)]
+        _renderJobs(list(zip(sheets, sheetPaths)), numberOfWorkers, pool)
+        combineSheets(sheetPaths, outputPath)
+        if circuitSpec.wiringTableFormat is not None:
+            # the tables were written next to the sheet images, which are about to be deleted
+            for sheetPath, namedSheetPath in zip(sheetPaths, getSheetPaths(outputPath, len(sheets))):
+                os.replace(getWiringTablePath(sheetPath, circuitSpec.wiringTableFormat), getWiringTablePath(namedSheetPath, circuitSpec.wiringTableFormat))
+    finally:
+        shutil.rmtree(sheetDirectory, ignore_errors=True)
+    return [outputPath]
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    multiprocessing.freeze_support()
+    outputPath = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), "diagramTest", "sheets.pdf")
+    componentsPerSheet = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    gpioPins = [3, 5, 7, 8, 10, 11, 12, 13, 15, 16, 18, 19, 21, 22, 23, 24, 26, 29, 31, 32, 33, 35, 36, 37, 38, 40]
+    circuitSpec = CircuitSpec("Sheet Test", "Benchmarks",
+                              [("Button", gpioPins[index]) for index in range(12)],
+                              [("LED", gpioPins[12 + index]) for index in range(12)])
+    os.makedirs(os.path.dirname(os.path.abspath(outputPath)), exist_ok=True)
+    startTime = time.perf_counter()
+    writtenPaths = renderSheets(circuitSpec, outputPath, componentsPerSheet)
+    print(f"Rendered {len(circuitSpec.splitIntoSheets(componentsPerSheet))} sheets into {writtenPaths} in {time.perf_counter() - startTime:.2f} s")
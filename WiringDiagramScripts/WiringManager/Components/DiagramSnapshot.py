@@ -0,0 +1,331 @@
+"""
+Binary snapshots of a placed and routed wiring diagram.
+
+A snapshot stores everything needed to redraw a diagram without running layout or routing again: the frame text, the component slots and placements, the world coordinates of every pin and every routed wire segment. All records are little-endian and stored as packed arrays:
+
+    header          magic, version, x resolution, y resolution, number of controllers, controller columns, supersampling factor, legend font size, net label font size
+    strings         every label, image path, type name and text usage, referenced by index
+    framed texts    (text, font size, x, y, padding)
+    component rows  (controller key, input slots, output slots), in the order the rows were drawn
+    components      (group, slot key, label, image path, type name, controller key, slot rectangle, placement)
+    pins            (component, pin number, usage, destination, direction, LM x, LM y, RM x, RM y)
+    wires           (component, destination, label, first segment, segment count)
+    segments        flat float32 array of (start x, start y, end x, end y)
+"""
+
+import struct
+import sys
+from array import array
+
+from BaseWiringDiagram import BaseWiringDiagram
+# imported so the bundled component types are registered when a snapshot is loaded
+import ButtonComponent
+import LEDComponent
+import ResisterComponent
+from Component import Component
+from ComponentTypeRegistry import ComponentTypeRegistry
+from Coordinates import Coordinates
+from PinTable import codeToDirection, directionToCode
+from Wire import WireLines
+from Utilities.PinEnum import PinEnum
+
+SNAPSHOT_MAGIC = b"WDSNAP"
+# version 2: pin sides are stored as DirectionEnum codes
+# version 3: the controller layout, component rows, component type names, supersampling factor and legend and net label font sizes are stored
+SNAPSHOT_VERSION = 3
+
+_HEADER = struct.Struct("<6sHIIHHBHH")
+_COUNT = struct.Struct("<I")
+_STRING_LENGTH = struct.Struct("<H")
+_FRAMED_TEXT = struct.Struct("<IHffH")
+_COMPONENT_ROW = struct.Struct("<HII")
+_COMPONENT = struct.Struct("<BIIIIiffffffffhB")
+_PIN = struct.Struct("<IiiiBffff")
+_WIRE = struct.Struct("<IiIII")
+
+# the component groups, in the order they are stored
+_GROUPS = ("input", "output", "controller")
+
+# usages, destinations and directions that are not plain values are stored with these codes
+_NO_VALUE = -128
+_NO_DIRECTION = 255
+
+
+class SnapshotComponent(Component):
+    """
+    A component rebuilt from a snapshot that has no registered type. Its pins are already in world coordinates.
+    """
+    def __init__(self, componentLabel: str, imagePath: str, pinLMRMCoordinates: dict, controllerKey: int):
+        super().__init__(componentLabel, imagePath, {}, pinLMRMCoordinates, controllerKey=controllerKey)
+
+
+def _restoreComponent(typeName: str, componentLabel: str, pinDestinations: dict, controllerKey: int):
+    """
+    Rebuilds a component of a registered type as the class it was created as, without calling that class's constructor, the way pickle restores objects. Its pins come from the type and are placed when its image is.
+
+    Per-component electrical values, like a resistor's resistance, are not stored; the component gets its type's.
+    """
+    componentType = ComponentTypeRegistry.getType(typeName)
+    componentClass = ComponentTypeRegistry.getComponentClass(typeName) or SnapshotComponent
+    component = componentClass.__new__(componentClass)
+    Component.__init__(component, componentLabel, componentType.imagePath, dict(componentType.electricalValuesDict), None, isPowered=componentType.isPowered, controllerKey=controllerKey, componentType=componentType, pinDestinations=pinDestinations)
+    return component
+
+
+class _StringTable:
+    def __init__(self):
+        self.strings = []
+        self.indexes = {}
+
+    def add(self, string: str):
+        if string not in self.indexes:
+            self.indexes[string] = len(self.strings)
+            self.strings.append(string)
+        return self.indexes[string]
+
+
+def _encodeValue(value, strings: _StringTable):
+    """
+    Encodes a pin usage or destination: PinEnums as their negated value, ints as themselves, strings as a string table index (offset past the ints) and None as _NO_VALUE.
+    """
+    if value is None:
+        return _NO_VALUE
+    if isinstance(value, PinEnum):
+        return -value.value
+    if isinstance(value, str):
+        return (1 << 24) + strings.add(value)
+    return int(value)
+
+
+def _decodeValue(code: int, strings: list[str]):
+    if code == _NO_VALUE:
+        return None
+    if code < 0:
+        return PinEnum(-code)
+    if code >= 1 << 24:
+        return strings[code - (1 << 24)]
+    return code
+
+
+def _floatArrayToBytes(values: array):
+    if sys.byteorder == "big":
+        values = array("f", values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _floatArrayFromBytes(data: bytes):
+    values = array("f")
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _componentGroups(diagram: BaseWiringDiagram):
+    return (
+        (diagram.inputComponentLocations, diagram.inputComponentObjects),
+        (diagram.outputComponentLocations, diagram.outputComponentObjects),
+        (diagram.controllerComponentLocation, diagram.controllerComponentObjects),
+    )
+
+
+def saveSnapshot(diagram: BaseWiringDiagram, outputPath: str):
+    """
+    Writes a placed and routed diagram to a binary snapshot file.
+    Args:
+        diagram (BaseWiringDiagram): The diagram to store. Its components must have been placed.
+        outputPath (str): The path of the snapshot file.
+    """
+    strings = _StringTable()
+    framedTextRecords = []
+    componentRowRecords = []
+    componentRecords = []
+    pinRecords = []
+    wireRecords = []
+    segments = array("f")
+
+    for text, fontSize, topLeft, padding in diagram.framedTexts:
+        framedTextRecords.append(_FRAMED_TEXT.pack(strings.add(text), fontSize, topLeft[0], topLeft[1], padding))
+
+    # drawComponentRows draws the output and then the input row of one controller
+    for group, controllerKey in diagram.componentRows:
+        if group == "output":
+            inputRow = diagram.componentRows.get(("input", controllerKey))
+            componentRowRecords.append(_COMPONENT_ROW.pack(controllerKey, inputRow.maxNumberOfComps if inputRow is not None else 0, diagram.componentRows[(group, controllerKey)].maxNumberOfComps))
+
+    for groupCode, (locations, objects) in enumerate(_componentGroups(diagram)):
+        for slotKey, (topLeft, bottomRight) in locations.items():
+            component = objects.get(slotKey)
+            hasComponent = component is not None and component.placement is not None
+            if hasComponent:
+                centerPoint, dimensions, rotationAngle, resize = component.placement
+                label, imagePath = strings.add(component.Label), strings.add(component.imagePath)
+                typeName = strings.add(component.componentType.typeName if component.componentType is not None else "")
+                controllerKey = component.controllerKey if component.controllerKey is not None else -1
+            else:
+                centerPoint, dimensions, rotationAngle, resize = (0, 0), (0, 0), 0, False
+                label, imagePath, typeName, controllerKey = 0, 0, 0, -1
+
+            componentIndex = len(componentRecords)
+            componentRecords.append(_COMPONENT.pack(groupCode, slotKey, label, imagePath, typeName, controllerKey, topLeft[0], topLeft[1], bottomRight[0], bottomRight[1], centerPoint[0], centerPoint[1], dimensions[0], dimensions[1], rotationAngle, (1 if hasComponent else 0) | (2 if resize else 0)))
+            if not hasComponent:
+                continue
+
+            for pinNumber, pinDict in component.pinLMRMCoordinates.items():
+                direction = pinDict.get("PinLocation")
+                pinRecords.append(_PIN.pack(componentIndex, pinNumber, _encodeValue(pinDict.get("Usage"), strings), _encodeValue(pinDict.get("PinDestination"), strings), directionToCode(direction) if direction is not None else _NO_DIRECTION, pinDict["LM"].x, pinDict["LM"].y, pinDict["RM"].x, pinDict["RM"].y))
+
+            for destination, wire in component.wires.items():
+                wireRecords.append(_WIRE.pack(componentIndex, _encodeValue(destination, strings), strings.add(wire.label), len(segments) // 4, len(wire.segments)))
+                for segment in wire.segments.values():
+                    segments.extend((segment.wireStartPoint.x, segment.wireStartPoint.y, segment.wireEndPoint.x, segment.wireEndPoint.y))
+
+    with open(outputPath, "wb") as snapshotFile:
+        snapshotFile.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, diagram.xResolution, diagram.yResolution, diagram.numberOfControllers, diagram.controllerColumns, diagram.supersampling, diagram.legendFontSize or 0, diagram.netLabelFontSize or 0))
+
+        snapshotFile.write(_COUNT.pack(len(strings.strings)))
+        for string in strings.strings:
+            encoded = string.encode("utf-8")
+            snapshotFile.write(_STRING_LENGTH.pack(len(encoded)))
+            snapshotFile.write(encoded)
+
+        for records in (framedTextRecords, componentRowRecords, componentRecords, pinRecords, wireRecords):
+            snapshotFile.write(_COUNT.pack(len(records)))
+            snapshotFile.write(b"".join(records))
+
+        snapshotFile.write(_COUNT.pack(len(segments)))
+        snapshotFile.write(_floatArrayToBytes(segments))
+
+
+class _SnapshotReader:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.offset = 0
+
+    def read(self, structure: struct.Struct):
+        values = structure.unpack_from(self.data, self.offset)
+        self.offset += structure.size
+        return values
+
+    def readBytes(self, length: int):
+        chunk = self.data[self.offset:self.offset + length]
+        if len(chunk) != length:
+            raise ValueError("The snapshot file is truncated")
+        self.offset += length
+        return chunk
+
+    def readRecords(self, structure: struct.Struct):
+        count, = self.read(_COUNT)
+        return list(structure.iter_unpack(self.readBytes(count * structure.size)))
+
+
+def loadSnapshot(snapshotPath: str, drawWires: bool = False):
+    """
+    Rebuilds a diagram from a binary snapshot without running layout or routing.
+
+    The returned diagram has its controller layout, frame, component slots and component images drawn and its wires restored. Components of a registered type come back as the class they were created as.
+    Args:
+        snapshotPath (str): The path of the snapshot file.
+        drawWires (bool): Also draw the wires and then, if the original diagram had them, the legend table and the net labels, and draw the canvas again at its supersampling factor. Otherwise call drawWires() on the diagram to draw the wires.
+    Returns:
+        BaseWiringDiagram: The rebuilt diagram.
+    """
+    with open(snapshotPath, "rb") as snapshotFile:
+        reader = _SnapshotReader(snapshotFile.read())
+
+    try:
+        magic, version, xResolution, yResolution, numberOfControllers, controllerColumns, supersampling, legendFontSize, netLabelFontSize = reader.read(_HEADER)
+    except struct.error:
+        raise ValueError(f"The file at \"{snapshotPath}\" is not a wiring diagram snapshot")
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError(f"The file at \"{snapshotPath}\" is not a wiring diagram snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {version}. This version of the wiring diagram creator reads version {SNAPSHOT_VERSION}")
+
+    stringCount, = reader.read(_COUNT)
+    strings = []
+    for _ in range(stringCount):
+        length, = reader.read(_STRING_LENGTH)
+        strings.append(reader.readBytes(length).decode("utf-8"))
+
+    framedTextRecords = reader.readRecords(_FRAMED_TEXT)
+    componentRowRecords = reader.readRecords(_COMPONENT_ROW)
+    componentRecords = reader.readRecords(_COMPONENT)
+    pinRecords = reader.readRecords(_PIN)
+    wireRecords = reader.readRecords(_WIRE)
+    segmentCount, = reader.read(_COUNT)
+    segments = _floatArrayFromBytes(reader.readBytes(segmentCount * 4))
+
+    diagram = BaseWiringDiagram(xResolution, yResolution)
+    diagram.setControllerLayout(numberOfControllers, controllerColumns)
+    diagram.addComponentRows()
+    for textIndex, fontSize, x, y, padding in framedTextRecords:
+        diagram.createFramedText(strings[textIndex], fontSize, (x, y), padding)
+    # the rows are laid out again in the order they were drawn, which gives every slot its original key and box
+    for controllerKey, numberOfInputSlots, numberOfOutputSlots in componentRowRecords:
+        diagram.drawComponentRows(numberOfInputSlots, numberOfOutputSlots, controllerKey)
+
+    pinsByComponent = {}
+    for componentIndex, pinNumber, usage, destination, direction, lmX, lmY, rmX, rmY in pinRecords:
+        pinDict = {
+            "Usage": _decodeValue(usage, strings),
+            "LM": Coordinates(f"LM Pin {pinNumber}", lmX, lmY),
+            "RM": Coordinates(f"RM Pin {pinNumber}", rmX, rmY),
+        }
+        if destination != _NO_VALUE:
+            pinDict["PinDestination"] = _decodeValue(destination, strings)
+        if direction != _NO_DIRECTION:
+            pinDict["PinLocation"] = codeToDirection(direction)
+        pinsByComponent.setdefault(componentIndex, {})[pinNumber] = pinDict
+
+    components = []
+    groups = _componentGroups(diagram)
+    for componentIndex, (groupCode, slotKey, label, imagePath, typeName, controllerKey, left, top, right, bottom, centerX, centerY, width, height, rotationAngle, flags) in enumerate(componentRecords):
+        locations, objects = groups[groupCode]
+        if slotKey not in locations and _GROUPS[groupCode] != "controller":
+            # a slot drawn outside of a component row, recorded like drawComponentRectangle records it so repaints keep it
+            diagram.canvas.rectangle([(left, top), (right, bottom)], outline="black", width=2)
+            diagram.displayList.addRectangle(((left, top), (right, bottom)), "black", 2, owner=("slot", _GROUPS[groupCode], slotKey))
+        locations[slotKey] = ((left, top), (right, bottom))
+        objects.setdefault(slotKey, None)
+
+        component = None
+        if flags & 1:
+            centerPoint, dimensions, resize = (int(centerX), int(centerY)), (int(width), int(height)), bool(flags & 2)
+            pins = pinsByComponent.get(componentIndex, {})
+            if strings[typeName]:
+                pinDestinations = {pinNumber: pinDict["PinDestination"] for pinNumber, pinDict in pins.items() if "PinDestination" in pinDict}
+                component = _restoreComponent(strings[typeName], strings[label], pinDestinations, controllerKey if controllerKey >= 0 else None)
+                # the pins follow the image, as they did when the component was first placed
+                diagram.addResizedImage(component, centerPoint, dimensions, rotationAngle=rotationAngle, resize=resize)
+            else:
+                component = SnapshotComponent(strings[label], strings[imagePath], pins, controllerKey if controllerKey >= 0 else None)
+                diagram._pasteComponentImage(component, centerPoint, dimensions, rotationAngle=rotationAngle, resize=resize)
+            objects[slotKey] = component
+            if _GROUPS[groupCode] != "controller":
+                diagram._setRowComponent(component, slotKey, locations)
+        components.append(component)
+
+    for componentIndex, destination, label, firstSegment, segmentCountForWire in wireRecords:
+        wire = WireLines(strings[label])
+        for segmentIndex in range(firstSegment, firstSegment + segmentCountForWire):
+            startX, startY, endX, endY = segments[segmentIndex * 4:segmentIndex * 4 + 4]
+            wire.addSegment(Coordinates("wireStartPoint", startX, startY), Coordinates("wireEndPoint", endX, endY))
+        components[componentIndex].addWire(wire, _decodeValue(destination, strings))
+
+    # the allocation only depends on where the pins are, so it comes out the same as when the diagram was routed
+    diagram.allocateControllerPins()
+
+    if drawWires:
+        diagram.drawWires()
+        if legendFontSize:
+            diagram.fillLegend(fontSize=legendFontSize)
+        if netLabelFontSize:
+            diagram.addNetLabels(fontSize=netLabelFontSize)
+        if supersampling > 1:
+            diagram.setSupersampling(supersampling)
+    else:
+        # repaints use the factor; setSupersampling draws the canvas again once the wires are drawn
+        diagram.supersampling = supersampling
+    return diagram
@@ -0,0 +1,257 @@
+from PIL import Image, ImageDraw, ImageFont
+
+
+class DisplayItem:
+    """
+    One drawing operation kept by a DisplayList.
+    """
+    def __init__(self, kind: str, bounds: tuple[int, int, int, int], owner, arguments: dict):
+        """
+        Creates a new DisplayItem object.
+        Args:
+            kind (str): "line", "rectangle", "text" or "image".
+            bounds (tuple): (left, top, right, bottom) of every pixel the operation can touch.
+            owner: A key identifying what the item belongs to, like a component or one of its wires, or None.
+            arguments (dict): The arguments needed to draw the item again.
+        """
+        self.kind = kind
+        self.bounds = bounds
+        self.owner = owner
+        self.arguments = arguments
+
+    def __repr__(self):
+        return f"DisplayItem({self.kind!r}, {self.bounds}, owner={self.owner!r})"
+
+    def intersects(self, box: tuple[int, int, int, int]):
+        return self.bounds[0] < box[2] and box[0] < self.bounds[2] and self.bounds[1] < box[3] and box[1] < self.bounds[3]
+
+
+class DisplayList:
+    """
+    An ordered record of everything drawn on a wiring diagram.
+
+    Keeping the drawing operations lets any part of the canvas be drawn again on its own: after items are removed or added, repaintRegion() redraws only the pixels inside a box, replay() draws the whole diagram again at another scale, and repaintTiles() redraws the canvas supersampled, tile by tile.
+    """
+    def __init__(self):
+        self.items = []
+        self._fonts = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def getFont(self, fontSize: int):
+        """
+        Returns the default font at a size, loaded once per size and shared by everything drawn through this list.
+        Args:
+            fontSize (int): The font size in pixels.
+        Returns:
+            ImageFont.FreeTypeFont: The font.
+        """
+        if fontSize not in self._fonts:
+            self._fonts[fontSize] = ImageFont.load_default(fontSize)
+        return self._fonts[fontSize]
+
+    def getVerticalTextMask(self, text: str, fontSize: int):
+        """
+        Returns the mask of a text turned a quarter turn counterclockwise, so it reads from bottom to top. The turned text is drawn by pasting a colour through the mask, with the top left of the mask where the text goes.
+        Args:
+            text (str): The text.
+            fontSize (int): The font size in pixels.
+        Returns:
+            Image: The "L" mask, as wide as the text is tall and as tall as it is wide.
+        """
+        font = self.getFont(fontSize)
+        _, _, right, bottom = font.getbbox(text)
+        mask = Image.new("L", (max(1, right), max(1, bottom)), 0)
+        ImageDraw.Draw(mask).text((0, 0), text, fill=255, font=font)
+        return mask.transpose(Image.Transpose.ROTATE_90)
+
+    @staticmethod
+    def _pointsBounds(points, width):
+        xs = [point[0] for point in points]
+        ys = [point[1] for point in points]
+        # a line can spill half its width (rounded up) past its end points
+        spill = width // 2 + 2
+        return (int(min(xs)) - spill, int(min(ys)) - spill, int(max(xs)) + spill + 1, int(max(ys)) + spill + 1)
+
+    def addLine(self, points, fill, width, owner=None):
+        item = DisplayItem("line", self._pointsBounds(points, width), owner, {"points": [tuple(point) for point in points], "fill": fill, "width": width})
+        self.items.append(item)
+        return item
+
+    def addRectangle(self, box, outline, width, owner=None):
+        (left, top), (right, bottom) = box
+        item = DisplayItem("rectangle", self._pointsBounds([(left, top), (right, bottom)], width), owner, {"box": ((left, top), (right, bottom)), "outline": outline, "width": width})
+        self.items.append(item)
+        return item
+
+    def addText(self, position, text, fill, align, fontSize, textBounds, owner=None, angle: int = 0):
+        bounds = (int(textBounds[0]) - 1, int(textBounds[1]) - 1, int(textBounds[2]) + 2, int(textBounds[3]) + 2)
+        item = DisplayItem("text", bounds, owner, {"position": tuple(position), "text": text, "fill": fill, "align": align, "fontSize": fontSize, "angle": angle})
+        self.items.append(item)
+        return item
+
+    def addImage(self, image: Image.Image, position, owner=None, mask: Image.Image = None):
+        item = DisplayItem("image", (position[0], position[1], position[0] + image.width, position[1] + image.height), owner, {"image": image, "position": tuple(position), "mask": mask})
+        self.items.append(item)
+        return item
+
+    def removeOwner(self, owner):
+        """
+        Removes every item belonging to an owner.
+        Returns:
+            list: The bounds of the removed items.
+        """
+        removedBounds = [item.bounds for item in self.items if item.owner == owner]
+        self.items = [item for item in self.items if item.owner != owner]
+        return removedBounds
+
+    def getOwnerBounds(self, owner):
+        """
+        Returns the bounds of every item belonging to an owner.
+        """
+        return [item.bounds for item in self.items if item.owner == owner]
+
+    def drawItem(self, item: DisplayItem, image: Image.Image, draw: ImageDraw.ImageDraw, offset=(0, 0), scale: int = 1):
+        """
+        Draws a single item onto an image.
+        Args:
+            item (DisplayItem): The item to draw.
+            image (Image): The image to draw onto.
+            draw (ImageDraw): A drawing context for the image.
+            offset (tuple): Subtracted from every diagram coordinate before scaling, so a tile can be drawn.
+            scale (int): Multiplies every coordinate and line width. Each diagram pixel becomes a scale x scale block, so lines and rectangles cover the blocks of the pixels they covered.
+        """
+        def transform(point):
+            return ((point[0] - offset[0]) * scale, (point[1] - offset[1]) * scale)
+
+        # line points are pixel centres, which sit in the middle of their block
+        centre = (scale - 1) / 2
+        arguments = item.arguments
+        if item.kind == "line":
+            draw.line([(x + centre, y + centre) for x, y in map(transform, arguments["points"])], fill=arguments["fill"], width=arguments["width"] * scale)
+        elif item.kind == "rectangle":
+            # the corners are the first and last pixel of the outline, so the far corner takes the last pixel of its block
+            (left, top), (right, bottom) = map(transform, arguments["box"])
+            draw.rectangle([(left, top), (right + scale - 1, bottom + scale - 1)], outline=arguments["outline"], width=arguments["width"] * scale)
+        elif item.kind == "text" and arguments.get("angle", 0) == 90:
+            position = transform(arguments["position"])
+            image.paste(arguments["fill"], (int(position[0]), int(position[1])), self.getVerticalTextMask(arguments["text"], arguments["fontSize"] * scale))
+        elif item.kind == "text":
+            fontSize = arguments["fontSize"] * scale
+            draw.text(transform(arguments["position"]), arguments["text"], fill=arguments["fill"], align=arguments["align"], font_size=fontSize, font=self.getFont(fontSize))
+        elif item.kind == "image":
+            sprite = arguments["image"]
+            mask = arguments.get("mask")
+            position = transform(arguments["position"])
+            if scale != 1:
+                # sprites are already smooth; blocky enlargement lets a supersampled tile shrink them back to exactly the same pixels
+                sprite = sprite.resize((sprite.width * scale, sprite.height * scale), Image.Resampling.NEAREST)
+                if mask is not None:
+                    mask = mask.resize(sprite.size, Image.Resampling.NEAREST)
+            image.paste(sprite, (int(position[0]), int(position[1])), mask)
+        else:
+            raise ValueError(f"Unknown display item kind \"{item.kind}\"")
+
+    def replay(self, image: Image.Image, offset=(0, 0), scale: int = 1, box=None):
+        """
+        Draws the items onto an image, in the order they were added.
+        Args:
+            image (Image): The image to draw onto.
+            offset (tuple): Subtracted from every diagram coordinate before scaling.
+            scale (int): Multiplies every coordinate and line width.
+            box (tuple): When given, only items intersecting this (left, top, right, bottom) box are drawn.
+        """
+        draw = ImageDraw.Draw(image)
+        for item in self.items:
+            if box is None or item.intersects(box):
+                self.drawItem(item, image, draw, offset, scale)
+
+    def renderTile(self, items, box: tuple[int, int, int, int], scale: int = 1, background="white", mode: str = "RGB"):
+        """
+        Draws the items that touch a box into a new image the size of the box.
+
+        Above a scale of 1 the box is drawn at scale times its size and shrunk back with Image.reduce, which averages every scale x scale block into one pixel, so the edges of lines and text come out anti-aliased. The tile is the only large image this needs: box width x box height x scale squared pixels.
+        Args:
+            items: The items to draw, in drawing order. Items that do not touch the box are skipped.
+            box (tuple): The (left, top, right, bottom) region of the diagram to draw, in whole pixels.
+            scale (int): The supersampling factor.
+            background: The colour of the tile before anything is drawn.
+            mode (str): The mode of the tile.
+        Returns:
+            Image: The tile.
+        """
+        left, top, right, bottom = box
+        tile = Image.new(mode, ((right - left) * scale, (bottom - top) * scale), background)
+        draw = ImageDraw.Draw(tile)
+        for item in items:
+            if item.intersects(box):
+                self.drawItem(item, tile, draw, (left, top), scale)
+        return tile.reduce(scale) if scale > 1 else tile
+
+    def repaintRegion(self, canvas: Image.Image, box: tuple[int, int, int, int], background="white", scale: int = 1):
+        """
+        Clears a region of the canvas and draws every item that touches it again.
+        Args:
+            canvas (Image): The diagram's canvas.
+            box (tuple): The (left, top, right, bottom) region to repaint.
+            background: The colour the region is cleared to.
+            scale (int): The supersampling factor the region is drawn at, see renderTile.
+        """
+        left, top = max(0, int(box[0])), max(0, int(box[1]))
+        right, bottom = min(canvas.width, int(box[2])), min(canvas.height, int(box[3]))
+        if right <= left or bottom <= top:
+            return
+        canvas.paste(self.renderTile(self.items, (left, top, right, bottom), scale, background, canvas.mode), (left, top))
+
+    def repaintTiles(self, canvas: Image.Image, tileSize: int = 512, scale: int = 1, background="white"):
+        """
+        Draws the whole canvas again, one tileSize x tileSize tile at a time, skipping the tiles no item touches.
+
+        The items are sorted into the tiles they touch in one pass, so each tile only checks its own items, and at most one supersampled tile is held at a time.
+        Args:
+            canvas (Image): The diagram's canvas. Tiles no item touches are left as they are.
+            tileSize (int): The width and height of a tile, in canvas pixels.
+            scale (int): The supersampling factor, see renderTile.
+            background: The colour every drawn tile is cleared to.
+        Returns:
+            int: The number of tiles drawn.
+        """
+        if tileSize <= 0:
+            raise ValueError(f"The tile size must be positive, not {tileSize}")
+        lastColumn, lastRow = (canvas.width - 1) // tileSize, (canvas.height - 1) // tileSize
+        itemsOfTile = {}
+        for item in self.items:
+            left, top, right, bottom = item.bounds
+            for column in range(max(0, int(left) // tileSize), min(lastColumn, int(right) // tileSize) + 1):
+                for row in range(max(0, int(top) // tileSize), min(lastRow, int(bottom) // tileSize) + 1):
+                    itemsOfTile.setdefault((column, row), []).append(item)
+        for (column, row), items in itemsOfTile.items():
+            box = (column * tileSize, row * tileSize, min(canvas.width, (column + 1) * tileSize), min(canvas.height, (row + 1) * tileSize))
+            canvas.paste(self.renderTile(items, box, scale, background, canvas.mode), box[:2])
+        return len(itemsOfTile)
+
+
+def mergeBoxes(boxes):
+    """
+    Merges overlapping (left, top, right, bottom) boxes so every pixel is repainted once.
+    Returns:
+        list: Boxes that do not overlap each other.
+    """
+    merged = []
+    for box in sorted(boxes):
+        box = list(box)
+        index = 0
+        while index < len(merged):
+            other = merged[index]
+            if box[0] <= other[2] and other[0] <= box[2] and box[1] <= other[3] and other[1] <= box[3]:
+                box = [min(box[0], other[0]), min(box[1], other[1]), max(box[2], other[2]), max(box[3], other[3])]
+                merged.pop(index)
+                index = 0
+            else:
+                index += 1
+        merged.append(tuple(box))
+    return merged
@@ -1,5 +1,5 @@
 
-from Coordinates import Coordinates
+from Coordinates import Coordinates, Point
 from math import sqrt, pow
 
 class CellAlreadySetError(Exception):
@@ -46,9 +46,10 @@ class Grid:
 
         distanceBetweenPoints = int(sqrt(pow(end.x - start.x, 2) + pow(end.y - start.y, 2)))
 
+        # one point per pixel, so these use the slotted Point instead of a labelled Coordinates
         points = [start]
         for i in range(1, distanceBetweenPoints):
-            points.append(Coordinates("Point", start.x + int(i * ySlope / distanceBetweenPoints), start.y + int(i * xSlope / distanceBetweenPoints))
+            points.append(Point(start.x + int(i * ySlope / distanceBetweenPoints), start.y + int(i * xSlope / distanceBetweenPoints))
             )
         for point in points:
             self.setPixel(point)
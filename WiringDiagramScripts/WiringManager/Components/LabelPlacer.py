@@ -0,0 +1,304 @@
+import math
+
+from PIL import ImageFont
+
+from DisplayList import DisplayList
+
+
+class SpatialIndex:
+    """
+    A uniform grid of (left, top, right, bottom) boxes for finding what a box overlaps without checking every box.
+
+    Every box is listed in each grid cell it touches, so a query only looks at the boxes in the cells the queried box touches. Diagrams are mostly short wire segments, sprites and small texts, which touch a handful of cells each.
+    """
+    def __init__(self, cellSize: int = 64):
+        """
+        Creates a new, empty SpatialIndex object.
+        Args:
+            cellSize (int): The width and height of a grid cell in pixels. Around the size of a typical box keeps queries cheap.
+        """
+        if cellSize <= 0:
+            raise ValueError(f"The cell size of a spatial index must be positive, not {cellSize}")
+        self.cellSize = cellSize
+        self.boxes = []
+        self.items = []
+        # (column, row) -> indices in self.boxes of every box touching that cell
+        self.cells = {}
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def _cellRange(self, box):
+        cellSize = self.cellSize
+        return range(int(box[0] // cellSize), int(box[2] // cellSize) + 1), range(int(box[1] // cellSize), int(box[3] // cellSize) + 1)
+
+    def insert(self, box, item=None):
+        """
+        Adds a box, and optionally the item it belongs to.
+        """
+        index = len(self.boxes)
+        self.boxes.append(tuple(box))
+        self.items.append(item)
+        columns, rows = self._cellRange(box)
+        for column in columns:
+            for row in rows:
+                self.cells.setdefault((column, row), []).append(index)
+
+    def _candidates(self, box):
+        columns, rows = self._cellRange(box)
+        cells = self.cells
+        seen = set()
+        for column in columns:
+            for row in rows:
+                for index in cells.get((column, row), ()):
+                    if index not in seen:
+                        seen.add(index)
+                        yield index
+
+    def query(self, box):
+        """
+        Returns the (box, item) of every box that overlaps a box.
+        """
+        left, top, right, bottom = box
+        return [(self.boxes[index], self.items[index]) for index in self._candidates(box) if self.boxes[index][0] < right and left < self.boxes[index][2] and self.boxes[index][1] < bottom and top < self.boxes[index][3]]
+
+    def intersects(self, box, looseItems=(), innerBox=None):
+        """
+        Returns True if any box overlaps a box. Stops at the first one found.
+        Args:
+            box (tuple): The (left, top, right, bottom) box to check.
+            looseItems: Items whose boxes only count when they overlap innerBox instead.
+            innerBox (tuple): A box inside box, such as box without its padding. Defaults to box.
+        """
+        left, top, right, bottom = box
+        innerLeft, innerTop, innerRight, innerBottom = innerBox if innerBox is not None else box
+        boxes, items = self.boxes, self.items
+        for index in self._candidates(box):
+            other = boxes[index]
+            if items[index] in looseItems:
+                if other[0] < innerRight and innerLeft < other[2] and other[1] < innerBottom and innerTop < other[3]:
+                    return True
+            elif other[0] < right and left < other[2] and other[1] < bottom and top < other[3]:
+                return True
+        return False
+
+    def overlapArea(self, box, ignoredItems=()):
+        """
+        Returns the total area by which the boxes in the index, other than those of ignoredItems, overlap a box.
+        """
+        left, top, right, bottom = box
+        boxes, items = self.boxes, self.items
+        area = 0
+        for index in self._candidates(box):
+            other = boxes[index]
+            if other[0] < right and left < other[2] and other[1] < bottom and top < other[3] and items[index] not in ignoredItems:
+                area += (min(right, other[2]) - max(left, other[0])) * (min(bottom, other[3]) - max(top, other[1]))
+        return area
+
+
+class PlacedLabel:
+    """
+    A label placed by a LabelPlacer.
+    """
+    def __init__(self, text: str, box: tuple, owner, angle: int = 0, isOverlapping: bool = False, leaderLine: tuple = None):
+        """
+        Creates a new PlacedLabel object.
+        Args:
+            text (str): The label.
+            box (tuple): The (left, top, right, bottom) box the label is drawn in. Its top left is where the text is drawn.
+            owner: What the label belongs to.
+            angle (int): 0 for a level label, 90 for one that reads from bottom to top.
+            isOverlapping (bool): Whether no free place was found, so the label overlaps something.
+            leaderLine (tuple): The (start, end) points of the line from the anchor to a label placed away from it, or None.
+        """
+        self.text = text
+        self.box = box
+        self.owner = owner
+        self.angle = angle
+        self.isOverlapping = isOverlapping
+        self.leaderLine = leaderLine
+
+    def __repr__(self):
+        return f"PlacedLabel({self.text!r}, {self.box}, angle={self.angle}, isOverlapping={self.isOverlapping})"
+
+
+class LabelPlacer:
+    """
+    Places text labels next to points of a diagram without covering anything already drawn or any label placed before.
+
+    Placement is greedy. Each label takes the first free place it finds, one that is inside the canvas and overlaps nothing in the spatial index, looking in this order:
+
+    1. Level, at a few positions around each of its anchor points, in order.
+    2. Turned to read from bottom to top, beside each anchor. This fits labels between the closely spaced vertical runs of wires.
+    3. Level, in rings of positions further out around its first anchors, with a leader line drawn from the anchor to the label.
+
+    If nothing is free, it takes the position that overlaps the least among the first MAX_SCORED_CANDIDATES of the first two steps. Every placed label and leader line is added to the index, so later labels avoid them.
+    """
+    # how many blocked positions are scored for the last fallback; in a crowded diagram nearly every position is blocked, and scoring them all costs far more than it gains
+    MAX_SCORED_CANDIDATES = 24
+    # where a label may sit around its anchor, as the fraction of its width and height the anchor is from its top left, tried in this order
+    POSITIONS = (
+        (0.0, 0.5),   # right of the anchor
+        (1.0, 0.5),   # left of the anchor
+        (0.5, 1.0),   # above the anchor
+        (0.5, 0.0),   # below the anchor
+        (0.0, 1.0),   # above and to the right
+        (1.0, 1.0),   # above and to the left
+        (0.0, 0.0),   # below and to the right
+        (1.0, 0.0),   # below and to the left
+    )
+    # where a turned label may sit: beside the anchor, centred on it
+    VERTICAL_POSITIONS = (
+        (0.0, 0.5),   # right of the anchor
+        (1.0, 0.5),   # left of the anchor
+    )
+    # the leader line search: rings RING_STEP pixels apart around each of the first LEADER_ANCHORS anchors, each with RING_POSITIONS positions
+    MAX_RINGS = 20
+    RING_STEP = 24
+    RING_POSITIONS = 16
+    LEADER_ANCHORS = 2
+
+    def __init__(self, canvasSize: tuple, fontSize: int = 14, gap: int = 4, spatialIndex: SpatialIndex = None, font=None):
+        """
+        Creates a new LabelPlacer object.
+        Args:
+            canvasSize (tuple): The (width, height) labels must stay inside.
+            fontSize (int): The font size labels are measured at.
+            gap (int): The space in pixels left between a label and its anchor, and around every label.
+            spatialIndex (SpatialIndex): Everything already drawn. Defaults to an empty index.
+            font: The font labels are measured with. Defaults to the default font at fontSize.
+        """
+        self.canvasSize = canvasSize
+        self.fontSize = fontSize
+        self.gap = gap
+        self.spatialIndex = spatialIndex if spatialIndex is not None else SpatialIndex()
+        self.font = font if font is not None else ImageFont.load_default(fontSize)
+        # every PlacedLabel, in placement order
+        self.placedLabels = []
+
+    @staticmethod
+    def fromDisplayList(displayList: DisplayList, canvasSize: tuple, fontSize: int = 14, gap: int = 4, cellSize: int = 64):
+        """
+        Creates a LabelPlacer that avoids everything recorded in a diagram's display list.
+
+        Rectangles are added as their four edges, since only their outline is drawn; lines, texts and sprites are added as their bounds.
+        """
+        spatialIndex = SpatialIndex(cellSize)
+        for item in displayList:
+            if item.kind == "rectangle":
+                left, top, right, bottom = item.bounds
+                edgeWidth = item.arguments["width"] + 2
+                spatialIndex.insert((left, top, right, top + edgeWidth), item.owner)
+                spatialIndex.insert((left, bottom - edgeWidth, right, bottom), item.owner)
+                spatialIndex.insert((left, top, left + edgeWidth, bottom), item.owner)
+                spatialIndex.insert((right - edgeWidth, top, right, bottom), item.owner)
+            else:
+                spatialIndex.insert(item.bounds, item.owner)
+        return LabelPlacer(canvasSize, fontSize, gap, spatialIndex, displayList.getFont(fontSize))
+
+    def measure(self, text: str):
+        """
+        Returns the (width, height) a text is drawn at, from its drawing position to the bottom right of its ink.
+        """
+        _, _, right, bottom = self.font.getbbox(text)
+        return (right, bottom)
+
+    @staticmethod
+    def getSegmentAnchors(segments, spacing: int = 40):
+        """
+        Returns the anchor points along a run of segments: the middle of every segment first, in segment order, then points every spacing pixels along each segment.
+        Args:
+            segments: The ((x, y), (x, y)) end points of every segment, most preferred first.
+            spacing (int): The distance in pixels between the points along a segment.
+        """
+        anchors = [((start[0] + end[0]) / 2, (start[1] + end[1]) / 2) for start, end in segments]
+        for start, end in segments:
+            length = math.hypot(end[0] - start[0], end[1] - start[1])
+            for step in range(1, int(length // spacing)):
+                fraction = step * spacing / length
+                anchors.append((start[0] + (end[0] - start[0]) * fraction, start[1] + (end[1] - start[1]) * fraction))
+        return anchors
+
+    def _candidateBoxes(self, anchor, size, positions):
+        width, height = size
+        gap = self.gap
+        for fractionX, fractionY in positions:
+            # the label is pushed a gap away from the anchor on every side it does not straddle
+            offsetX = -fractionX * width + (gap if fractionX == 0.0 else -gap if fractionX == 1.0 else 0)
+            offsetY = -fractionY * height + (gap if fractionY == 0.0 else -gap if fractionY == 1.0 else 0)
+            # whole pixels, so the label is drawn the same in every tile it is repainted in
+            left, top = round(anchor[0] + offsetX), round(anchor[1] + offsetY)
+            yield (left, top, left + width, top + height)
+
+    def _ringBoxes(self, anchor, size):
+        width, height = size
+        for ring in range(1, LabelPlacer.MAX_RINGS + 1):
+            radius = ring * LabelPlacer.RING_STEP
+            for position in range(LabelPlacer.RING_POSITIONS):
+                angle = 2 * math.pi * position / LabelPlacer.RING_POSITIONS
+                cosine, sine = math.cos(angle), math.sin(angle)
+                # the side of the label facing the anchor sits on the ring
+                left = round(anchor[0] + radius * cosine - (1 - cosine) / 2 * width)
+                top = round(anchor[1] + radius * sine - (1 - sine) / 2 * height)
+                yield (left, top, left + width, top + height)
+
+    def _isInsideCanvas(self, box):
+        return box[0] >= 0 and box[1] >= 0 and box[2] <= self.canvasSize[0] and box[3] <= self.canvasSize[1]
+
+    def place(self, text: str, anchors: list, owner=None, anchorOwners=()):
+        """
+        Finds a free place for a label near one of its anchors and reserves it.
+        Args:
+            text (str): The label.
+            anchors (list): (x, y) points the label may be placed next to, most preferred first.
+            owner: What the label belongs to, stored with its box in the spatial index.
+            anchorOwners: The owners of what the anchors lie on, such as the label's own wire. The label may come within the gap of these, though never cover them.
+        Returns:
+            PlacedLabel: Where to draw the label, or None if there were no anchors.
+        """
+        if not anchors:
+            return None
+        width, height = self.measure(text)
+        gap = self.gap
+        # the first blocked positions, (box, angle), scored only if nothing free turns up
+        blockedCandidates = []
+        for angle, size, positions in ((0, (width, height), LabelPlacer.POSITIONS), (90, (height, width), LabelPlacer.VERTICAL_POSITIONS)):
+            for anchor in anchors:
+                for box in self._candidateBoxes(anchor, size, positions):
+                    if not self._isInsideCanvas(box):
+                        continue
+                    if not self.spatialIndex.intersects((box[0] - gap, box[1] - gap, box[2] + gap, box[3] + gap), anchorOwners, box):
+                        return self._reserve(PlacedLabel(text, box, owner, angle))
+                    if len(blockedCandidates) < LabelPlacer.MAX_SCORED_CANDIDATES:
+                        blockedCandidates.append((box, angle))
+
+        for anchor in anchors[:LabelPlacer.LEADER_ANCHORS]:
+            for box in self._ringBoxes(anchor, (width, height)):
+                if self._isInsideCanvas(box) and not self.spatialIndex.intersects((box[0] - gap, box[1] - gap, box[2] + gap, box[3] + gap), anchorOwners, box):
+                    # the leader runs from the anchor to the nearest point of the label
+                    end = (min(max(anchor[0], box[0]), box[2]), min(max(anchor[1], box[1]), box[3]))
+                    return self._reserve(PlacedLabel(text, box, owner, leaderLine=(anchor, end)))
+
+        if blockedCandidates:
+            bestBox, bestAngle = min(blockedCandidates, key=lambda candidate: self.spatialIndex.overlapArea((candidate[0][0] - gap, candidate[0][1] - gap, candidate[0][2] + gap, candidate[0][3] + gap), anchorOwners))
+        else:
+            # every candidate left the canvas; the first one is clamped back inside
+            box = next(self._candidateBoxes(anchors[0], (width, height), LabelPlacer.POSITIONS))
+            left = min(max(0, box[0]), max(0, self.canvasSize[0] - width))
+            top = min(max(0, box[1]), max(0, self.canvasSize[1] - height))
+            bestBox, bestAngle = (left, top, left + width, top + height), 0
+        return self._reserve(PlacedLabel(text, bestBox, owner, bestAngle, isOverlapping=True))
+
+    def _reserve(self, placedLabel: PlacedLabel):
+        owner = placedLabel.owner
+        self.spatialIndex.insert(placedLabel.box, owner)
+        if placedLabel.leaderLine is not None:
+            # a slanted leader is reserved as a chain of small boxes along it, so its bounding box does not block everything around it
+            (startX, startY), (endX, endY) = placedLabel.leaderLine
+            pieces = max(1, math.ceil(math.hypot(endX - startX, endY - startY) / 8))
+            for piece in range(pieces):
+                x0, y0 = startX + (endX - startX) * piece / pieces, startY + (endY - startY) * piece / pieces
+                x1, y1 = startX + (endX - startX) * (piece + 1) / pieces, startY + (endY - startY) * (piece + 1) / pieces
+                self.spatialIndex.insert((min(x0, x1) - 1, min(y0, y1) - 1, max(x0, x1) + 1, max(y0, y1) + 1), owner)
+        self.placedLabels.append(placedLabel)
+        return placedLabel
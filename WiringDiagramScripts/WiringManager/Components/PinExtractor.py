@@ -0,0 +1,342 @@
+"""
+Finds the pins of a component image and writes a draft component definition for it.
+
+Two kinds of pins are recognised, both from connected components of the image's foreground (pixels that are opaque and not near-white):
+
+    legs    straight strokes or bars, like the leads of an LED or a button, that are attached to the drawing at one end and end in a free tip at the other. The tip gives the pin's side.
+    pads    small square outlines, like the numbered pins of a header. Their side is the half of the image they are in.
+
+Pins are numbered in reading order. The draft is written in the ComponentLibrary JSON format with every "Usage" left null, to be filled in by hand before the draft is moved into ComponentDefinitions.
+
+Usage:
+    python PinExtractor.py <image or image directory> [output directory] [--workers N]
+"""
+
+import multiprocessing
+import os
+import re
+import time
+
+import numpy as np
+from PIL import Image
+
+from ComponentLibrary import ComponentLibrary
+
+DEFAULT_OUTPUT_DIRECTORY = os.path.join(ComponentLibrary.DEFAULT_DEFINITION_DIRECTORY, "Drafts")
+
+
+def _runLengths(mask: np.ndarray):
+    """
+    Returns, for every pixel, the length of the horizontal run of equal pixels it is part of.
+    """
+    height, width = mask.shape
+    # a column of a value no pixel has separates the rows, so runs never wrap from one row into the next
+    padded = np.full((height, width + 1), 2, dtype=np.int8)
+    padded[:, :width] = mask
+    flat = padded.ravel()
+    runIds = np.concatenate(([0], np.cumsum(flat[1:] != flat[:-1])))
+    lengths = np.bincount(runIds)
+    return lengths[runIds].reshape(height, width + 1)[:, :width]
+
+
+def labelComponents(mask: np.ndarray):
+    """
+    Labels the 8-connected components of a boolean mask.
+
+    The mask is split into horizontal runs, runs of neighbouring rows that touch are paired with two sorted searches, and the pairs are merged by propagating the smallest label with pointer jumping, so no step loops over pixels in Python.
+    Returns:
+        tuple: An int32 array of labels (0 for background, 1..count for the components) and the count.
+    """
+    height, width = mask.shape
+    paddedWidth = width + 2
+    padded = np.zeros((height, paddedWidth), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    steps = np.diff(padded, axis=1)
+    runRows, runStarts = np.nonzero(steps == 1)
+    _, runEnds = np.nonzero(steps == -1)
+    runCount = len(runStarts)
+    labels = np.zeros((height, width), dtype=np.int32)
+    if runCount == 0:
+        return labels, 0
+
+    # run i of row r touches run j of row r - 1 when start_i <= end_j and start_j <= end_i (ends exclusive, diagonals count)
+    startKeys = runRows * paddedWidth + runStarts
+    endKeys = runRows * paddedWidth + runEnds
+    first = np.searchsorted(endKeys, (runRows - 1) * paddedWidth + runStarts, side="left")
+    last = np.searchsorted(startKeys, (runRows - 1) * paddedWidth + runEnds, side="right")
+    pairCounts = np.maximum(last - first, 0)
+    current = np.repeat(np.arange(runCount), pairCounts)
+    pairOffsets = np.arange(pairCounts.sum()) - np.repeat(np.cumsum(pairCounts) - pairCounts, pairCounts)
+    previous = np.repeat(first, pairCounts) + pairOffsets
+
+    runLabels = np.arange(runCount)
+    while True:
+        smallest = np.minimum(runLabels[current], runLabels[previous])
+        updated = runLabels.copy()
+        np.minimum.at(updated, current, smallest)
+        np.minimum.at(updated, previous, smallest)
+        updated = updated[updated]
+        if np.array_equal(updated, runLabels):
+            break
+        runLabels = updated
+
+    _, componentOfRun = np.unique(runLabels, return_inverse=True)
+    runLengths = runEnds - runStarts
+    pixelRows = np.repeat(runRows, runLengths)
+    pixelColumns = np.repeat(runStarts, runLengths) + np.arange(runLengths.sum()) - np.repeat(np.cumsum(runLengths) - runLengths, runLengths)
+    labels[pixelRows, pixelColumns] = np.repeat(componentOfRun + 1, runLengths)
+    return labels, int(componentOfRun.max()) + 1
+
+
+def _componentBoxes(labels: np.ndarray, count: int):
+    """
+    Returns the inclusive (left, top, right, bottom) box and pixel count of every labelled component, as arrays indexed by label - 1.
+    """
+    rows, columns = np.nonzero(labels)
+    componentIndexes = labels[rows, columns] - 1
+    boxes = np.empty((count, 4), dtype=np.int64)
+    boxes[:, 0:2] = np.iinfo(np.int64).max
+    boxes[:, 2:4] = -1
+    np.minimum.at(boxes[:, 0], componentIndexes, columns)
+    np.minimum.at(boxes[:, 1], componentIndexes, rows)
+    np.maximum.at(boxes[:, 2], componentIndexes, columns)
+    np.maximum.at(boxes[:, 3], componentIndexes, rows)
+    return boxes, np.bincount(componentIndexes, minlength=count)
+
+
+def _typeNameFromFileName(fileName: str):
+    # "BasicButton.png" -> "Basic Button", "PiGPIOImage.png" -> "Pi GPIO Image"
+    stem = os.path.splitext(fileName)[0]
+    return " ".join(re.findall(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+", stem)) or stem
+
+
+class PinExtractor:
+    """
+    Detects pin legs and pads in component images.
+    """
+    def __init__(self, backgroundLevel: int = 192, legLengthFraction: float = 0.08, legWidthFraction: float = 0.08, minimumPadSize: int = 12):
+        """
+        Creates a new PinExtractor object.
+        Args:
+            backgroundLevel (int): Opaque pixels whose darkest channel is at least this bright count as background.
+            legLengthFraction (float): The shortest leg, as a fraction of the image's longer side.
+            legWidthFraction (float): The widest leg, as a fraction of the image's shorter side.
+            minimumPadSize (int): The smallest pad side in pixels, so letters like "o" are not taken for pads.
+        """
+        self.backgroundLevel = backgroundLevel
+        self.legLengthFraction = legLengthFraction
+        self.legWidthFraction = legWidthFraction
+        self.minimumPadSize = minimumPadSize
+
+    def foregroundMask(self, image: Image.Image):
+        """
+        Returns a boolean array of the pixels that are part of the drawing.
+        """
+        pixels = np.asarray(image.convert("RGBA"))
+        darkest = np.minimum(np.minimum(pixels[:, :, 0], pixels[:, :, 1]), pixels[:, :, 2])
+        return (pixels[:, :, 3] >= 128) & (darkest < self.backgroundLevel)
+
+    def _findLegs(self, mask: np.ndarray, isVertical: bool):
+        """
+        Finds the legs running along one axis. Horizontal legs are found by transposing the mask, so only vertical legs are described here.
+        Returns:
+            list: (left, top, right, bottom, side) of every leg, inclusive and in the coordinates of the untransposed mask.
+        """
+        if not isVertical:
+            mask = mask.T
+        height, width = mask.shape
+        minimumLength = max(10, round(self.legLengthFraction * max(height, width)))
+        maximumWidth = max(3, round(self.legWidthFraction * min(height, width)))
+
+        # legs drawn as two lines, like the LED's, are filled in: short gaps with the drawing on both sides of them in a row
+        horizontalRuns = _runLengths(mask)
+        hasLeft = np.maximum.accumulate(mask, axis=1)
+        hasRight = np.maximum.accumulate(mask[:, ::-1], axis=1)[:, ::-1]
+        mask = mask | (horizontalRuns <= maximumWidth // 3) & hasLeft & hasRight
+
+        # a leg pixel is in a long vertical run and a short horizontal one; the wide rows of the body split the legs from it
+        verticalRuns = _runLengths(mask.T).T
+        horizontalRuns = _runLengths(mask)
+        legMask = mask & (verticalRuns >= minimumLength) & (horizontalRuns <= maximumWidth)
+        labels, count = labelComponents(legMask)
+        if count == 0:
+            return []
+        boxes, areas = _componentBoxes(labels, count)
+
+        padded = np.zeros((height + 2, width + 2), dtype=bool)
+        padded[1:-1, 1:-1] = mask
+
+        def isFreeEnd(left, right, beyondRow, firstRow, lastRow):
+            # nothing beyond the end and nothing beside its last rows: a tip, not a corner or a joint
+            # (indexes into padded are shifted by one)
+            if padded[beyondRow + 1, left:right + 3].any():
+                return False
+            return not (padded[firstRow + 1:lastRow + 2, left].any() or padded[firstRow + 1:lastRow + 2, right + 2].any())
+
+        legs = []
+        for (left, top, right, bottom), area in zip(boxes.tolist(), areas.tolist()):
+            legLength, legWidth = bottom - top + 1, right - left + 1
+            if legLength < minimumLength or legLength < 2 * legWidth or area < 0.5 * legLength * legWidth:
+                continue
+            tipRows = min(3, legLength)
+            isTopFree = isFreeEnd(left, right, top - 1, top, top + tipRows - 1)
+            isBottomFree = isFreeEnd(left, right, bottom + 1, bottom - tipRows + 1, bottom)
+            if isTopFree == isBottomFree:
+                # a stroke that is attached at both ends is part of the body; one free at both ends is a separate mark
+                continue
+            if isVertical:
+                legs.append((left, top, right, bottom, "UP" if isTopFree else "DOWN"))
+            else:
+                legs.append((top, left, bottom, right, "LEFT" if isTopFree else "RIGHT"))
+        return legs
+
+    def _findPads(self, mask: np.ndarray):
+        """
+        Finds square outlines, like the numbered pins of a header.
+        Returns:
+            list: (left, top, right, bottom, side) of every pad, inclusive.
+        """
+        height, width = mask.shape
+        labels, count = labelComponents(mask)
+        if count == 0:
+            return []
+        boxes, areas = _componentBoxes(labels, count)
+        maximumSize = 0.3 * min(height, width)
+
+        pads = []
+        for label, ((left, top, right, bottom), area) in enumerate(zip(boxes.tolist(), areas.tolist()), start=1):
+            padWidth, padHeight = right - left + 1, bottom - top + 1
+            if min(padWidth, padHeight) < self.minimumPadSize or max(padWidth, padHeight) > maximumSize:
+                continue
+            if not 0.8 <= padWidth / padHeight <= 1.25 or area > 0.5 * padWidth * padHeight:
+                continue
+            # an outline has all four of its edges drawn
+            box = labels[top:bottom + 1, left:right + 1] == label
+            if not (box[0].mean() > 0.8 and box[-1].mean() > 0.8 and box[:, 0].mean() > 0.8 and box[:, -1].mean() > 0.8):
+                continue
+            # pads sit along the long sides of the image
+            if height >= width:
+                side = "LEFT" if (left + right) / 2 < width / 2 else "RIGHT"
+            else:
+                side = "UP" if (top + bottom) / 2 < height / 2 else "DOWN"
+            pads.append((left, top, right, bottom, side))
+        return pads
+
+    def extractPins(self, image: Image.Image):
+        """
+        Finds the pins of a component image.
+        Returns:
+            list: A pin dict per pin in reading order, in the JSON format of ComponentLibrary with "Usage" left null.
+        """
+        mask = self.foregroundMask(image)
+        pins = []
+        for left, top, right, bottom, side in self._findLegs(mask, True) + self._findLegs(mask, False):
+            # the wire attaches to the outer half of a leg, the end away from the body
+            if side == "DOWN":
+                top = (top + bottom) // 2
+            elif side == "UP":
+                bottom = (top + bottom) // 2
+            elif side == "RIGHT":
+                left = (left + right) // 2
+            else:
+                right = (left + right) // 2
+            pins.append((left, top, right, bottom, side))
+        pins.extend(self._findPads(mask))
+
+        # reading order: rows of pins that overlap vertically, left to right within a row
+        pins.sort(key=lambda pin: pin[1])
+        rows = []
+        for pin in pins:
+            if rows and pin[1] <= rows[-1][-1][3]:
+                rows[-1].append(pin)
+            else:
+                rows.append([pin])
+        orderedPins = [pin for row in rows for pin in sorted(row, key=lambda pin: pin[0])]
+
+        return [{"Usage": None, "LM": [left, top], "RM": [right + 1, bottom + 1], "PinLocation": side} for left, top, right, bottom, side in orderedPins]
+
+    def extractDefinition(self, imagePath: str, definitionPath: str):
+        """
+        Builds a draft definition of a component image.
+        Args:
+            imagePath (str): The component image.
+            definitionPath (str): Where the definition will be written; the image path is stored relative to it.
+        Returns:
+            dict: The draft definition.
+        """
+        with Image.open(imagePath) as image:
+            pins = self.extractPins(image)
+        return {
+            "typeName": _typeNameFromFileName(os.path.basename(imagePath)),
+            "imagePath": os.path.relpath(os.path.abspath(imagePath), os.path.dirname(os.path.abspath(definitionPath))).replace(os.sep, "/"),
+            "isPowered": False,
+            "electricalValues": {},
+            "pins": {str(pinNumber): pin for pinNumber, pin in enumerate(pins, start=1)},
+        }
+
+    def writeDraft(self, imagePath: str, outputDirectory: str = None):
+        """
+        Writes the draft definition of an image to <output directory>/<image name>.json.
+        Returns:
+            tuple: The path of the draft and its number of pins.
+        """
+        if outputDirectory is None:
+            outputDirectory = DEFAULT_OUTPUT_DIRECTORY
+        os.makedirs(outputDirectory, exist_ok=True)
+        definitionPath = os.path.join(outputDirectory, os.path.splitext(os.path.basename(imagePath))[0] + ".json")
+        definition = self.extractDefinition(imagePath, definitionPath)
+        if definition["pins"]:
+            # the draft must load once its usages are filled in
+            ComponentLibrary.compileDefinition(definitionPath, definition)
+        ComponentLibrary.writeDefinition(definitionPath, definition)
+        return definitionPath, len(definition["pins"])
+
+    def writeDrafts(self, imageDirectory: str, outputDirectory: str = None, numberOfWorkers: int = None):
+        """
+        Writes a draft definition for every PNG image in a directory, spread over worker processes.
+        Args:
+            imageDirectory (str): The directory of component images.
+            outputDirectory (str): The directory for the drafts. Defaults to ComponentDefinitions/Drafts.
+            numberOfWorkers (int): The number of processes. Defaults to the number of CPUs; 1 runs in this process.
+        Returns:
+            dict: Image path to (draft path, number of pins), or to the error message for images that failed.
+        """
+        imagePaths = sorted(os.path.join(imageDirectory, fileName) for fileName in os.listdir(imageDirectory) if fileName.lower().endswith(".png"))
+        tasks = [(self, imagePath, outputDirectory) for imagePath in imagePaths]
+        if numberOfWorkers is None:
+            numberOfWorkers = min(os.cpu_count() or 1, len(tasks))
+        if numberOfWorkers <= 1:
+            return dict(map(_writeDraftTask, tasks))
+        with multiprocessing.Pool(numberOfWorkers) as pool:
+            return dict(pool.imap_unordered(_writeDraftTask, tasks, chunksize=max(1, len(tasks) // (numberOfWorkers * 4))))
+
+
+def _writeDraftTask(task):
+    extractor, imagePath, outputDirectory = task
+    try:
+        return imagePath, extractor.writeDraft(imagePath, outputDirectory)
+    except ValueError as error:
+        return imagePath, str(error)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Write draft component definitions from component images.")
+    parser.add_argument("imagePath", help="A component image or a directory of them.")
+    parser.add_argument("outputDirectory", nargs="?", default=DEFAULT_OUTPUT_DIRECTORY, help="Where the drafts are written.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for a directory.")
+    arguments = parser.parse_args()
+
+    extractor = PinExtractor()
+    startTime = time.perf_counter()
+    if os.path.isdir(arguments.imagePath):
+        results = extractor.writeDrafts(arguments.imagePath, arguments.outputDirectory, arguments.workers)
+    else:
+        results = dict([_writeDraftTask((extractor, arguments.imagePath, arguments.outputDirectory))])
+    for imagePath, result in sorted(results.items()):
+        if isinstance(result, str):
+            print(f"{imagePath}: {result}")
+        else:
+            print(f"{imagePath}: {result[1]} pins -> {result[0]}")
+    print(f"{len(results)} images in {time.perf_counter() - startTime:.2f} s")
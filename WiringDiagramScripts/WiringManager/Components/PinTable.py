@@ -0,0 +1,419 @@
+from array import array
+from collections.abc import Mapping, MutableMapping
+
+import numpy as np
+
+from AffineTransform import AffineTransform
+from Coordinates import Coordinates
+from Utilities.DirectionEnum import DirectionEnum, SIDES
+
+
+# pin sides are stored as DirectionEnum codes (RIGHT = 0, UP = 1, LEFT = 2, DOWN = 3); -1 means the pin has no side
+NO_DIRECTION = -1
+
+# the columns of PinTable.corners
+LM_X, LM_Y, RM_X, RM_Y = range(4)
+
+# the keys every pin dict is split into; any other key is kept as-is in the pin's extras
+_PIN_KEYS = ("Usage", "LM", "RM", "PinLocation", "PinDestination")
+_MISSING = object()
+
+
+def directionToCode(direction: DirectionEnum):
+    """
+    Returns the integer code of a DirectionEnum, or NO_DIRECTION for None.
+    """
+    if direction is None:
+        return NO_DIRECTION
+    return direction.code
+
+
+def codeToDirection(code: int):
+    """
+    Returns the DirectionEnum for a code made by directionToCode.
+    """
+    return SIDES[code] if code != NO_DIRECTION else None
+
+
+class PinTable:
+    """
+    Structure-of-arrays storage for the pins of a component.
+
+    The LM and RM corners of every pin are kept in one NumPy float32 array of (LM x, LM y, RM x, RM y) rows and the usage and side of every pin as small integer codes, instead of two Coordinates objects and a dict per pin. asPinDict() returns a view that behaves like the pinLMRMCoordinates dict the rest of the code expects, reading and writing through to the arrays.
+    """
+    def __init__(self):
+        self.pinNumbers = array("i")
+        self.rowOfPin = {}
+        self.corners = np.empty((0, 4), dtype=np.float32)
+        self.usageCodes = array("b")
+        self.directionCodes = array("b")
+        # the distinct usages (PinEnums, strings or None); usageCodes index into this list
+        self.usages = []
+        self.destinations = []
+        self.hasDestination = []
+        self.extras = []
+        # the columns still shared with the table this one was made from; each is copied before it is first written
+        self.sharedColumns = set()
+
+    def __len__(self):
+        return len(self.pinNumbers)
+
+    # the coordinate columns, as views that read and write through to self.corners
+    @property
+    def lmX(self):
+        return self.corners[:, LM_X]
+
+    @property
+    def lmY(self):
+        return self.corners[:, LM_Y]
+
+    @property
+    def rmX(self):
+        return self.corners[:, RM_X]
+
+    @property
+    def rmY(self):
+        return self.corners[:, RM_Y]
+
+    def _ownColumn(self, name: str):
+        """
+        Gives this table its own copy of a column it still shares with the table it was made from, so writing it does not change the other table.
+        """
+        if name not in self.sharedColumns:
+            return
+        self.sharedColumns.discard(name)
+        column = getattr(self, name)
+        if name == "corners":
+            setattr(self, name, column.copy())
+        elif name == "extras":
+            setattr(self, name, [dict(extra) for extra in column])
+        else:
+            setattr(self, name, column[:])
+
+    def _usageToCode(self, usage):
+        for code, knownUsage in enumerate(self.usages):
+            if knownUsage is usage or (type(knownUsage) is type(usage) and knownUsage == usage):
+                return code
+        self.usages.append(usage)
+        return len(self.usages) - 1
+
+    def addPin(self, pinNumber: int, pinDict: dict):
+        """
+        Appends a pin to the table.
+        Args:
+            pinNumber (int): The physical pin number of the component.
+            pinDict (dict): A pin dict in the format described by Component.__init__.
+        """
+        if pinNumber in self.rowOfPin:
+            raise ValueError(f"Pin {pinNumber} is already in the pin table")
+        self.rowOfPin[pinNumber] = len(self.pinNumbers)
+        self.pinNumbers.append(pinNumber)
+        self.corners = np.vstack((self.corners, np.array([[pinDict["LM"].x, pinDict["LM"].y, pinDict["RM"].x, pinDict["RM"].y]], dtype=np.float32)))
+        self.usageCodes.append(self._usageToCode(pinDict.get("Usage")))
+        self.directionCodes.append(directionToCode(pinDict.get("PinLocation")))
+        self.destinations.append(pinDict.get("PinDestination"))
+        self.hasDestination.append("PinDestination" in pinDict)
+        self.extras.append({key: value for key, value in pinDict.items() if key not in _PIN_KEYS})
+
+    @staticmethod
+    def fromPinDict(pinLMRMCoordinates: dict):
+        """
+        Builds a pin table from a pinLMRMCoordinates dict.
+        """
+        table = PinTable()
+        for pinNumber, pinDict in pinLMRMCoordinates.items():
+            table.addPin(pinNumber, pinDict)
+        return table
+
+    def copy(self):
+        """
+        Returns a table with its own copy of the coordinate and code arrays.
+        """
+        table = PinTable()
+        table.pinNumbers = array("i", self.pinNumbers)
+        table.rowOfPin = dict(self.rowOfPin)
+        table.corners = self.corners.copy()
+        table.usageCodes = array("b", self.usageCodes)
+        table.directionCodes = array("b", self.directionCodes)
+        table.usages = list(self.usages)
+        table.destinations = list(self.destinations)
+        table.hasDestination = list(self.hasDestination)
+        table.extras = [dict(extra) for extra in self.extras]
+        return table
+
+    def transformed(self, transform: AffineTransform):
+        """
+        Returns a table of the same pins with their corners moved through a transform.
+
+        Only the coordinates and pin sides are copied, and they are read-only in the returned table. The usages, destinations and extras are read from and written to this table, so a change made through either table shows in both.
+        Args:
+            transform (AffineTransform): The transform to apply.
+        """
+        return TransformedPinTable(self, transform)
+
+    def withDestinations(self, pinDestinations: dict = None):
+        """
+        Returns a table that starts out sharing this table's geometry, usages and extras but has its own pin destinations.
+
+        The shared columns are copied the first time the new table writes them, so changing one component's pins never changes its type or the other components of the type.
+        Args:
+            pinDestinations (dict): Physical pin number to the destination that replaces this table's.
+        """
+        table = PinTable()
+        table.pinNumbers = self.pinNumbers
+        table.rowOfPin = self.rowOfPin
+        table.corners = self.corners
+        table.usageCodes = self.usageCodes
+        table.directionCodes = self.directionCodes
+        table.usages = self.usages
+        table.destinations = self.destinations[:]
+        table.hasDestination = self.hasDestination[:]
+        table.extras = self.extras
+        table.sharedColumns = {"corners", "usageCodes", "directionCodes", "usages", "extras"}
+        for pinNumber, destination in (pinDestinations or {}).items():
+            row = self.rowOfPin[pinNumber]
+            table.destinations[row] = destination
+            table.hasDestination[row] = True
+        return table
+
+    def getUsage(self, row: int):
+        return self.usages[self.usageCodes[row]]
+
+    def setUsage(self, row: int, usage):
+        self._ownColumn("usageCodes")
+        self._ownColumn("usages")
+        self.usageCodes[row] = self._usageToCode(usage)
+
+    def setCorner(self, row: int, column: int, value: float):
+        self._ownColumn("corners")
+        self.corners[row, column] = value
+
+    def setDirectionCode(self, row: int, code: int):
+        self._ownColumn("directionCodes")
+        self.directionCodes[row] = code
+
+    def setDestination(self, row: int, destination, hasDestination: bool = True):
+        self.destinations[row] = destination
+        self.hasDestination[row] = hasDestination
+
+    def setExtra(self, row: int, key, value):
+        self._ownColumn("extras")
+        self.extras[row][key] = value
+
+    def deleteExtra(self, row: int, key):
+        self._ownColumn("extras")
+        del self.extras[row][key]
+
+    def applyTransform(self, transform: AffineTransform):
+        """
+        Moves the LM and RM corners of every pin through an affine transform with one matrix multiply over all of them.
+
+        A rotation can turn a pin's box around, so the corners are reordered afterwards to keep LM the top left and RM the bottom right corner.
+        Args:
+            transform (AffineTransform): The transform to apply.
+        """
+        self._ownColumn("corners")
+        a, b, c, d, e, f = transform.coefficients
+        matrix = np.array(((a, b, c), (d, e, f), (0.0, 0.0, 1.0)))
+        # every corner as a homogeneous (x, y, 1) row, worked in float64 and stored back as float32
+        points = np.ones((len(self.corners) * 2, 3))
+        points[:, :2] = self.corners.reshape(-1, 2)
+        moved = (points @ matrix.T)[:, :2].reshape(-1, 2, 2)
+        # writing into the array keeps it, so existing views stay valid
+        self.corners[:, LM_X:LM_Y + 1] = moved.min(axis=1)
+        self.corners[:, RM_X:RM_Y + 1] = moved.max(axis=1)
+
+    def asPinDict(self):
+        """
+        Returns a dict-like view of the table in the pinLMRMCoordinates format.
+        """
+        return PinTableView(self)
+
+
+class TransformedPinTable(PinTable):
+    """
+    A PinTable of the same pins as another table with the corners moved through a transform, made by PinTable.transformed.
+
+    Only the corners and pin sides are its own. The pin numbers, usages, destinations and extras are read from the source table each time and writes to them go to the source table, so they are kept when the table is worked out again for a new transform.
+
+    The corners and pin sides are worked out from the source table and would be lost the next time they are, so writing them raises a TypeError instead.
+    """
+    def __init__(self, source: PinTable, transform: AffineTransform):
+        self.source = source
+        self.corners = source.corners.copy()
+        self.directionCodes = array("b", source.directionCodes)
+        self.sharedColumns = set()
+        self.applyTransform(transform)
+
+    @property
+    def pinNumbers(self):
+        return self.source.pinNumbers
+
+    @property
+    def rowOfPin(self):
+        return self.source.rowOfPin
+
+    @property
+    def usageCodes(self):
+        return self.source.usageCodes
+
+    @property
+    def usages(self):
+        return self.source.usages
+
+    @property
+    def destinations(self):
+        return self.source.destinations
+
+    @property
+    def hasDestination(self):
+        return self.source.hasDestination
+
+    @property
+    def extras(self):
+        return self.source.extras
+
+    def setUsage(self, row: int, usage):
+        self.source.setUsage(row, usage)
+
+    def setCorner(self, row: int, column: int, value: float):
+        raise TypeError(f"The LM and RM corners of pin {self.pinNumbers[row]} are worked out from the component's original image and its transform; set pinLMRMCoordinates to new pins in image coordinates, or place the component again, to move them")
+
+    def setDirectionCode(self, row: int, code: int):
+        raise TypeError(f"The PinLocation of pin {self.pinNumbers[row]} is worked out from the component's original image and its rotation; set pinLMRMCoordinates to new pins in image coordinates to change it")
+
+    def setDestination(self, row: int, destination, hasDestination: bool = True):
+        self.source.setDestination(row, destination, hasDestination)
+
+    def setExtra(self, row: int, key, value):
+        self.source.setExtra(row, key, value)
+
+    def deleteExtra(self, row: int, key):
+        self.source.deleteExtra(row, key)
+
+
+class PinTableCoordinates(Coordinates):
+    """
+    A Coordinates object whose x and y live in a PinTable. Reading and writing x and y go straight to the table's arrays.
+    """
+    def __init__(self, table: PinTable, row: int, corner: str):
+        self._table = table
+        self._row = row
+        self._corner = corner
+        self._xColumn = LM_X if corner == "LM" else RM_X
+
+    # read as Python floats, so callers never see NumPy scalars
+    @property
+    def x(self):
+        return float(self._table.corners[self._row, self._xColumn])
+
+    @x.setter
+    def x(self, newX):
+        self._table.setCorner(self._row, self._xColumn, newX)
+
+    @property
+    def y(self):
+        return float(self._table.corners[self._row, self._xColumn + 1])
+
+    @y.setter
+    def y(self, newY):
+        self._table.setCorner(self._row, self._xColumn + 1, newY)
+
+    @property
+    def label(self):
+        return f"{self._corner} Pin {self._table.pinNumbers[self._row]}"
+
+    @label.setter
+    def label(self, newLabel):
+        # labels are derived from the pin number; they are not stored per pin
+        pass
+
+
+class PinEntryView(MutableMapping):
+    """
+    The dict of a single pin ("Usage", "LM", "RM", "PinLocation", "PinDestination" and any extra keys), backed by a PinTable row.
+    """
+    def __init__(self, table: PinTable, row: int):
+        self._table = table
+        self._row = row
+
+    def _keys(self):
+        keys = ["Usage", "LM", "RM"]
+        if self._table.directionCodes[self._row] != NO_DIRECTION:
+            keys.append("PinLocation")
+        if self._table.hasDestination[self._row]:
+            keys.append("PinDestination")
+        keys.extend(self._table.extras[self._row])
+        return keys
+
+    def __getitem__(self, key):
+        table, row = self._table, self._row
+        if key == "Usage":
+            return table.getUsage(row)
+        if key == "LM" or key == "RM":
+            return PinTableCoordinates(table, row, key)
+        if key == "PinLocation" and table.directionCodes[row] != NO_DIRECTION:
+            return codeToDirection(table.directionCodes[row])
+        if key == "PinDestination" and table.hasDestination[row]:
+            return table.destinations[row]
+        value = table.extras[row].get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        table, row = self._table, self._row
+        if key == "Usage":
+            table.setUsage(row, value)
+        elif key == "LM" or key == "RM":
+            corner = PinTableCoordinates(table, row, key)
+            corner.x, corner.y = value.x, value.y
+        elif key == "PinLocation":
+            table.setDirectionCode(row, directionToCode(value))
+        elif key == "PinDestination":
+            table.setDestination(row, value)
+        else:
+            table.setExtra(row, key, value)
+
+    def __delitem__(self, key):
+        table, row = self._table, self._row
+        if key == "PinLocation" and table.directionCodes[row] != NO_DIRECTION:
+            table.setDirectionCode(row, NO_DIRECTION)
+        elif key == "PinDestination" and table.hasDestination[row]:
+            table.setDestination(row, None, False)
+        elif key in table.extras[row]:
+            table.deleteExtra(row, key)
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class PinTableView(Mapping):
+    """
+    A read-only mapping of pin number to PinEntryView, standing in for the pinLMRMCoordinates dict.
+    """
+    def __init__(self, table: PinTable):
+        self.pinTable = table
+
+    def __getitem__(self, pinNumber):
+        return PinEntryView(self.pinTable, self.pinTable.rowOfPin[pinNumber])
+
+    def __iter__(self):
+        return iter(self.pinTable.pinNumbers)
+
+    def __len__(self):
+        return len(self.pinTable)
+
+    def __contains__(self, pinNumber):
+        return pinNumber in self.pinTable.rowOfPin
+
+    def __repr__(self):
+        return repr({pinNumber: self[pinNumber] for pinNumber in self})
@@ -0,0 +1,293 @@
+"""
+Orders the components of a row so their wires to the controller are short and cross as little as possible.
+
+The controller's pins run along the middle of the diagram, so a row is best ordered by where on the controller each component's wires end: the barycenter (mean) or median x of its controller pins. That order can be refined by simulated annealing on the total Manhattan wire length plus a penalty per crossing, with independent restarts run in parallel worker processes.
+"""
+
+import math
+import multiprocessing
+import os
+import random
+
+from AffineTransform import AffineTransform
+from Component import Component
+from ControllerPinAllocator import ControllerPinAllocator
+
+
+class PlacementCosts:
+    """
+    The wire length and crossing cost of every way to put a row's components in its slots.
+
+    Only holds numbers, so it can be sent to worker processes. Components are referred to by their index in the list the costs were built from, and slots by their index in the row. An assignment is a list holding the slot of every component.
+    """
+    def __init__(self, lengthCosts: list, slotXs: list, wireComponents: list, wireOffsetXs: list, wireTargetXs: list, crossingWeight: float):
+        """
+        Creates a new PlacementCosts object. Use PlacementOptimizer.buildCosts() rather than calling this directly.
+        Args:
+            lengthCosts (list): lengthCosts[component][slot] is the Manhattan length of the component's wires from that slot.
+            slotXs (list): The x of the center of every slot.
+            wireComponents (list): The component of every wire that ends on a known controller pin.
+            wireOffsetXs (list): The x of every such wire's pin, relative to the center of its component's slot.
+            wireTargetXs (list): The x of every such wire's controller pin.
+            crossingWeight (float): The wire length a single crossing costs as much as.
+        """
+        self.lengthCosts = lengthCosts
+        self.slotXs = slotXs
+        self.wireComponents = wireComponents
+        self.wireOffsetXs = wireOffsetXs
+        self.wireTargetXs = wireTargetXs
+        self.crossingWeight = crossingWeight
+        self.wiresOfComponent = [[] for _ in lengthCosts]
+        for wire, component in enumerate(wireComponents):
+            self.wiresOfComponent[component].append(wire)
+
+    @property
+    def numberOfComponents(self):
+        return len(self.lengthCosts)
+
+    @property
+    def numberOfSlots(self):
+        return len(self.slotXs)
+
+    def wireLength(self, assignment: list):
+        return sum(self.lengthCosts[component][slot] for component, slot in enumerate(assignment))
+
+    def crossings(self, assignment: list):
+        """
+        Counts the pairs of wires, from different components, that swap order between the row and the controller.
+        """
+        pinXs = [self.slotXs[assignment[component]] + offsetX for component, offsetX in zip(self.wireComponents, self.wireOffsetXs)]
+        # sorting the wires by where they leave the row, the crossings are the inversions of their controller order
+        order = sorted(range(len(pinXs)), key=pinXs.__getitem__)
+        count = 0
+        for position, wire in enumerate(order):
+            for otherWire in order[position + 1:]:
+                if pinXs[otherWire] > pinXs[wire] and self.wireTargetXs[otherWire] < self.wireTargetXs[wire] and self.wireComponents[otherWire] != self.wireComponents[wire]:
+                    count += 1
+        return count
+
+    def cost(self, assignment: list):
+        return self.wireLength(assignment) + self.crossingWeight * self.crossings(assignment)
+
+    def _crossingsOfComponents(self, components: tuple, assignment: list):
+        # crossings between the wires of the given components and every other wire, counting pairs within the group once
+        slotXs, offsetXs, targetXs, wireComponents = self.slotXs, self.wireOffsetXs, self.wireTargetXs, self.wireComponents
+        count = 0
+        for component in components:
+            for wire in self.wiresOfComponent[component]:
+                pinX = slotXs[assignment[component]] + offsetXs[wire]
+                targetX = targetXs[wire]
+                for otherWire, otherComponent in enumerate(wireComponents):
+                    if otherComponent == component or (otherComponent in components and otherComponent < component):
+                        continue
+                    if (pinX - slotXs[assignment[otherComponent]] - offsetXs[otherWire]) * (targetX - targetXs[otherWire]) < 0:
+                        count += 1
+        return count
+
+    def anneal(self, assignment: list, iterations: int, seed: int = None):
+        """
+        Refines an assignment by simulated annealing. Each step swaps the slots of two components, or moves one to an empty slot, and is kept if it lowers the cost or, with a probability that falls as the row cools, even if it does not.
+        Args:
+            assignment (list): The slot of every component to start from.
+            iterations (int): The number of steps.
+            seed (int): Seeds the random moves, so a run can be repeated.
+        Returns:
+            tuple: The cost and the best assignment found.
+        """
+        randomGenerator = random.Random(seed)
+        assignment = list(assignment)
+        componentInSlot = [None] * self.numberOfSlots
+        for component, slot in enumerate(assignment):
+            componentInSlot[slot] = component
+        if self.numberOfComponents < 2 or iterations <= 0:
+            return self.cost(assignment), assignment
+
+        def moveDelta(firstSlot, secondSlot):
+            moved = tuple(component for component in (componentInSlot[firstSlot], componentInSlot[secondSlot]) if component is not None)
+            before = sum(self.lengthCosts[component][assignment[component]] for component in moved) + self.crossingWeight * self._crossingsOfComponents(moved, assignment)
+            swap(firstSlot, secondSlot)
+            after = sum(self.lengthCosts[component][assignment[component]] for component in moved) + self.crossingWeight * self._crossingsOfComponents(moved, assignment)
+            return after - before
+
+        def swap(firstSlot, secondSlot):
+            firstComponent, secondComponent = componentInSlot[firstSlot], componentInSlot[secondSlot]
+            componentInSlot[firstSlot], componentInSlot[secondSlot] = secondComponent, firstComponent
+            if firstComponent is not None:
+                assignment[firstComponent] = secondSlot
+            if secondComponent is not None:
+                assignment[secondComponent] = firstSlot
+
+        def randomMove():
+            firstSlot = assignment[randomGenerator.randrange(self.numberOfComponents)]
+            secondSlot = randomGenerator.randrange(self.numberOfSlots - 1)
+            return firstSlot, secondSlot + (secondSlot >= firstSlot)
+
+        # the starting temperature accepts a typical uphill move about half of the time
+        sampledDeltas = []
+        for _ in range(min(50, iterations)):
+            firstSlot, secondSlot = randomMove()
+            sampledDeltas.append(abs(moveDelta(firstSlot, secondSlot)))
+            swap(firstSlot, secondSlot)
+        temperature = max(sum(sampledDeltas) / len(sampledDeltas), 1e-9) / math.log(2)
+        coolingRate = 1e-3 ** (1 / iterations)
+
+        currentCost = self.cost(assignment)
+        bestCost, bestAssignment = currentCost, list(assignment)
+        for _ in range(iterations):
+            firstSlot, secondSlot = randomMove()
+            delta = moveDelta(firstSlot, secondSlot)
+            if delta <= 0 or randomGenerator.random() < math.exp(-delta / temperature):
+                currentCost += delta
+                if currentCost < bestCost - 1e-9:
+                    bestCost, bestAssignment = currentCost, list(assignment)
+            else:
+                swap(firstSlot, secondSlot)
+            temperature *= coolingRate
+        return bestCost, bestAssignment
+
+
+def _annealTask(task):
+    costs, assignment, iterations, seed = task
+    return costs.anneal(assignment, iterations, seed)
+
+
+class PlacementOptimizer:
+    """
+    Chooses the slot of every component of a row before the components are placed.
+
+    The controller must already be placed, since the slots are ordered by where its pins are on the canvas.
+    """
+    METHODS = ("barycenter", "median", "anneal")
+
+    def __init__(self, controller: Component, slotBoxes: list, rotationAngle: int = 0, crossingWeight: float = None):
+        """
+        Creates a new PlacementOptimizer object.
+        Args:
+            controller (Component): The placed controller the row's components are wired to.
+            slotBoxes (list): The (topLeft, bottomRight) box of every slot of the row, in slot order.
+            rotationAngle (int): The rotation the row's component images are placed with.
+            crossingWeight (float): The wire length one crossing costs as much as. Defaults to the distance between the centers of two neighbouring slots.
+        """
+        self.controller = controller
+        self.slotBoxes = list(slotBoxes)
+        self.rotationAngle = rotationAngle
+        self.slotCenters = [((topLeft[0] + bottomRight[0]) / 2, (topLeft[1] + bottomRight[1]) / 2) for topLeft, bottomRight in self.slotBoxes]
+        if crossingWeight is None:
+            slotXs = sorted(set(x for x, _ in self.slotCenters))
+            crossingWeight = min((right - left for left, right in zip(slotXs, slotXs[1:])), default=0)
+        self.crossingWeight = crossingWeight
+
+        controllerPins = controller.pinLMRMCoordinates
+        self.controllerPinCenters = {}
+        for pinNumber, pinDict in controllerPins.items():
+            center = Component._determinePinCenter(pinDict["LM"], pinDict["RM"])
+            self.controllerPinCenters[pinNumber] = (center.x, center.y)
+        # power and ground pins can end on any controller pin of their usage
+        self.candidatePins = ControllerPinAllocator.getCandidatePins(controller)
+
+    def _wiresOf(self, component: Component):
+        """
+        Returns the (offset x, offset y, controller pin centers) of every wire of a component, with the pin's position relative to the center of whatever slot the component is put in.
+        """
+        topLeft, bottomRight = self.slotBoxes[0]
+        slotSize = (bottomRight[0] - topLeft[0], bottomRight[1] - topLeft[1])
+        # every slot of a row has the same size, so a pin sits at the same offset from the center of any slot
+        transform = AffineTransform.placement(component.getImageDimensions(), slotSize, self.rotationAngle, (-slotSize[0] / 2, -slotSize[1] / 2))
+        wires = []
+        for pinDict in component.pinLMRMCoordinates.values():
+            destination = pinDict.get("PinDestination")
+            if destination in self.controllerPinCenters:
+                targets = [self.controllerPinCenters[destination]]
+            elif destination in self.candidatePins:
+                targets = [self.controllerPinCenters[pinNumber] for pinNumber in self.candidatePins[destination]]
+            else:
+                continue
+            center = Component._determinePinCenter(pinDict["LM"], pinDict["RM"])
+            offsetX, offsetY = transform.apply(center.x, center.y)
+            wires.append((offsetX, offsetY, targets))
+        return wires
+
+    def buildCosts(self, components: list):
+        """
+        Builds the PlacementCosts of putting the components in the row's slots.
+        """
+        if len(components) > len(self.slotBoxes):
+            raise ValueError(f"{len(components)} components do not fit in a row of {len(self.slotBoxes)} slots")
+        lengthCosts = []
+        wireComponents, wireOffsetXs, wireTargetXs = [], [], []
+        for componentIndex, component in enumerate(components):
+            wires = self._wiresOf(component)
+            lengthCosts.append([
+                sum(min(abs(slotX + offsetX - targetX) + abs(slotY + offsetY - targetY) for targetX, targetY in targets) for offsetX, offsetY, targets in wires)
+                for slotX, slotY in self.slotCenters
+            ])
+            for offsetX, _, targets in wires:
+                # only wires to one known controller pin have a fixed order to keep; power and ground pins go to whichever pin is nearest
+                if len(targets) == 1:
+                    wireComponents.append(componentIndex)
+                    wireOffsetXs.append(offsetX)
+                    wireTargetXs.append(targets[0][0])
+        return PlacementCosts(lengthCosts, [x for x, _ in self.slotCenters], wireComponents, wireOffsetXs, wireTargetXs, self.crossingWeight)
+
+    def orderByTarget(self, components: list, method: str = "barycenter"):
+        """
+        Returns the slot of every component, filling the slots from left to right in the order of the mean ("barycenter") or median x of each component's controller pins.
+
+        Components without a known controller pin keep their relative order and go after the others.
+        """
+        keys = []
+        for componentIndex, component in enumerate(components):
+            targetXs = sorted(targets[0][0] for _, _, targets in self._wiresOf(component) if len(targets) == 1)
+            if not targetXs:
+                key = math.inf
+            elif method == "median":
+                middle = len(targetXs) // 2
+                key = targetXs[middle] if len(targetXs) % 2 else (targetXs[middle - 1] + targetXs[middle]) / 2
+            else:
+                key = sum(targetXs) / len(targetXs)
+            keys.append((key, componentIndex))
+        slotsLeftToRight = sorted(range(len(self.slotCenters)), key=lambda slot: (self.slotCenters[slot][0], self.slotCenters[slot][1]))
+        assignment = [None] * len(components)
+        for slot, (_, componentIndex) in zip(slotsLeftToRight, sorted(keys)):
+            assignment[componentIndex] = slot
+        return assignment
+
+    def optimize(self, components: list, method: str = "barycenter", restarts: int = 4, iterations: int = None, numberOfWorkers: int = None, seed: int = 0):
+        """
+        Chooses the slot of every component.
+        Args:
+            components (list): The components of the row, not placed yet.
+            method (str): "barycenter" or "median" orders the row by its controller pins; "anneal" refines the barycenter order by simulated annealing.
+            restarts (int): With "anneal", the number of independent annealing runs; the best is kept. The first starts from the barycenter order, the others from shuffled orders.
+            iterations (int): With "anneal", the steps per run. Defaults to 200 per component.
+            numberOfWorkers (int): The number of processes the runs are spread over. Defaults to the number of CPUs; 1 runs in this process.
+            seed (int): Seeds the annealing runs, so the result can be repeated.
+        Returns:
+            list: The slot of every component, in the order of components.
+        """
+        if method not in PlacementOptimizer.METHODS:
+            raise ValueError(f"Unknown placement method \"{method}\". Known methods are {PlacementOptimizer.METHODS}")
+        assignment = self.orderByTarget(components, "median" if method == "median" else "barycenter")
+        if method != "anneal" or len(components) < 2:
+            return assignment
+
+        costs = self.buildCosts(components)
+        if iterations is None:
+            iterations = 200 * len(components)
+        tasks = [(costs, assignment, iterations, seed)]
+        shuffleGenerator = random.Random(seed)
+        for restart in range(1, restarts):
+            startingAssignment = shuffleGenerator.sample(range(costs.numberOfSlots), len(components))
+            tasks.append((costs, startingAssignment, iterations, seed + restart if seed is not None else None))
+
+        if numberOfWorkers is None:
+            numberOfWorkers = min(os.cpu_count() or 1, len(tasks))
+        # the workers of a RenderWorkerPool are daemons, which cannot start processes of their own
+        if numberOfWorkers <= 1 or multiprocessing.current_process().daemon:
+            results = list(map(_annealTask, tasks))
+        else:
+            with multiprocessing.Pool(numberOfWorkers) as pool:
+                results = pool.map(_annealTask, tasks)
+        bestCost, bestAssignment = min(results, key=lambda result: result[0])
+        # annealing never keeps anything worse than where it started, but the barycenter order is the tie-breaker
+        return bestAssignment if bestCost < costs.cost(assignment) else assignment
@@ -0,0 +1,271 @@
+import heapq
+import itertools
+import threading
+import time
+
+from DiagramPipeline import CircuitSpec, DiagramPipeline
+
+
+class RenderJob:
+    """
+    A single render request tracked by the RenderScheduler.
+
+    A job runs one pipeline stage at a time, so a more urgent job can take over the scheduler between any two stages of a large render.
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    CANCELLED = "cancelled"
+    FAILED = "failed"
+
+    def __init__(self, jobId: int, circuitSpec: CircuitSpec, outputPath: str, jobClass: str, priority: int, deadline: float = None, supersedeKey=None, draftScale: float = None):
+        """
+        Creates a new RenderJob object. Jobs are created by RenderScheduler.submit().
+        Args:
+            jobId (int): A number unique to the scheduler.
+            circuitSpec (CircuitSpec): The circuit to render.
+            outputPath (str): Where to save the diagram.
+            jobClass (str): The class the job is reported under, like "preview" or "batch".
+            priority (int): Lower numbers run first.
+            deadline (float): The time.monotonic() time the job should be finished by, or None.
+            supersedeKey: Jobs submitted later with the same key cancel this one.
+            draftScale (float): Renders a draft at this scale instead of the full-quality diagram.
+        """
+        self.jobId = jobId
+        self.circuitSpec = circuitSpec
+        self.outputPath = outputPath
+        self.jobClass = jobClass
+        self.priority = priority
+        self.deadline = deadline
+        self.supersedeKey = supersedeKey
+        self.sequence = jobId
+        self.pipeline = DiagramPipeline(circuitSpec, draftScale=draftScale)
+
+        self.state = RenderJob.QUEUED
+        self.error = None
+        self.submittedAt = time.monotonic()
+        self.lastQueuedAt = self.submittedAt
+        self.finishedAt = None
+        self.waitSeconds = 0.0
+        self.serviceSeconds = 0.0
+        self.stageSeconds = {}
+        self._cancelRequested = False
+        self._finished = threading.Event()
+
+    def __repr__(self):
+        return f"RenderJob({self.jobId}, {self.jobClass!r}, priority={self.priority}, state={self.state!r})"
+
+    def sortKey(self):
+        """
+        Returns the key the scheduler orders jobs by: priority, then earliest deadline, then submission order.
+        """
+        return (self.priority, self.deadline if self.deadline is not None else float("inf"), self.sequence)
+
+    def isFinished(self):
+        return self._finished.is_set()
+
+    def missedDeadline(self):
+        """
+        Returns True if the job finished (or is still unfinished) after its deadline.
+        """
+        if self.deadline is None:
+            return False
+        finishedAt = self.finishedAt if self.finishedAt is not None else time.monotonic()
+        return finishedAt > self.deadline
+
+    def wait(self, timeout: float = None):
+        """
+        Blocks until the job is done, cancelled or failed.
+        Returns:
+            bool: True if the job finished within the timeout.
+        """
+        return self._finished.wait(timeout)
+
+    def _finish(self, state: str):
+        self.state = state
+        self.finishedAt = time.monotonic()
+        self._finished.set()
+
+
+class RenderScheduler:
+    """
+    Orders render jobs by priority and deadline and runs them one pipeline stage at a time.
+
+    Because jobs are re-queued after every stage, a preview submitted while a large batch render is in progress only waits for the stage that is currently running, not for the whole batch job. Submitting a job with the same supersedeKey as an unfinished one cancels the older job at its next stage boundary.
+    """
+    # default priorities per job class; lower runs first
+    CLASS_PRIORITIES = {
+        "preview": 0,
+        "interactive": 5,
+        "batch": 10,
+    }
+
+    def __init__(self):
+        self._queue = []
+        self._jobIds = itertools.count(1)
+        self._condition = threading.Condition()
+        self._supersedableJobs = {}
+        self._finishedJobs = []
+        self._thread = None
+        self._isStopping = False
+
+    def submit(self, circuitSpec: CircuitSpec, outputPath: str, jobClass: str = "batch", priority: int = None, deadlineSeconds: float = None, supersedeKey=None, draftScale: float = None):
+        """
+        Queues a render job.
+        Args:
+            circuitSpec (CircuitSpec): The circuit to render.
+            outputPath (str): Where to save the diagram.
+            jobClass (str): The class the job is reported under.
+            priority (int): Lower numbers run first. Defaults to the class's entry in CLASS_PRIORITIES.
+            deadlineSeconds (float): How many seconds from now the job should be finished by.
+            supersedeKey: Cancels any unfinished job submitted earlier with the same key, like a preview of the same diagram.
+            draftScale (float): Renders a draft at this scale instead of the full-quality diagram.
+        Returns:
+            RenderJob: The queued job.
+        """
+        if priority is None:
+            priority = RenderScheduler.CLASS_PRIORITIES.get(jobClass, RenderScheduler.CLASS_PRIORITIES["batch"])
+        deadline = time.monotonic() + deadlineSeconds if deadlineSeconds is not None else None
+        job = RenderJob(next(self._jobIds), circuitSpec, outputPath, jobClass, priority, deadline, supersedeKey, draftScale)
+
+        with self._condition:
+            if supersedeKey is not None:
+                supersededJob = self._supersedableJobs.get(supersedeKey)
+                if supersededJob is not None:
+                    self._cancelLocked(supersededJob)
+                self._supersedableJobs[supersedeKey] = job
+            heapq.heappush(self._queue, (job.sortKey(), job))
+            self._condition.notify()
+        return job
+
+    def cancel(self, job: RenderJob):
+        """
+        Cancels a job. A queued job is dropped immediately; a running job stops at the end of its current stage.
+        """
+        with self._condition:
+            self._cancelLocked(job)
+
+    def _cancelLocked(self, job: RenderJob):
+        if job.isFinished():
+            return
+        job._cancelRequested = True
+        if job.state == RenderJob.QUEUED:
+            # the queue entry is skipped when it is popped
+            self._finishLocked(job, RenderJob.CANCELLED)
+
+    def _finishLocked(self, job: RenderJob, state: str):
+        job._finish(state)
+        self._finishedJobs.append(job)
+        if job.supersedeKey is not None and self._supersedableJobs.get(job.supersedeKey) is job:
+            del self._supersedableJobs[job.supersedeKey]
+
+    def _popNextJob(self):
+        while self._queue:
+            _, job = heapq.heappop(self._queue)
+            if job.state == RenderJob.QUEUED:
+                return job
+        return None
+
+    def runNextStage(self):
+        """
+        Runs one stage of the most urgent queued job.
+        Returns:
+            bool: False if there was nothing to run.
+        """
+        with self._condition:
+            job = self._popNextJob()
+            if job is None:
+                return False
+            stageName = job.pipeline.getRemainingStages()[0]
+            job.state = RenderJob.RUNNING
+            startTime = time.monotonic()
+            job.waitSeconds += startTime - job.lastQueuedAt
+
+        try:
+            job.pipeline.runStage(stageName, job.outputPath)
+        except Exception as e:
+            with self._condition:
+                job.error = e
+                job.serviceSeconds += time.monotonic() - startTime
+                self._finishLocked(job, RenderJob.FAILED)
+            return True
+
+        with self._condition:
+            endTime = time.monotonic()
+            job.stageSeconds[stageName] = endTime - startTime
+            job.serviceSeconds += endTime - startTime
+            if not job.pipeline.getRemainingStages():
+                self._finishLocked(job, RenderJob.DONE)
+            elif job._cancelRequested:
+                self._finishLocked(job, RenderJob.CANCELLED)
+            else:
+                # re-queue with the job's original key so it keeps its place among jobs of the same priority
+                job.state = RenderJob.QUEUED
+                job.lastQueuedAt = endTime
+                heapq.heappush(self._queue, (job.sortKey(), job))
+        return True
+
+    def runUntilEmpty(self):
+        """
+        Runs queued jobs on the calling thread until the queue is empty.
+        """
+        while self.runNextStage():
+            pass
+
+    def start(self):
+        """
+        Starts a background thread that runs jobs as they are submitted.
+        """
+        if self._thread is not None:
+            return
+        self._isStopping = False
+        self._thread = threading.Thread(target=self._runForever, name="RenderScheduler", daemon=True)
+        self._thread.start()
+
+    def _runForever(self):
+        while True:
+            with self._condition:
+                while not self._isStopping and not any(job.state == RenderJob.QUEUED for _, job in self._queue):
+                    self._condition.wait()
+                if self._isStopping:
+                    return
+            self.runNextStage()
+
+    def stop(self):
+        """
+        Stops the background thread once its current stage is finished. Queued jobs stay queued.
+        """
+        if self._thread is None:
+            return
+        with self._condition:
+            self._isStopping = True
+            self._condition.notify_all()
+        self._thread.join()
+        self._thread = None
+
+    def getStatistics(self):
+        """
+        Reports queue wait and service time for every class of finished job.
+        Returns:
+            dict: For each job class, the number of jobs per final state, the mean and maximum queue wait and service time in seconds and the number of missed deadlines.
+        """
+        with self._condition:
+            finishedJobs = list(self._finishedJobs)
+
+        statistics = {}
+        for job in finishedJobs:
+            classStatistics = statistics.setdefault(job.jobClass, {"jobs": 0, RenderJob.DONE: 0, RenderJob.CANCELLED: 0, RenderJob.FAILED: 0, "waitSeconds": [], "serviceSeconds": [], "missedDeadlines": 0})
+            classStatistics["jobs"] += 1
+            classStatistics[job.state] += 1
+            if job.state == RenderJob.DONE:
+                classStatistics["waitSeconds"].append(job.waitSeconds)
+                classStatistics["serviceSeconds"].append(job.serviceSeconds)
+                if job.missedDeadline():
+                    classStatistics["missedDeadlines"] += 1
+
+        for classStatistics in statistics.values():
+            for key in ("waitSeconds", "serviceSeconds"):
+                values = classStatistics.pop(key)
+                classStatistics[f"mean{key[0].upper()}{key[1:]}"] = sum(values) / len(values) if values else None
+                classStatistics[f"max{key[0].upper()}{key[1:]}"] = max(values) if values else None
+        return statistics
@@ -0,0 +1,168 @@
+import gc
+import multiprocessing
+import os
+import time
+
+from AssetCache import AssetCache
+from ComponentTypeRegistry import ComponentTypeRegistry
+from DiagramPipeline import CircuitSpec, DiagramPipeline
+from PiGPIOPinHeader import PiGPIOPinHeader
+
+
+# per-worker state, filled in by _initializeWorker
+_workerStats = {}
+
+
+def _readResidentSetSizeKB():
+    """
+    Returns the resident and shared memory of the current process in KB, or (None, None) where /proc is not available.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            fields = statm.read().split()
+        pageSizeKB = os.sysconf("SC_PAGE_SIZE") // 1024
+        return int(fields[1]) * pageSizeKB, int(fields[2]) * pageSizeKB
+    except (OSError, ValueError, AttributeError):
+        return None, None
+
+
+def _preloadAssets(imageDirectory: str):
+    """
+    Decodes every component image, builds every registered component type and creates one of each component so their modules are ready.
+    """
+    AssetCache.preloadDirectory(imageDirectory)
+    # the shared pin tables are built before the fork, so every worker reuses them
+    ComponentTypeRegistry.buildAll()
+    prototypes = {}
+    for componentType in CircuitSpec.COMPONENT_TYPES:
+        prototypes[componentType] = CircuitSpec.createComponent(componentType, "Prototype", 1)
+    prototypes["Controller"] = PiGPIOPinHeader("Prototype")
+    return prototypes
+
+
+def _initializeWorker(poolCreatedAt: float, imageDirectory: str, isPreloaded: bool):
+    if not isPreloaded:
+        _preloadAssets(imageDirectory)
+    residentKB, sharedKB = _readResidentSetSizeKB()
+    _workerStats.update({
+        "pid": os.getpid(),
+        "startupSeconds": time.monotonic() - poolCreatedAt,
+        "residentKB": residentKB,
+        "sharedKB": sharedKB,
+    })
+
+
+def _renderInWorker(circuitSpec: CircuitSpec, outputPath: str):
+    DiagramPipeline(circuitSpec).run(outputPath)
+    return outputPath
+
+
+def _reportWorkerStats(_):
+    # give the other workers a chance to pick up a task so every worker reports
+    time.sleep(0.05)
+    residentKB, sharedKB = _readResidentSetSizeKB()
+    return dict(_workerStats, currentResidentKB=residentKB, currentSharedKB=sharedKB)
+
+
+class RenderWorkerPool:
+    """
+    A pool of worker processes that render CircuitSpecs into diagram images.
+
+    The parent process decodes every component image and builds the component pin tables before the workers are forked, so the workers share them copy-on-write and start without touching the disk. Where fork is not available (Windows), the workers are spawned and each one preloads the assets itself.
+    """
+    def __init__(self, numberOfWorkers: int = None, imageDirectory: str = None):
+        """
+        Creates a new RenderWorkerPool object. The workers are started by start() or by entering the pool as a context manager.
+        Args:
+            numberOfWorkers (int): The number of worker processes. Defaults to the number of CPUs.
+            imageDirectory (str): The directory of component images to preload. Defaults to the component Images directory.
+        """
+        self.numberOfWorkers = numberOfWorkers if numberOfWorkers is not None else os.cpu_count() or 1
+        self.imageDirectory = imageDirectory if imageDirectory is not None else AssetCache.DEFAULT_IMAGE_DIRECTORY
+        self.componentPrototypes = {}
+        self.preloadSeconds = None
+        self.isForking = "fork" in multiprocessing.get_all_start_methods()
+        self.pool = None
+
+    def preload(self):
+        """
+        Decodes all assets and builds the component pin tables in the current process.
+        """
+        startTime = time.perf_counter()
+        self.componentPrototypes = _preloadAssets(self.imageDirectory)
+        self.preloadSeconds = time.perf_counter() - startTime
+
+    def start(self):
+        """
+        Preloads the assets (when forking) and starts the worker processes.
+        """
+        if self.pool is not None:
+            return
+        if self.isForking:
+            self.preload()
+            # move everything allocated so far out of the collector's reach so the workers do not dirty the shared pages
+            gc.freeze()
+            context = multiprocessing.get_context("fork")
+        else:
+            context = multiprocessing.get_context("spawn")
+        self.pool = context.Pool(self.numberOfWorkers, initializer=_initializeWorker, initargs=(time.monotonic(), self.imageDirectory, self.isForking))
+
+    def render(self, jobs: list[tuple[CircuitSpec, str]]):
+        """
+        Renders every job in the pool.
+        Args:
+            jobs (list): (CircuitSpec, output path) pairs.
+        Returns:
+            list: The output paths, in the same order as the jobs.
+        """
+        self.start()
+        return self.pool.starmap(_renderInWorker, jobs)
+
+    def starmap(self, function, jobs: list[tuple]):
+        """
+        Calls a module-level function in the pool with the arguments of every job, for work other than rendering whole diagrams to files.
+        Args:
+            function: The function to call. It must be importable by the workers.
+            jobs (list): One tuple of arguments per call.
+        Returns:
+            list: The return values, in the same order as the jobs.
+        """
+        self.start()
+        return self.pool.starmap(function, jobs)
+
+    def renderAsync(self, circuitSpec: CircuitSpec, outputPath: str, callback=None, errorCallback=None):
+        """
+        Renders a single job without waiting for it.
+        Returns:
+            AsyncResult: The pending result, which resolves to the output path.
+        """
+        self.start()
+        return self.pool.apply_async(_renderInWorker, (circuitSpec, outputPath), callback=callback, error_callback=errorCallback)
+
+    def measureWorkers(self):
+        """
+        Reports the startup latency and memory use of the workers.
+        Returns:
+            list: One dict per worker that answered, with its pid, startup time in seconds and its resident and shared memory in KB (None where the platform does not report them).
+        """
+        self.start()
+        reports = self.pool.map(_reportWorkerStats, range(self.numberOfWorkers * 4), chunksize=1)
+        return list({report["pid"]: report for report in reports}.values())
+
+    def close(self):
+        """
+        Waits for the queued jobs to finish and stops the workers.
+        """
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+            if self.isForking:
+                gc.unfreeze()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
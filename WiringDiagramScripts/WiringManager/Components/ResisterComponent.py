@@ -1,22 +1,27 @@
-import WiringDiagramScripts.WiringManager.Components.Component as Component
-import Coordinates
-from Utilities.PinEnum import *
+from Component import Component
+from ComponentLibrary import ComponentLibrary
+from ComponentTypeRegistry import ComponentTypeRegistry
 
 
 class ResistorComponent(Component):
-    def __init__(self, name, resistanceValue: float):
-        self.imagePath = "./Images/Resistor.png"
+    TYPE_NAME = "Basic Resistor"
+
+    @staticmethod
+    def _buildType():
+        """
+        Loads the ComponentType shared by every resistor. The pins are defined in ComponentDefinitions/BasicResistor.json.
+        """
+        return ComponentLibrary.loadDirectory()[ResistorComponent.TYPE_NAME]
+
+    def __init__(self, name, resistanceValue: float, controllerKey: int = 0):
+        componentType = ComponentTypeRegistry.getType(ResistorComponent.TYPE_NAME)
+        self.imagePath = componentType.imagePath
         self.Label = name + " Basic Resistor"
-        self.electricalValuesDict = {"Resistance": resistanceValue}
-        self.pinLMRMCoordinates = {
-            1: {
-                "Usage": PinEnum.PASSIVE,
-                "LM": Coordinates("LM Pin 1", 30, 203),
-                "RM": Coordinates("RM Pin 1", 61, 207),
-            },
-            2: {
-                "Usage": PinEnum.PASSIVE,
-                "LM": Coordinates("LM Pin 2", 287, 203),
-                "RM": Coordinates("RM Pin 2", 317, 209),
-            },
-        }  # (left most, rightmost) based on the width of the pin in the image in pixels.
+        self.controllerKey = controllerKey
+        # the resistance is the only value that differs between resistors, so the type's dict is copied rather than shared
+        self.electricalValuesDict = dict(componentType.electricalValuesDict, Resistance=resistanceValue)
+
+        super().__init__(self.Label, self.imagePath, self.electricalValuesDict, None, isPowered=componentType.isPowered, controllerKey=controllerKey, componentType=componentType)
+
+
+ComponentTypeRegistry.register(ResistorComponent.TYPE_NAME, ResistorComponent._buildType, ResistorComponent)
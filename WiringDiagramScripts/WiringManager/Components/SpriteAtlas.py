@@ -0,0 +1,243 @@
+"""
+A sprite atlas of every component image at the four quarter turns.
+
+The atlas is one RGBA texture with every image of a directory packed into it at 0, 90, 180 and 270 degrees, and an index of where each sprite is. It is stored as two files:
+
+    <name>.rgba     the raw RGBA pixels, row by row, so the texture can be memory-mapped instead of decoded
+    <name>.json     {"version", "size", "sources": {file name: [mtime ns, size]}, "sprites": {file name: {angle: [x, y, width, height]}}}
+
+Loading the atlas maps the texture once; processes that load the same atlas, including forked render workers, share its pages.
+"""
+
+import json
+import math
+import mmap
+import os
+
+from PIL import Image, UnidentifiedImageError
+
+ATLAS_VERSION = 1
+ATLAS_ANGLES = (0, 90, 180, 270)
+ATLAS_FILE_NAME = "componentSprites"
+
+
+def _sourceSignatures(imageDirectory: str):
+    signatures = {}
+    with os.scandir(imageDirectory) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.lower().endswith(".png"):
+                fileStat = entry.stat()
+                signatures[entry.name] = [fileStat.st_mtime_ns, fileStat.st_size]
+    return signatures
+
+
+class SpriteAtlas:
+    """
+    Every component image of a directory, pre-rotated and packed into one texture.
+    """
+    def __init__(self, image: Image.Image, sprites: dict, sources: dict):
+        """
+        Creates a new SpriteAtlas object. Use build() or load() rather than calling this directly.
+        Args:
+            image (Image): The RGBA texture.
+            sprites (dict): File name to {angle: (x, y, width, height)}.
+            sources (dict): File name to the [mtime ns, size] of the image the sprites were made from.
+        """
+        self.image = image
+        self.sprites = sprites
+        self.sources = sources
+        # the texture memory map, kept open for as long as the atlas is used
+        self._map = None
+        self._croppedSprites = {}
+
+    def __contains__(self, fileName):
+        return fileName in self.sprites
+
+    def getSpriteBox(self, fileName: str, rotationAngle: int = 0):
+        """
+        Returns the (left, top, right, bottom) box of a sprite in the texture, or None if the atlas does not have it.
+        """
+        boxes = self.sprites.get(fileName)
+        if boxes is None:
+            return None
+        box = boxes.get(rotationAngle % 360)
+        if box is None:
+            return None
+        x, y, width, height = box
+        return (x, y, x + width, y + height)
+
+    def getSprite(self, fileName: str, rotationAngle: int = 0):
+        """
+        Returns an image at a quarter turn, cut out of the texture on first use. The returned image is shared; do not modify it in place.
+        Args:
+            fileName (str): The file name of the image in the atlas' directory.
+            rotationAngle (int): 0, 90, 180 or 270.
+        Returns:
+            Image: The sprite, or None if the atlas does not have it.
+        """
+        key = (fileName, rotationAngle % 360)
+        sprite = self._croppedSprites.get(key)
+        if sprite is None:
+            box = self.getSpriteBox(fileName, rotationAngle)
+            if box is None:
+                return None
+            sprite = self.image.crop(box)
+            self._croppedSprites[key] = sprite
+        return sprite
+
+    @staticmethod
+    def _pack(sizes: dict):
+        """
+        Packs rectangles into shelves: tallest first, left to right, starting a new shelf when a row is full.
+        Args:
+            sizes (dict): Key to (width, height).
+        Returns:
+            tuple: The texture size and key to (x, y).
+        """
+        totalArea = sum(width * height for width, height in sizes.values())
+        textureWidth = max(max(width for width, _ in sizes.values()), math.ceil(math.sqrt(totalArea)))
+        positions = {}
+        x = y = shelfHeight = 0
+        for key in sorted(sizes, key=lambda key: (-sizes[key][1], -sizes[key][0], key)):
+            width, height = sizes[key]
+            if x + width > textureWidth:
+                x, y, shelfHeight = 0, y + shelfHeight, 0
+            positions[key] = (x, y)
+            x += width
+            shelfHeight = max(shelfHeight, height)
+        return (textureWidth, y + shelfHeight), positions
+
+    @staticmethod
+    def build(imageDirectory: str):
+        """
+        Packs every PNG image of a directory, at every angle in ATLAS_ANGLES, into a new atlas held in memory.
+        """
+        sources = _sourceSignatures(imageDirectory)
+        rotatedImages = {}
+        for fileName in sorted(sources):
+            imagePath = os.path.join(imageDirectory, fileName)
+            try:
+                with Image.open(imagePath) as openedImage:
+                    image = openedImage.convert("RGBA")
+            except UnidentifiedImageError:
+                raise ValueError(f"Image file at path: {imagePath} is not a valid image file")
+            for angle in ATLAS_ANGLES:
+                # the same call the diagram makes, so the sprites match what it drew before the atlas
+                rotatedImages[(fileName, angle)] = image.rotate(angle, expand=True)
+
+        sprites = {fileName: {} for fileName in sources}
+        if not rotatedImages:
+            return SpriteAtlas(Image.new("RGBA", (1, 1)), sprites, sources)
+        textureSize, positions = SpriteAtlas._pack({key: image.size for key, image in rotatedImages.items()})
+        texture = Image.new("RGBA", textureSize, (0, 0, 0, 0))
+        for (fileName, angle), image in rotatedImages.items():
+            position = positions[(fileName, angle)]
+            texture.paste(image, position)
+            sprites[fileName][angle] = (position[0], position[1], image.width, image.height)
+        return SpriteAtlas(texture, sprites, sources)
+
+    def save(self, atlasPath: str):
+        """
+        Writes the texture to atlasPath.rgba and the index to atlasPath.json. Both are written to temporary files first, so a reader never sees half an atlas.
+        """
+        os.makedirs(os.path.dirname(atlasPath) or ".", exist_ok=True)
+        index = {
+            "version": ATLAS_VERSION,
+            "size": list(self.image.size),
+            "sources": self.sources,
+            "sprites": {fileName: {str(angle): list(box) for angle, box in boxes.items()} for fileName, boxes in self.sprites.items()},
+        }
+        temporarySuffix = f".{os.getpid()}.tmp"
+        with open(atlasPath + ".rgba" + temporarySuffix, "wb") as textureFile:
+            textureFile.write(self.image.tobytes("raw", "RGBA"))
+        with open(atlasPath + ".json" + temporarySuffix, "w", encoding="utf-8") as indexFile:
+            json.dump(index, indexFile)
+        # the texture is replaced before the index, so an index always describes a texture at least as new as itself
+        os.replace(atlasPath + ".rgba" + temporarySuffix, atlasPath + ".rgba")
+        os.replace(atlasPath + ".json" + temporarySuffix, atlasPath + ".json")
+
+    @staticmethod
+    def load(atlasPath: str):
+        """
+        Loads an atlas written by save(), memory-mapping its texture.
+        Raises:
+            ValueError: If the files are missing, from another version or do not match each other.
+        """
+        try:
+            with open(atlasPath + ".json", "r", encoding="utf-8") as indexFile:
+                index = json.load(indexFile)
+        except (OSError, json.JSONDecodeError) as error:
+            raise ValueError(f"Sprite atlas index {atlasPath}.json could not be read ({error})")
+        if index.get("version") != ATLAS_VERSION:
+            raise ValueError(f"Sprite atlas {atlasPath} is version {index.get('version')}, expected {ATLAS_VERSION}")
+        width, height = index["size"]
+
+        try:
+            with open(atlasPath + ".rgba", "rb") as textureFile:
+                textureMap = mmap.mmap(textureFile.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as error:
+            raise ValueError(f"Sprite atlas texture {atlasPath}.rgba could not be mapped ({error})")
+        if len(textureMap) != width * height * 4:
+            textureMap.close()
+            raise ValueError(f"Sprite atlas texture {atlasPath}.rgba does not match its index")
+
+        # frombuffer with the raw decoder's arguments wraps the mapped pages instead of copying them
+        image = Image.frombuffer("RGBA", (width, height), textureMap, "raw", "RGBA", 0, 1)
+        sprites = {fileName: {int(angle): tuple(box) for angle, box in boxes.items()} for fileName, boxes in index["sprites"].items()}
+        atlas = SpriteAtlas(image, sprites, index["sources"])
+        atlas._map = textureMap
+        return atlas
+
+    @staticmethod
+    def loadOrBuild(imageDirectory: str, atlasPath: str = None):
+        """
+        Loads the atlas of a directory, building and saving it first if it is missing or any image changed since it was built.
+        Args:
+            imageDirectory (str): The directory of component images.
+            atlasPath (str): The atlas files without their extension. Defaults to __pycache__/componentSprites in the image directory.
+        """
+        if atlasPath is None:
+            atlasPath = os.path.join(imageDirectory, "__pycache__", ATLAS_FILE_NAME)
+        try:
+            atlas = SpriteAtlas.load(atlasPath)
+            if atlas.sources == _sourceSignatures(imageDirectory):
+                return atlas
+            atlas.close()
+        except ValueError:
+            pass
+
+        atlas = SpriteAtlas.build(imageDirectory)
+        try:
+            atlas.save(atlasPath)
+        except OSError:
+            # a read-only image directory still gets an atlas, held in memory for this process
+            return atlas
+        return SpriteAtlas.load(atlasPath)
+
+    def close(self):
+        """
+        Releases the texture. Sprites already returned by getSprite() stay valid.
+        """
+        self.image = None
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # an image made from the map still exists; the map is closed when it is collected
+                pass
+            self._map = None
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    imageDirectory = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), "Images")
+    startTime = time.perf_counter()
+    atlas = SpriteAtlas.build(imageDirectory)
+    buildSeconds = time.perf_counter() - startTime
+    atlasPath = os.path.join(imageDirectory, "__pycache__", ATLAS_FILE_NAME)
+    atlas.save(atlasPath)
+    startTime = time.perf_counter()
+    SpriteAtlas.load(atlasPath)
+    print(f"Packed {sum(len(boxes) for boxes in atlas.sprites.values())} sprites into a {atlas.image.width}x{atlas.image.height} texture in {buildSeconds * 1e3:.1f} ms, loaded in {(time.perf_counter() - startTime) * 1e3:.2f} ms")
@@ -3,15 +3,17 @@ from enum import Enum
 class DirectionEnum(Enum):
     """
     Enum for the direction of a connection.
+
+    Every direction has an integer code: RIGHT = 0, UP = 1, LEFT = 2 and DOWN = 3, so a counterclockwise quarter turn adds one to the code. TOP and BOTTOM share the codes of UP and DOWN.
     """
-    
+
     LEFT = "left"
     RIGHT = "right"
     TOP = "top"
     BOTTOM = "bottom"
     UP = "up"
     DOWN = "down"
-    
+
 
 
     def __str__(self):
@@ -20,14 +22,39 @@ class DirectionEnum(Enum):
     def __repr__(self):
         return self.__class__.__name__
 
-    def __eq__(self, other):
-        return self.__class__.__name__ == other.__class__.__name__
+    @property
+    def code(self):
+        """
+        The integer code of the direction.
+        """
+        return _CODE_OF_NAME[self.name]
+
+    @staticmethod
+    def fromCode(code: int):
+        """
+        Returns the direction with the given code (RIGHT, UP, LEFT or DOWN).
+        """
+        return SIDES[code]
 
-    def __ne__(self, other):
-        return self.__class__.__name__ != other.__class__.__name__
+    def rotated(self, quarterTurns: int):
+        """
+        Returns the direction after turning counterclockwise by a number of quarter turns.
+        """
+        return SIDES[ROTATION_TABLE[self.code][quarterTurns % 4]]
 DOWN = DirectionEnum.DOWN
 UP = DirectionEnum.UP
 LEFT = DirectionEnum.LEFT
 RIGHT = DirectionEnum.RIGHT
 TOP = DirectionEnum.TOP
-BOTTOM = DirectionEnum.BOTTOM
\ No newline at end of file
+BOTTOM = DirectionEnum.BOTTOM
+
+# the four sides in code order, counterclockwise from RIGHT
+SIDES = (RIGHT, UP, LEFT, DOWN)
+_CODE_OF_NAME = {"RIGHT": 0, "UP": 1, "TOP": 1, "LEFT": 2, "DOWN": 3, "BOTTOM": 3}
+
+# ROTATION_TABLE[code][quarterTurns] is the code of the side a pin on side code ends up on after that many counterclockwise quarter turns
+ROTATION_TABLE = tuple(tuple((code + quarterTurns) % 4 for quarterTurns in range(4)) for code in range(4))
+
+# the unit step in image coordinates (y pointing down) of each code
+DIRECTION_VECTORS = ((1, 0), (0, -1), (-1, 0), (0, 1))
+
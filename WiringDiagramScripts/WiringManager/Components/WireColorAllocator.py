@@ -0,0 +1,162 @@
+import math
+
+from LabelPlacer import SpatialIndex
+
+
+def _srgbToLab(red: int, green: int, blue: int):
+    """
+    Converts an 8-bit sRGB colour to CIELAB (D65 white), where straight-line distance roughly follows how different two colours look.
+    """
+    def linearize(channel):
+        channel /= 255
+        return channel / 12.92 if channel <= 0.04045 else ((channel + 0.055) / 1.055) ** 2.4
+
+    r, g, b = linearize(red), linearize(green), linearize(blue)
+    x = (0.4124 * r + 0.3576 * g + 0.1805 * b) / 0.95047
+    y = 0.2126 * r + 0.7152 * g + 0.0722 * b
+    z = (0.0193 * r + 0.1192 * g + 0.9505 * b) / 1.08883
+
+    def f(t):
+        return t ** (1 / 3) if t > 216 / 24389 else (24389 / 27 * t + 16) / 116
+
+    fx, fy, fz = f(x), f(y), f(z)
+    return (116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz))
+
+
+class WireColorAllocator:
+    """
+    Chooses the colour of every wire of a diagram so that nets whose wires cross or run close together never share a colour.
+
+    Every net is a node of a graph, with an edge between two nets when a segment of one comes within `tolerance` pixels of a segment of the other. The edges are found through a SpatialIndex of the segments, so building the graph takes time roughly linear in the number of segments. The graph is then coloured greedily, busiest net first, each net taking the least used colour none of its neighbours has. The palette has one colour more than the most neighbours any net has, so it never runs out, and at least MIN_PALETTE_SIZE colours, so nets that do not touch are still told apart where there are colours to spare.
+
+    The palette is spread out in CIELAB by farthest-point sampling, starting from white and black, so the colours look as different from each other, from the white canvas and from the black ground wires as possible.
+    """
+    # the lightest and darkest palette colours, as CIELAB lightness; paler colours vanish on the white canvas and darker ones look like ground wires
+    MAX_LIGHTNESS = 80
+    MIN_LIGHTNESS = 25
+    # the fewest levels per channel of the sRGB grid the palette is picked from; small palettes all come from this grid, so they are prefixes of each other
+    MIN_GRID_LEVELS = 8
+    # the fewest colours handed out, unless there are fewer nets
+    MIN_PALETTE_SIZE = 12
+
+    def __init__(self, tolerance: float = 6, cellSize: int = 64):
+        """
+        Creates a new, empty WireColorAllocator object.
+        Args:
+            tolerance (float): Nets whose segments come closer than this many pixels get different colours.
+            cellSize (int): The grid cell size of the spatial index of the segments.
+        """
+        self.tolerance = tolerance
+        self.spatialIndex = SpatialIndex(cellSize)
+        # net -> the nets it crosses or runs next to, in the order the nets were added
+        self.neighbours = {}
+        self.colors = {}
+        # colour -> the number of nets that have it, kept alongside self.colors
+        self.colorUses = {}
+        self.palette = []
+
+    @staticmethod
+    def generatePalette(numberOfColors: int):
+        """
+        Returns numberOfColors "#rrggbb" colours, each chosen as far as possible, in CIELAB, from white, black and every colour before it.
+        """
+        if numberOfColors <= 0:
+            return []
+        # a grid this fine keeps several candidates per colour wanted after the too light and too dark ones are dropped
+        levels = max(WireColorAllocator.MIN_GRID_LEVELS, math.ceil((8 * numberOfColors) ** (1 / 3)))
+        steps = [round(255 * level / (levels - 1)) for level in range(levels)]
+        candidates = []
+        for red in steps:
+            for green in steps:
+                for blue in steps:
+                    lab = _srgbToLab(red, green, blue)
+                    if WireColorAllocator.MIN_LIGHTNESS <= lab[0] <= WireColorAllocator.MAX_LIGHTNESS:
+                        candidates.append(((red, green, blue), lab))
+
+        # the squared distance from every candidate to its nearest chosen colour, starting with white and black as chosen
+        nearest = [min(WireColorAllocator._distance(lab, (100, 0, 0)), WireColorAllocator._distance(lab, (0, 0, 0))) for _, lab in candidates]
+        palette = []
+        for _ in range(min(numberOfColors, len(candidates))):
+            chosen = max(range(len(candidates)), key=nearest.__getitem__)
+            (red, green, blue), chosenLab = candidates[chosen]
+            palette.append(f"#{red:02x}{green:02x}{blue:02x}")
+            for index, (_, lab) in enumerate(candidates):
+                distance = WireColorAllocator._distance(lab, chosenLab)
+                if distance < nearest[index]:
+                    nearest[index] = distance
+        return palette
+
+    @staticmethod
+    def _distance(lab, otherLab):
+        return (lab[0] - otherLab[0]) ** 2 + (lab[1] - otherLab[1]) ** 2 + (lab[2] - otherLab[2]) ** 2
+
+    def _segmentBox(self, start, end):
+        # padded by half the tolerance on every side, so two boxes overlap when their segments come within the tolerance
+        padding = self.tolerance / 2
+        return (min(start[0], end[0]) - padding, min(start[1], end[1]) - padding, max(start[0], end[0]) + padding, max(start[1], end[1]) + padding)
+
+    def _addSegments(self, net, segments):
+        neighbours = self.neighbours.setdefault(net, {})
+        boxes = [self._segmentBox(start, end) for start, end in segments]
+        for box in boxes:
+            for _, otherNet in self.spatialIndex.query(box):
+                if otherNet != net:
+                    neighbours[otherNet] = True
+                    self.neighbours[otherNet][net] = True
+        for box in boxes:
+            self.spatialIndex.insert(box, net)
+        return neighbours
+
+    def addWire(self, net, segments: list):
+        """
+        Adds a wire to be coloured by assignColors(). Wires of the same net always share a colour.
+        Args:
+            net: A key naming the net, such as (controller key, controller pin).
+            segments (list): The ((x, y), (x, y)) start and end of every segment of the wire. Routed wires are axis-aligned, for which the spatial index is exact.
+        """
+        self._addSegments(net, segments)
+
+    def assignColors(self):
+        """
+        Colours every net added so far, replacing any colours assigned before.
+        Returns:
+            dict: net -> "#rrggbb" colour.
+        """
+        maxNeighbours = max((len(neighbours) for neighbours in self.neighbours.values()), default=0)
+        self.palette = WireColorAllocator.generatePalette(max(maxNeighbours + 1, min(len(self.neighbours), WireColorAllocator.MIN_PALETTE_SIZE)))
+        self.colors = {}
+        self.colorUses = {}
+        # busiest nets first, ties in the order the nets were added
+        for net in sorted(self.neighbours, key=lambda net: -len(self.neighbours[net])):
+            self._setColor(net, self._leastUsedFreeColor(net))
+        return self.colors
+
+    def _setColor(self, net, color):
+        self.colors[net] = color
+        self.colorUses[color] = self.colorUses.get(color, 0) + 1
+
+    def _leastUsedFreeColor(self, net):
+        """
+        Returns the palette colour none of a net's neighbours has that the fewest nets have, the earliest in the palette on ties, or None if the neighbours have every colour.
+        """
+        taken = {self.colors[neighbour] for neighbour in self.neighbours[net] if neighbour in self.colors}
+        freeColors = [color for color in self.palette if color not in taken]
+        return min(freeColors, key=lambda color: self.colorUses.get(color, 0)) if freeColors else None
+
+    def colorWire(self, net, segments: list):
+        """
+        Adds a wire after assignColors() and colours it without changing the colour of any net already drawn. A net that already has a colour keeps it.
+
+        Segments of wires that were removed stay in the index, so a new wire may avoid a few more colours than it needs to.
+        Returns:
+            str: The "#rrggbb" colour of the wire.
+        """
+        self._addSegments(net, segments)
+        if net not in self.colors:
+            color = self._leastUsedFreeColor(net)
+            while color is None:
+                # the palette only grows when every colour in it is taken by a neighbour
+                self.palette = WireColorAllocator.generatePalette(len(self.palette) + 1)
+                color = self._leastUsedFreeColor(net)
+            self._setColor(net, color)
+        return self.colors[net]
@@ -1,23 +1,32 @@
 from Coordinates import Coordinates
 from Wire import WireLines, WireSegmentLines
-from Utilities.DirectionEnum import DirectionEnum
+from Utilities.DirectionEnum import DirectionEnum, DIRECTION_VECTORS
 from Utilities.PinEnum import PinEnum
 from Component import Component
 from Grid import Grid
 from Logger import Logger
 
 class WiringLogic:
+    # every wire segment is this fraction of the canvas height long, and the first segment leaving a pin is FIRST_SEGMENT_STEPS of them
+    WIRE_STEP_FRACTION = 0.035
+    FIRST_SEGMENT_STEPS = 3
+
     def __init__(
         self,
         inputComponentsDict: dict[int, Component],
         outputComponentsDict: dict[int, Component],
         controllerComponentsDict: dict[int, Component],
         imageDimensions: tuple[int, int],
-        testing=None
+        testing=None,
+        controllerPinAllocators: dict = None,
+        wireStepHeight: float = None
     ):
         self.testing = testing
+        # controller key -> ControllerPinAllocator holding the controller pin of every component power and ground pin
+        self.controllerPinAllocators = controllerPinAllocators if controllerPinAllocators is not None else {}
       
-        self.maxLengthOfWire = 0.035 * imageDimensions[1]
+        # the height wire steps are a fraction of; a controller region shorter than the image passes its own height
+        self.maxLengthOfWire = WiringLogic.WIRE_STEP_FRACTION * (wireStepHeight if wireStepHeight is not None else imageDimensions[1])
         self.maxWidthOfWire = self.maxLengthOfWire
         self.logger = Logger("WiringLogic")
         self.logger.addMessage("Wiring Logic Logger Initialized")
@@ -53,11 +62,11 @@ class WiringLogic:
             )
             if pinDict["Usage"].value != PinEnum.GROUND.value:
                 wire = self._createWire(
-                    f"{label} {pinDict["Usage"]}", pinDict, component.controllerKey, color="red"
+                    f"{label} {pinDict["Usage"]}", pinDict, component.controllerKey, color="red", component=component
                 )
             else:
                 wire = self._createWire(
-                    f"{label} {pinDict["Usage"]}", pinDict, component.controllerKey, color="black"
+                    f"{label} {pinDict["Usage"]}", pinDict, component.controllerKey, color="black", component=component
                 )
             component.addWire(wire,pinDict["PinDestination"])
             self.logger.addMessage(f"Wire Created for {label} {pinDict['Usage']}")
@@ -68,6 +77,7 @@ class WiringLogic:
         pinDict: dict[str, any],
         controllerKey: int,
         color: str = "black",
+        component: Component = None,
     ):
         wire = WireLines(componentLabel)
         compPinCenterCoordinates = Component._determinePinCenter(
@@ -77,19 +87,21 @@ class WiringLogic:
                 
         print(f"compPinDestination: {pinDict['PinDestination']}")
         compPinDestination = pinDict["PinDestination"]
-                # reassign power and ground pins as they do not come with a specific GPIO pin assigned (as there are multiple power and ground pins)
-        if compPinDestination not in [PinEnum.INPUT, PinEnum.OUTPUT]:
+        allocator = self.controllerPinAllocators.get(controllerKey)
+        allocatedPin = allocator.getControllerPin(component, compPinDestination) if allocator is not None and component is not None else None
+        if allocatedPin is not None:
+            # power and ground pins are wired to the controller pin the allocator matched them with
+            compPinDestination = allocatedPin
+        # pins that were never allocated fall back to the first pin of each usage
+        elif compPinDestination not in [PinEnum.INPUT, PinEnum.OUTPUT]:
 
             if compPinDestination == PinEnum.GROUND:
-                # TODO: add a common ground connection and allow for the use of multiple grounds
                 compPinDestination = 6
 
             if compPinDestination == PinEnum.V3_3:
-                # TODO: add a common 3.3V connection and allow for the use of multiple 3.3V connections
                 compPinDestination = 1
 
             if compPinDestination == PinEnum.V5:
-                # TODO: add a common 5V connection and allow for the use of multiple 5V connections
                 compPinDestination = 2
 
 
@@ -172,17 +184,9 @@ class WiringLogic:
             return [["y", rawYDistance], ["x", rawXDistance]]
 
     def _getFirstSegmentNextEndpoint(self, currentPoint: Coordinates, pinLocation: DirectionEnum):
-        scaler = 3
-        pinLocation = pinLocation.value
-        print(f"pinLocation: {pinLocation}")
-        if pinLocation == DirectionEnum.LEFT.value:
-            return Coordinates("nextWireEndpoint", currentPoint.x - self.maxWidthOfWire*scaler, currentPoint.y)
-        elif pinLocation == DirectionEnum.RIGHT.value:
-            return Coordinates("nextWireEndpoint", currentPoint.x + self.maxWidthOfWire*scaler, currentPoint.y)
-        elif pinLocation == DirectionEnum.UP.value:
-            return Coordinates("nextWireEndpoint", currentPoint.x, currentPoint.y - self.maxLengthOfWire*scaler)
-        elif pinLocation == DirectionEnum.DOWN.value:
-            return Coordinates("nextWireEndpoint", currentPoint.x, currentPoint.y + self.maxLengthOfWire*scaler)
-        else:
+        scaler = WiringLogic.FIRST_SEGMENT_STEPS
+        if pinLocation is None:
             raise ValueError("Invalid pin location direction")
+        stepX, stepY = DIRECTION_VECTORS[pinLocation.code]
+        return Coordinates("nextWireEndpoint", currentPoint.x + stepX*self.maxWidthOfWire*scaler, currentPoint.y + stepY*self.maxLengthOfWire*scaler)
 
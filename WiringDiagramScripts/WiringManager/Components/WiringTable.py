@@ -0,0 +1,47 @@
+"""
+Writes the wiring table of a diagram, see BaseWiringDiagram.getWiringTable, as a CSV or JSON file next to the diagram's image.
+
+Both formats hold one record per wire with the columns of BaseWiringDiagram.WIRING_TABLE_COLUMNS, in the order the wires were drawn. Empty values, like the BCM number of a ground pin, are left empty in CSV and are null in JSON.
+"""
+
+import csv
+import json
+import os
+
+from BaseWiringDiagram import BaseWiringDiagram
+
+# file extension -> the format a wiring table is written in
+WIRING_TABLE_FORMATS = {
+    ".csv": "CSV",
+    ".json": "JSON",
+}
+
+
+def getWiringTablePath(imagePath: str, extension: str = ".csv"):
+    """
+    Returns the path of the wiring table written next to an image, such as diagram.csv for diagram.png.
+    """
+    if not extension.startswith("."):
+        extension = f".{extension}"
+    return f"{os.path.splitext(imagePath)[0]}{extension.lower()}"
+
+
+def writeWiringTable(wiringTable: list, outputPath: str):
+    """
+    Writes a wiring table in the format named by the extension of outputPath.
+    Args:
+        wiringTable (list): The rows to write, see BaseWiringDiagram.getWiringTable.
+        outputPath (str): The .csv or .json file to write.
+    """
+    tableFormat = WIRING_TABLE_FORMATS.get(os.path.splitext(outputPath)[1].lower())
+    if tableFormat is None:
+        raise ValueError(f"Unknown wiring table format for {outputPath}. Known formats are {list(WIRING_TABLE_FORMATS)}")
+    columns = BaseWiringDiagram.WIRING_TABLE_COLUMNS
+    if tableFormat == "CSV":
+        with open(outputPath, "w", newline="", encoding="utf-8") as tableFile:
+            writer = csv.DictWriter(tableFile, fieldnames=columns, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(wiringTable)
+    else:
+        with open(outputPath, "w", encoding="utf-8") as tableFile:
+            json.dump([{column: row.get(column) for column in columns} for row in wiringTable], tableFile, indent=2)
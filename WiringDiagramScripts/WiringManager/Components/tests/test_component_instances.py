@@ -0,0 +1,49 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ButtonComponent import ButtonComponent
+from LEDComponent import LEDComponent
+
+
+class ComponentInstanceTest(unittest.TestCase):
+    def test_buttonsOfOneTypeHaveTheirOwnPins(self):
+        first = ButtonComponent("a", 17)
+        second = ButtonComponent("b", 18)
+        first.pinLMRMCoordinates[1]["Usage"] = "CHANGED"
+        first.pinLMRMCoordinates[2]["Wire"] = "red"
+        self.assertEqual(first.pinLMRMCoordinates[1]["Usage"], "CHANGED")
+        self.assertNotEqual(second.pinLMRMCoordinates[1]["Usage"], "CHANGED")
+        self.assertNotIn("Wire", second.pinLMRMCoordinates[2])
+        self.assertEqual(first.pinLMRMCoordinates[1]["PinDestination"], 17)
+        self.assertEqual(second.pinLMRMCoordinates[1]["PinDestination"], 18)
+
+    def test_pinWritesAreKeptWhenTheComponentIsMoved(self):
+        button = ButtonComponent("a", 17)
+        button.pinLMRMCoordinates[1]["Usage"] = "CHANGED"
+        button.pinLMRMCoordinates[1]["PinDestination"] = 22
+        button.adjustCoordinatesAfterPlacement((100, 50))
+        self.assertEqual(button.pinLMRMCoordinates[1]["Usage"], "CHANGED")
+        self.assertEqual(button.pinLMRMCoordinates[1]["PinDestination"], 22)
+
+    def test_canvasCornersAreReadOnly(self):
+        button = ButtonComponent("a", 17)
+        button.adjustCoordinatesAfterPlacement((100, 50))
+        with self.assertRaises(TypeError):
+            button.pinLMRMCoordinates[1]["LM"] = button.pinLMRMCoordinates[2]["LM"]
+        self.assertEqual(button.pinLMRMCoordinates[1]["LM"].x, 190.0)
+
+    def test_electricalValuesArePerComponent(self):
+        for componentClass in (ButtonComponent, LEDComponent):
+            with self.subTest(componentClass=componentClass.__name__):
+                first = componentClass("a", 17)
+                second = componentClass("b", 18)
+                first.electricalValuesDict["Changed"] = True
+                self.assertNotIn("Changed", second.electricalValuesDict)
+                self.assertNotIn("Changed", first.componentType.electricalValuesDict)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Utilities.DirectionEnum import BOTTOM, DIRECTION_VECTORS, DOWN, LEFT, RIGHT, SIDES, TOP, UP, DirectionEnum
+
+
+def _rotateVector(vector, quarterTurns):
+    x, y = vector
+    for _ in range(quarterTurns):
+        # a counterclockwise quarter turn on screen, where y points down
+        x, y = y, -x
+    return x, y
+
+
+class DirectionEnumTest(unittest.TestCase):
+    def test_rotatedMatchesRotatingTheUnitVector(self):
+        expectedSides = {
+            (RIGHT, 0): RIGHT, (RIGHT, 1): UP, (RIGHT, 2): LEFT, (RIGHT, 3): DOWN,
+            (UP, 0): UP, (UP, 1): LEFT, (UP, 2): DOWN, (UP, 3): RIGHT,
+            (LEFT, 0): LEFT, (LEFT, 1): DOWN, (LEFT, 2): RIGHT, (LEFT, 3): UP,
+            (DOWN, 0): DOWN, (DOWN, 1): RIGHT, (DOWN, 2): UP, (DOWN, 3): LEFT,
+        }
+        self.assertEqual(len(expectedSides), 16)
+        for (direction, quarterTurns), expected in expectedSides.items():
+            with self.subTest(direction=direction, quarterTurns=quarterTurns):
+                self.assertIs(direction.rotated(quarterTurns), expected)
+                rotatedVector = _rotateVector(DIRECTION_VECTORS[direction.code], quarterTurns)
+                self.assertIs(SIDES[DIRECTION_VECTORS.index(rotatedVector)], expected)
+
+    def test_rotatedWrapsAroundWholeTurns(self):
+        for direction in SIDES:
+            with self.subTest(direction=direction):
+                self.assertIs(direction.rotated(4), direction)
+                self.assertIs(direction.rotated(-1), direction.rotated(3))
+                self.assertIs(direction.rotated(5), direction.rotated(1))
+
+    def test_topAndBottomShareTheCodesOfUpAndDown(self):
+        self.assertEqual(TOP.code, UP.code)
+        self.assertEqual(BOTTOM.code, DOWN.code)
+        self.assertIs(TOP.rotated(1), LEFT)
+        self.assertIs(BOTTOM.rotated(1), RIGHT)
+
+    def test_fromCodeInvertsCode(self):
+        for direction in SIDES:
+            with self.subTest(direction=direction):
+                self.assertIs(DirectionEnum.fromCode(direction.code), direction)
+
+    def test_sidesAreDistinct(self):
+        self.assertNotEqual(LEFT, RIGHT)
+        self.assertEqual(len({LEFT, RIGHT, UP, DOWN}), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from AffineTransform import AffineTransform
+from ComponentTypeRegistry import ComponentType
+from Coordinates import Coordinates
+from Utilities.DirectionEnum import DOWN
+
+
+def _buildType():
+    pins = {
+        1: {"Usage": "INPUT", "LM": Coordinates("LM", 90, 300), "RM": Coordinates("RM", 111, 360), "PinLocation": DOWN, "PinDestination": None, "Note": "signal"},
+        2: {"Usage": "GROUND", "LM": Coordinates("LM", 255, 300), "RM": Coordinates("RM", 278, 360), "PinLocation": DOWN, "PinDestination": "GROUND"},
+    }
+    return ComponentType("Test Button", "TestButton.png", {}, pins, imageSize=(400, 400))
+
+
+class PinTableInstanceTest(unittest.TestCase):
+    def setUp(self):
+        self.componentType = _buildType()
+        self.first = self.componentType.createPinTable({1: 17})
+        self.second = self.componentType.createPinTable({1: 18})
+
+    def test_usageWrittenOnOneTableStaysThere(self):
+        self.first.asPinDict()[1]["Usage"] = "CHANGED"
+        self.assertEqual(self.first.asPinDict()[1]["Usage"], "CHANGED")
+        self.assertEqual(self.second.asPinDict()[1]["Usage"], "INPUT")
+        self.assertEqual(self.componentType.pinTable.asPinDict()[1]["Usage"], "INPUT")
+        self.assertEqual(self.componentType.getPinsByUsage("INPUT"), [1])
+
+    def test_extrasWrittenOnOneTableStayThere(self):
+        self.first.asPinDict()[1]["Note"] = "changed"
+        del self.first.asPinDict()[2]["PinDestination"]
+        self.first.asPinDict()[2]["Wire"] = "red"
+        self.assertEqual(self.second.asPinDict()[1]["Note"], "signal")
+        self.assertEqual(self.second.asPinDict()[2]["PinDestination"], "GROUND")
+        self.assertNotIn("Wire", self.second.asPinDict()[2])
+        self.assertNotIn("Wire", self.componentType.pinTable.asPinDict()[2])
+
+    def test_geometryWrittenOnOneTableStaysThere(self):
+        self.first.asPinDict()[1]["LM"] = Coordinates("LM", 0, 0)
+        self.first.applyTransform(AffineTransform.translation(5, 5))
+        self.assertEqual((self.second.asPinDict()[1]["LM"].x, self.second.asPinDict()[1]["LM"].y), (90.0, 300.0))
+        self.assertEqual(self.componentType.pinTable.asPinDict()[2]["RM"].x, 278.0)
+
+    def test_destinationsArePerTable(self):
+        self.assertEqual(self.first.asPinDict()[1]["PinDestination"], 17)
+        self.assertEqual(self.second.asPinDict()[1]["PinDestination"], 18)
+
+    def test_writesThroughTheTransformedTableReachTheSource(self):
+        world = self.first.transformed(AffineTransform.translation(10, 20))
+        world.asPinDict()[1]["Usage"] = "CHANGED"
+        world.asPinDict()[1]["PinDestination"] = 22
+        moved = self.first.transformed(AffineTransform.translation(30, 40))
+        self.assertEqual(moved.asPinDict()[1]["Usage"], "CHANGED")
+        self.assertEqual(moved.asPinDict()[1]["PinDestination"], 22)
+        self.assertEqual(self.second.asPinDict()[1]["Usage"], "INPUT")
+        self.assertEqual(self.second.asPinDict()[1]["PinDestination"], 18)
+
+    def test_geometryOfTheTransformedTableIsReadOnly(self):
+        world = self.first.transformed(AffineTransform.translation(10, 20))
+        pin = world.asPinDict()[1]
+        with self.assertRaises(TypeError):
+            pin["LM"] = Coordinates("LM", 0, 0)
+        with self.assertRaises(TypeError):
+            pin["RM"].x = 0
+        with self.assertRaises(TypeError):
+            pin["PinLocation"] = None
+        with self.assertRaises(TypeError):
+            del pin["PinLocation"]
+        self.assertEqual((pin["LM"].x, pin["LM"].y), (100.0, 320.0))
+        self.assertIs(pin["PinLocation"], DOWN)
+
+
+if __name__ == "__main__":
+    unittest.main()